@@ -0,0 +1,344 @@
+import argparse
+import json
+import os
+import time
+import multiprocessing
+from datetime import datetime, timedelta
+import cv2
+from clock import parse_replay_start
+from tracker import ZoneTracker, LOG_RETURN_THRESHOLD, TRACK_TTL, ACTIVITY_WINDOW, zone_label
+from main import (is_work_time, is_break_time, extract_detections, zone_summaries_from_totals,
+                  log_activity_to_db, format_time)
+
+ZONE_TIMES = ("working_time", "idle_time", "away_time")
+
+# =========================
+# Chunk planning
+# =========================
+
+def video_duration(source):
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    cap.release()
+    return frames / fps, fps
+
+def plan_chunks(duration, chunk_seconds, overlap_seconds):
+    """Split [0, duration) into chunks; each one warms up over the overlap before its start"""
+    chunks = []
+    start = 0.0
+    while start < duration:
+        end = min(duration, start + chunk_seconds)
+        chunks.append({
+            "index": len(chunks),
+            "warmup_start": max(0.0, start - overlap_seconds),
+            "start": start,
+            "end": end,
+            "last": end >= duration,
+        })
+        start = end
+    return chunks
+
+# =========================
+# Chunk worker
+# =========================
+
+def diff_totals(after, before):
+    return {zone: {k: after[zone][k] - before.get(zone, {}).get(k, 0) for k in ZONE_TIMES} for zone in after}
+
+def process_chunk(job):
+    """Run detection + tracking over one chunk; only [start, end) is counted"""
+    from inference import PoseModel
+    chunk = job["chunk"]
+    start_ts = job["start_ts"]
+    chunk_start_ts = start_ts + chunk["start"]
+    chunk_end_ts = start_ts + chunk["end"]
+    zones = job["zones"]
+
+    model = PoseModel(job["inference"])  # Model baru per chunk supaya state tracker ByteTrack bersih
+    tracking_config = job["tracking"]
+    tracker = ZoneTracker(zones, job["away_timeout"],
+                          track_ttl=tracking_config.get("track_ttl", TRACK_TTL),
+                          long_idle=tracking_config.get("long_idle", 0),
+                          activity_window=tracking_config.get("activity_window", ACTIVITY_WINDOW))
+    cap = cv2.VideoCapture(job["source"])
+    cap.set(cv2.CAP_PROP_POS_MSEC, chunk["warmup_start"] * 1000)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+
+    counting = False
+    closed = False
+    baseline = None
+    hour_start = None
+    last_totals = None
+    cur_hour = None
+    hours = {}
+    events = []
+    present_at_start = {}
+    frames = 0
+    # Setelah end, lanjut sebentar hanya untuk "Returned to Zone" yang mulai sebelum end
+    tail_seconds = 0 if chunk["last"] else LOG_RETURN_THRESHOLD + 1
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames += 1
+        pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        offset = pos_msec / 1000.0 if pos_msec and pos_msec > 0 else chunk["warmup_start"] + (frames - 1) / fps
+        if offset >= chunk["end"] + tail_seconds:
+            break
+        current_time = start_ts + offset
+        now_dt = datetime.fromtimestamp(current_time)
+
+        if not counting and offset >= chunk["start"]:
+            counting = True
+            baseline = tracker.zone_totals()
+            hour_start = baseline
+            last_totals = baseline
+            cur_hour = now_dt.replace(minute=0, second=0, microsecond=0)
+            for zone_id, zone_data in zones.items():
+                present_at_start[zone_label(zone_id, zone_data)] = tracker.zone_worker(zone_id) is not None
+        if counting and not closed and offset >= chunk["end"]:
+            closed = True
+            hours[cur_hour.isoformat()] = diff_totals(last_totals, hour_start)
+
+        frame = cv2.resize(frame, (640, 360))
+        results = model.track(frame)
+        detections = extract_detections(results)
+        work_active = is_work_time(now_dt, job["work_start"], job["work_end"], job["overtime"])
+        break_active = is_break_time(now_dt, job["breaks"])
+        chunk_events = tracker.update(detections, current_time, work_active, break_active)
+
+        for event in chunk_events:
+            if counting and not closed:
+                events.append(event)
+            elif closed and event["event"] == "Returned to Zone" and event["in_zone_start_time"] < chunk_end_ts:
+                events.append(event)
+
+        if counting and not closed:
+            hour = now_dt.replace(minute=0, second=0, microsecond=0)
+            if hour != cur_hour:
+                hours[cur_hour.isoformat()] = diff_totals(last_totals, hour_start)
+                hour_start = last_totals
+                cur_hour = hour
+            last_totals = tracker.zone_totals()
+    cap.release()
+
+    if counting and not closed:
+        hours[cur_hour.isoformat()] = diff_totals(last_totals, hour_start)
+
+    zone_state = {}
+    for zone_id, zone_data in zones.items():
+        zone_name = zone_label(zone_id, zone_data)
+        worker = tracker.zone_worker(zone_id)
+        registered_at = None
+        first_stable_time = None
+        if worker is not None and not present_at_start.get(zone_name):
+            registered_at = worker["first_seen"] if worker["first_seen"] < chunk_end_ts else None
+            first_stable_time = worker["first_stable_time"]
+        zone_state[zone_name] = {
+            "present_at_start": bool(present_at_start.get(zone_name)),
+            "registered_at": registered_at,
+            "first_stable_time": first_stable_time,
+        }
+
+    for event in events:
+        event.pop("message", None)
+    return {
+        "index": chunk["index"],
+        "start_ts": chunk_start_ts,
+        "end_ts": chunk_end_ts,
+        "hours": hours,
+        "events": events,
+        "zones": zone_state,
+        "frames": frames,
+    }
+
+# =========================
+# Stitching
+# =========================
+
+def add_interval(hours, zone_name, key, start_ts, end_ts):
+    """Spread seconds of [start_ts, end_ts) over the hour buckets they fall in"""
+    t = start_ts
+    while t < end_ts:
+        hour = datetime.fromtimestamp(t).replace(minute=0, second=0, microsecond=0)
+        hour_end = (hour + timedelta(hours=1)).timestamp()
+        seg_end = min(end_ts, hour_end)
+        bucket = hours.setdefault(hour.isoformat(), {}).setdefault(zone_name, {k: 0 for k in ZONE_TIMES})
+        bucket[key] += seg_end - t
+        t = seg_end
+
+def stitch_chunks(results, zone_names, long_idle=0):
+    """Merge chunk results into one timeline as if a single live run processed the recording.
+
+    A chunk only knows people seen during its warm-up. A worker who was
+    already gone before the warm-up is unknown to the next chunk, so the
+    gap until they reappear is added here as away time, and their return
+    is logged. Events then go through the same Left/Returned flag rules
+    as ZoneTracker, so each zone logs the same sequence a live run would.
+    A Long Idle that a later chunk re-detects from its warm-up (within
+    long_idle seconds of its start) is dropped.
+    """
+    hours = {}
+    events = []
+    known = {zone: False for zone in zone_names}
+    event_chunk = {}  # id(event) -> (chunk index, chunk start_ts)
+    for result in sorted(results, key=lambda r: r["index"]):
+        for hour, zones in result["hours"].items():
+            for zone_name, delta in zones.items():
+                bucket = hours.setdefault(hour, {}).setdefault(zone_name, {k: 0 for k in ZONE_TIMES})
+                for k in ZONE_TIMES:
+                    bucket[k] += delta[k]
+        events.extend(result["events"])
+        for event in result["events"]:
+            event_chunk[id(event)] = (result["index"], result["start_ts"])
+
+        for zone_name, state in result["zones"].items():
+            if known[zone_name] and not state["present_at_start"]:
+                gap_end = state["registered_at"] or result["end_ts"]
+                add_interval(hours, zone_name, "away_time", result["start_ts"], gap_end)
+                if state["registered_at"] and state["first_stable_time"]:
+                    events.append({
+                        "zone_name": zone_name,
+                        "event": "Returned to Zone",
+                        "status_change": "away → working",
+                        "timestamp": state["first_stable_time"],
+                    })
+            if state["present_at_start"] or state["registered_at"]:
+                known[zone_name] = True
+
+    # Flag "Left Zone"/"Returned to Zone" sama seperti di ZoneTracker
+    stitched_events = []
+    flags = {}
+    for event in sorted(events, key=lambda e: e["timestamp"]):
+        flag = flags.setdefault(event["zone_name"], {"left": False, "returned": False, "long_idle_chunk": None})
+        if event["event"] == "Left Zone" and not flag["left"]:
+            flag["left"] = True
+            flag["returned"] = False
+            flag["long_idle_chunk"] = None
+            stitched_events.append(event)
+        elif event["event"] == "Returned to Zone" and flag["left"] and not flag["returned"]:
+            flag["returned"] = True
+            stitched_events.append(event)
+        elif event["event"] == "Long Idle":
+            # Idle yang sama bisa terdeteksi lagi oleh chunk berikutnya (tracker baru, timer idle mulai dari warm-up)
+            chunk, chunk_start = event_chunk.get(id(event), (None, 0))
+            repeated = (flag["long_idle_chunk"] is not None and flag["long_idle_chunk"] != chunk and
+                        event["timestamp"] < chunk_start + long_idle)
+            if not repeated:
+                stitched_events.append(event)
+            flag["long_idle_chunk"] = chunk
+    return hours, stitched_events
+
+def cumulative_summaries(hours, zone_names):
+    """Live runs store running totals in each hour row; rebuild the same shape"""
+    running = {zone: {k: 0 for k in ZONE_TIMES} for zone in zone_names}
+    running_date = None
+    summaries = []
+    for hour in sorted(hours):
+        # Total kumulatif di DB reset tiap hari (ZoneTracker.reset_day), backfill juga
+        hour_date = datetime.fromisoformat(hour).date()
+        if hour_date != running_date:
+            running = {zone: {k: 0 for k in ZONE_TIMES} for zone in zone_names}
+            running_date = hour_date
+        for zone_name, delta in hours[hour].items():
+            for k in ZONE_TIMES:
+                running[zone_name][k] += delta[k]
+        summaries.append((datetime.fromisoformat(hour), {z: dict(t) for z, t in running.items()}))
+    return summaries
+
+# =========================
+# Main
+# =========================
+
+def run_backfill(source, start, cam_idx, cam_config, chunk_minutes=30, overlap_seconds=None,
+                 workers=None, inference_config=None, write_db=True, tracking_config=None):
+    start_dt = parse_replay_start(start) if isinstance(start, str) else start
+    away_timeout = cam_config.get("away_timeout", 5) * 60
+    if overlap_seconds is None:
+        overlap_seconds = away_timeout + LOG_RETURN_THRESHOLD + 30
+    duration, fps = video_duration(source)
+    chunks = plan_chunks(duration, chunk_minutes * 60, overlap_seconds)
+    # Export sekali di sini, jangan sampai tiap worker pool export bersamaan
+    from inference import export_model
+    export_model(inference_config)
+    workers = workers or max(1, min(len(chunks), (os.cpu_count() or 2) // 2))
+    zones = cam_config.get("zones", {})
+    zone_names = [zone_label(zone_id, z) for zone_id, z in zones.items()]
+
+    print(f"[Backfill] {source}: {format_time(duration)} of video, {len(chunks)} chunks of {chunk_minutes}m, "
+          f"overlap {overlap_seconds:.0f}s, {workers} workers")
+    jobs = [{
+        "source": source,
+        "start_ts": start_dt.timestamp(),
+        "chunk": chunk,
+        "zones": zones,
+        "away_timeout": away_timeout,
+        "work_start": cam_config.get("work_start", ""),
+        "work_end": cam_config.get("work_end", ""),
+        "breaks": cam_config.get("breaks", []),
+        "overtime": cam_config.get("overtime", []),
+        "inference": inference_config,
+        "tracking": tracking_config or {},
+    } for chunk in chunks]
+
+    t0 = time.time()
+    results = []
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(process_chunk, jobs):
+            results.append(result)
+            print(f"[Backfill] Chunk {result['index'] + 1}/{len(chunks)} done ({result['frames']} frames, "
+                  f"{len(results)}/{len(chunks)} after {time.time() - t0:.0f}s)")
+
+    hours, events = stitch_chunks(results, zone_names, (tracking_config or {}).get("long_idle", 0))
+    summaries = cumulative_summaries(hours, zone_names)
+    elapsed = time.time() - t0
+    print(f"[Backfill] Finished in {format_time(elapsed)} ({duration / max(elapsed, 1e-6):.1f}x real time)")
+
+    report = {
+        "source": source,
+        "camera": cam_idx,
+        "start": start_dt.isoformat(),
+        "chunks": len(chunks),
+        "overlap_seconds": overlap_seconds,
+        "summaries": [{"hour": h.isoformat(), "zones": z} for h, z in summaries],
+        "events": [dict(e, time=datetime.fromtimestamp(e["timestamp"]).isoformat()) for e in events],
+    }
+    report_path = f"backfill_cam{cam_idx}_{start_dt.strftime('%Y%m%d_%H%M')}.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"[Backfill] Report written to {report_path}")
+
+    if write_db:
+        from database import DatabaseManager
+        db_manager = DatabaseManager()
+        for event in events:
+            log_activity_to_db(db_manager, cam_idx, event["zone_name"], event["event"], event["status_change"],
+                               event["timestamp"], event_time=datetime.fromtimestamp(event["timestamp"]))
+        for summary_hour, totals in summaries:
+            db_manager.save_summary(cam_idx, zone_summaries_from_totals(totals), summary_hour)
+        db_manager.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-process a long recording in parallel time chunks")
+    parser.add_argument("source", help="Recorded video file")
+    parser.add_argument("--start", required=True, help="Wall-clock datetime of the first frame, e.g. '2025-11-07 05:00'")
+    parser.add_argument("--camera", type=int, help="Camera index in config.json (default: match by source)")
+    parser.add_argument("--chunk-minutes", type=float, default=30)
+    parser.add_argument("--overlap-seconds", type=float, help="Warm-up before each chunk (default: away timeout + 45s)")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: half the cores)")
+    parser.add_argument("--no-db", action="store_true", help="Only write the JSON report")
+    args = parser.parse_args()
+
+    from replay import find_camera
+    with open("config.json") as f:
+        config = json.load(f)
+    cam_idx, cam_config = find_camera(config["video_sources"], args.source, args.camera)
+    run_backfill(args.source, args.start, cam_idx, cam_config, args.chunk_minutes, args.overlap_seconds,
+                 args.workers, config.get("inference"), write_db=not args.no_db,
+                 tracking_config=config.get("tracking", {}))
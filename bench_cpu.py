@@ -0,0 +1,80 @@
+import json
+import time
+import argparse
+import multiprocessing
+from cpuplan import plan_cpu, apply_cpu_plan, available_cores, describe_plan
+
+
+def bench_worker(cam_idx, entry, source, inference_config, seconds, start_barrier, results):
+    """One simulated camera: inference on pre-read frames for a fixed time"""
+    apply_cpu_plan(entry, f"Camera {cam_idx}")
+    import cv2
+    from inference import PoseModel
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < 100:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (640, 360)))
+    cap.release()
+    model = PoseModel(inference_config)
+    model.warmup()
+    start_barrier.wait()
+    count = 0
+    t_end = time.perf_counter() + seconds
+    while time.perf_counter() < t_end:
+        model.predict(frames[count % len(frames)])
+        count += 1
+    results.put((cam_idx, count / seconds))
+
+
+def run_plan(name, entries, num_cameras, source, inference_config, seconds):
+    start_barrier = multiprocessing.Barrier(num_cameras)
+    results = multiprocessing.Queue()
+    jobs = [multiprocessing.Process(target=bench_worker, args=(cam_idx, entries.get(cam_idx), source,
+                                                                inference_config, seconds, start_barrier, results))
+            for cam_idx in range(1, num_cameras + 1)]
+    for p in jobs:
+        p.start()
+    per_camera = dict(results.get() for _ in jobs)
+    for p in jobs:
+        p.join()
+    total = sum(per_camera.values())
+    print(f"[Bench] {name}: {total:.1f} fps total, min {min(per_camera.values()):.1f} / "
+          f"max {max(per_camera.values()):.1f} fps per camera")
+    return total, per_camera
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate inference throughput of N camera workers under different CPU plans")
+    parser.add_argument("source", help="Video file used by every simulated camera")
+    parser.add_argument("--cameras", type=int, help="Number of camera workers (default: from config.json)")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 2, 4], help="Extra plans: N threads per camera, no pinning")
+    args = parser.parse_args()
+
+    with open("config.json") as f:
+        config = json.load(f)
+    num_cameras = args.cameras or len(config["video_sources"])
+    cores = available_cores()
+    print(f"[Bench] {num_cameras} cameras on {len(cores)} cores, {args.seconds:.0f}s per plan")
+
+    auto = plan_cpu(num_cameras, {"reserve": 0})
+    configured = plan_cpu(num_cameras, config.get("cpu"))
+    plans = [("default (no pinning, library thread defaults)", {})]
+    for threads in args.threads:
+        plans.append((f"{threads} threads, no pinning", {i: {"threads": threads} for i in range(1, num_cameras + 1)}))
+    plans.append(("auto plan, pinned, no reserve", auto["cameras"]))
+    plans.append(("config.json plan", configured["cameras"]))
+    for line in describe_plan(configured):
+        print(f"[Bench]   {line}")
+
+    summary = []
+    for name, entries in plans:
+        total, per_camera = run_plan(name, entries, num_cameras, args.source, config.get("inference"), args.seconds)
+        summary.append((name, total, min(per_camera.values())))
+
+    print(f"\n{'Plan':<48}{'Total FPS':>10}{'Min cam FPS':>13}")
+    for name, total, slowest in summary:
+        print(f"{name:<48}{total:>10.1f}{slowest:>13.1f}")
@@ -0,0 +1,145 @@
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import cv2
+from inference import PoseModel, inference_settings
+
+VARIANTS = [
+    {"backend": "pytorch", "int8": False},
+    {"backend": "onnx", "int8": False},
+    {"backend": "onnx", "int8": True},
+    {"backend": "openvino", "int8": False},
+    {"backend": "openvino", "int8": True},
+]
+
+
+def read_frames(source, count):
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (640, 360)))
+    cap.release()
+    if not frames:
+        sys.exit(f"Cannot read frames from {source}")
+    return frames
+
+
+def pose_outputs(results):
+    """(boxes xyxy, keypoints xy, keypoint conf) of the first result as numpy arrays"""
+    result = results[0]
+    if result.keypoints is None or len(result.boxes) == 0:
+        return np.zeros((0, 4)), np.zeros((0, 17, 2)), np.zeros((0, 17))
+    return (result.boxes.xyxy.cpu().numpy(), result.keypoints.xy.cpu().numpy(),
+            result.keypoints.conf.cpu().numpy())
+
+
+def box_iou(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def keypoint_agreement(reference, candidate, pck_pixels=5.0, visibility=0.5):
+    """Match people by box IoU, then compare keypoints visible in the reference"""
+    ref_boxes, ref_kpts, ref_conf = reference
+    boxes, kpts, _ = candidate
+    stats = {"people": len(ref_boxes), "matched": 0, "errors": []}
+    if len(ref_boxes) == 0 or len(boxes) == 0:
+        return stats
+    iou = box_iou(ref_boxes, boxes)
+    used = set()
+    for i in np.argsort(-iou.max(axis=1)):
+        j = int(np.argmax(iou[i]))
+        if iou[i, j] < 0.5 or j in used:
+            continue
+        used.add(j)
+        stats["matched"] += 1
+        mask = ref_conf[i] > visibility
+        stats["errors"].extend(np.linalg.norm(ref_kpts[i][mask] - kpts[j][mask], axis=1).tolist())
+    return stats
+
+
+def benchmark(variant, frames, warmup=5):
+    model = PoseModel(variant)
+    for frame in frames[:warmup]:
+        model.predict(frame)
+    latencies = []
+    outputs = []
+    t0 = time.perf_counter()
+    for frame in frames:
+        t = time.perf_counter()
+        results = model.predict(frame)
+        latencies.append(time.perf_counter() - t)
+        outputs.append(pose_outputs(results))
+    total = time.perf_counter() - t0
+    return model.name, latencies, total, outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare pose inference backends: latency, throughput and keypoint agreement")
+    parser.add_argument("source", help="Video file to sample frames from")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--imgsz", type=int, nargs="+", help="Input sizes (default: from config.json)")
+    parser.add_argument("--backends", nargs="+", choices=["pytorch", "onnx", "onnx-int8", "openvino", "openvino-int8"])
+    parser.add_argument("--pck", type=float, default=5.0, help="Keypoint agreement radius in pixels")
+    args = parser.parse_args()
+
+    try:
+        with open("config.json") as f:
+            base = inference_settings(json.load(f).get("inference", {}))
+    except FileNotFoundError:
+        base = inference_settings()
+    frames = read_frames(args.source, args.frames)
+    sizes = args.imgsz or [base["imgsz"]]
+    variants = VARIANTS
+    if args.backends:
+        variants = [v for v in VARIANTS if v["backend"] + ("-int8" if v["int8"] else "") in args.backends]
+
+    print(f"[Bench] {len(frames)} frames from {args.source}, reference = pytorch@{sizes[0]}")
+    reference = None
+    rows = []
+    for imgsz in sizes:
+        for variant in variants:
+            settings = dict(base, imgsz=imgsz, **variant)
+            try:
+                name, latencies, total, outputs = benchmark(settings, frames)
+            except Exception as e:
+                print(f"[Bench] {variant['backend']}{'-int8' if variant['int8'] else ''}@{imgsz} skipped: {e}")
+                continue
+            if reference is None:
+                # Referensi = varian pertama (PyTorch FP32 bila ikut dijalankan)
+                reference = outputs
+            people = matched = 0
+            errors = []
+            for ref, out in zip(reference, outputs):
+                stats = keypoint_agreement(ref, out, args.pck)
+                people += stats["people"]
+                matched += stats["matched"]
+                errors.extend(stats["errors"])
+            errors = np.asarray(errors)
+            rows.append({
+                "name": name,
+                "p50_ms": np.percentile(latencies, 50) * 1000,
+                "p95_ms": np.percentile(latencies, 95) * 1000,
+                "fps": len(frames) / total,
+                "matched": matched / people if people else 1.0,
+                "kpt_err": float(errors.mean()) if len(errors) else 0.0,
+                "pck": float((errors <= args.pck).mean()) if len(errors) else 1.0,
+            })
+            r = rows[-1]
+            print(f"[Bench] {name}: p50 {r['p50_ms']:.1f}ms p95 {r['p95_ms']:.1f}ms {r['fps']:.1f} fps")
+
+    print(f"\n{'Backend':<22}{'p50 ms':>8}{'p95 ms':>8}{'FPS':>8}{'Matched':>9}{'Kpt err':>9}{'PCK@' + str(args.pck):>9}")
+    for r in rows:
+        print(f"{r['name']:<22}{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['fps']:>8.1f}"
+              f"{r['matched'] * 100:>8.1f}%{r['kpt_err']:>8.2f}px{r['pck'] * 100:>8.1f}%")
@@ -0,0 +1,164 @@
+import time
+import threading
+import multiprocessing
+from tracker import ACTIVITY_GRID
+
+DEFAULT_BUDGET = {
+    "enabled": False,
+    "total_fps": None,       # Kapasitas inference host; None = estimasi dari latency worker
+    "headroom": 0.9,
+    "max_fps": 15,
+    "min_fps": 1,            # Dijamin untuk tiap kamera walau host penuh
+    "people_min_fps": None,  # Dijamin selama ada orang; None = 1/ACTIVITY_GRID supaya skor aktivitas tidak alias ke idle
+    "idle_fps": 2,           # Kamera tanpa orang / tanpa transisi
+    "idle_activity": 0.05,
+    "transition_boost": 3.0,
+    "interval": 1.0,
+    "report_interval": 60,
+}
+
+
+def budget_settings(budget_config=None):
+    settings = dict(DEFAULT_BUDGET)
+    settings.update(budget_config or {})
+    if settings["people_min_fps"] is None:
+        settings["people_min_fps"] = 1.0 / ACTIVITY_GRID
+    return settings
+
+
+class BudgetClient:
+    """Worker side of the budget: gates inference to the assigned rate and publishes priority/latency"""
+
+    def __init__(self, cam_idx, importance, settings, priority, pending, latency, effective, target, people):
+        self.cam_idx = cam_idx
+        self.importance = importance
+        self.settings = settings
+        self.priority = priority
+        self.pending = pending
+        self.latency = latency
+        self.effective = effective
+        self.target = target
+        self.people = people
+        self.activity = 1.0  # Mulai penuh sampai terbukti kosong
+        self.last_inference = None
+        self.window_start = None
+        self.window_count = 0
+
+    @property
+    def target_fps(self):
+        return self.target[self.cam_idx - 1]
+
+    @property
+    def effective_fps(self):
+        return self.effective[self.cam_idx - 1]
+
+    def should_infer(self, now):
+        """now is the camera clock (video time in replay), so sampling follows the stream, not the host"""
+        if self.last_inference is None or now < self.last_inference:
+            return True
+        return now - self.last_inference >= 1.0 / max(self.target_fps, 1e-3)
+
+    def report(self, now, people, pending_transitions, inference_seconds):
+        i = self.cam_idx - 1
+        self.last_inference = now
+        self.activity = 0.9 * self.activity + 0.1 * (1.0 if people else 0.0)
+        self.priority[i] = self.importance * (0.1 + self.activity) * (
+            self.settings["transition_boost"] if pending_transitions else 1.0)
+        self.pending[i] = 1 if pending_transitions else 0
+        self.people[i] = people
+        previous = self.latency[i]
+        self.latency[i] = inference_seconds if previous <= 0 else 0.8 * previous + 0.2 * inference_seconds
+
+        self.window_count += 1
+        if self.window_start is None:
+            self.window_start = now
+        elif now - self.window_start >= 1.0:
+            self.effective[i] = self.window_count / (now - self.window_start)
+            self.window_start = now
+            self.window_count = 0
+
+
+class InferenceBudget:
+    """Launcher-side scheduler that hands out per-camera inference rates by priority"""
+
+    def __init__(self, num_cameras, budget_config=None, importance=None):
+        self.num_cameras = num_cameras
+        self.settings = budget_settings(budget_config)
+        self.importance = list(importance or [1.0] * num_cameras)
+        self.priority = multiprocessing.Array('d', [1.0] * num_cameras)
+        self.pending = multiprocessing.Array('i', [0] * num_cameras)
+        self.latency = multiprocessing.Array('d', [0.0] * num_cameras)
+        self.effective = multiprocessing.Array('d', [0.0] * num_cameras)
+        self.target = multiprocessing.Array('d', [float(self.settings["max_fps"])] * num_cameras)
+        self.people = multiprocessing.Array('i', [0] * num_cameras)
+
+    def client(self, cam_idx):
+        return BudgetClient(cam_idx, self.importance[cam_idx - 1], self.settings, self.priority,
+                            self.pending, self.latency, self.effective, self.target, self.people)
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        print(f"[Budget] Scheduling {self.num_cameras} cameras, {self.settings['min_fps']}-{self.settings['max_fps']} fps each")
+
+    def capacity(self):
+        if self.settings["total_fps"]:
+            return self.settings["total_fps"]
+        latencies = self.latency[:]
+        if any(lat <= 0 for lat in latencies):
+            return None  # Belum semua worker lapor, jangan batasi dulu
+        return self.settings["headroom"] * sum(1.0 / lat for lat in latencies)
+
+    def floor(self, i):
+        """Guaranteed rate: min_fps, or people_min_fps while someone is in view (windowed scoring needs 1/ACTIVITY_GRID)"""
+        s = self.settings
+        return float(max(s["min_fps"], s["people_min_fps"]) if self.people[i] else s["min_fps"])
+
+    def demand(self, i, priority):
+        """Busy cameras want full rate, idle ones only the idle sampling rate"""
+        s = self.settings
+        active = self.pending[i] or priority > self.importance[i] * (0.1 + s["idle_activity"])
+        return float(s["max_fps"] if active else max(s["idle_fps"], self.floor(i)))
+
+    def allocate(self):
+        priorities = self.priority[:]
+        demands = [self.demand(i, p) for i, p in enumerate(priorities)]
+        capacity = self.capacity()
+        if capacity is None or capacity >= sum(demands):
+            targets = demands
+        else:
+            # Water-filling: floor dulu, sisa kapasitas dibagi proporsional prioritas sampai demand terpenuhi
+            targets = [min(self.floor(i), d) for i, d in enumerate(demands)]
+            remaining = capacity - sum(targets)
+            open_set = [i for i in range(self.num_cameras) if targets[i] < demands[i]]
+            while remaining > 1e-6 and open_set:
+                weight = sum(priorities[i] for i in open_set) or len(open_set)
+                spent = 0.0
+                for i in list(open_set):
+                    share = remaining * (priorities[i] or 1.0) / weight
+                    grant = min(share, demands[i] - targets[i])
+                    targets[i] += grant
+                    spent += grant
+                    if targets[i] >= demands[i] - 1e-6:
+                        open_set.remove(i)
+                remaining -= spent
+                if spent <= 1e-6:
+                    break
+        for i, value in enumerate(targets):
+            self.target[i] = value
+        return targets, capacity
+
+    def run(self):
+        last_report = time.time()
+        while True:
+            targets, capacity = self.allocate()
+            if time.time() - last_report >= self.settings["report_interval"]:
+                last_report = time.time()
+                print(self.report(targets, capacity))
+            time.sleep(self.settings["interval"])
+
+    def report(self, targets=None, capacity=None):
+        targets = targets or self.target[:]
+        capacity_text = f"{capacity:.1f}" if capacity else "unlimited"
+        cams = ", ".join(f"cam{i + 1} {self.effective[i]:.1f}/{targets[i]:.1f}" + ("*" if self.pending[i] else "")
+                         for i in range(self.num_cameras))
+        return f"[Budget] capacity {capacity_text} fps | effective/target: {cams}"
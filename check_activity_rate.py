@@ -0,0 +1,128 @@
+import sys
+import math
+import json
+import random
+import argparse
+import numpy as np
+from tracker import ZoneTracker, ACTIVITY_WINDOW, ACTIVITY_GRID
+
+ZONES = {
+    "1": [100, 130, 225, 350, "Zone 1"],
+    "2": [250, 130, 450, 350, "Zone 2"],
+    "3": [460, 130, 597, 350, "Zone 3"],
+}
+# Kerangka berdiri relatif terhadap pusat (x, y) untuk 17 keypoint COCO
+SKELETON = np.array([
+    (0, -70), (-5, -74), (5, -74), (-10, -72), (10, -72), (-20, -50), (20, -50), (-28, -20), (28, -20),
+    (-30, 5), (30, 5), (-14, 10), (14, 10), (-14, 50), (14, 50), (-14, 90), (14, 90),
+], dtype=np.float32)
+
+
+def synthetic_clip(minutes=10, fps=30, jitter=0.3, seed=0):
+    """30 fps detections of people alternating working (hand motion) and idle (keypoint jitter only).
+
+    Returns (frames, truth) where truth maps (zone_id, second) to "working"/"idle".
+    """
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    visibility = np.ones(17, dtype=np.float32)
+    people = []
+    for zone_id, zone in ZONES.items():
+        x1, y1, x2, y2 = zone[:4]
+        segments, t = [], 0.0
+        while t < minutes * 60:
+            length = rng.uniform(10, 60)
+            segments.append((t, t + length, rng.random() < 0.5, rng.uniform(0.7, 2.0), rng.uniform(6, 20)))
+            t += length
+        people.append((zone_id, (x1 + x2) / 2, (y1 + y2) / 2, segments))
+    frames = []
+    for i in range(int(minutes * 60 * fps)):
+        t = i / fps
+        detections = []
+        for track_id, (_, cx, cy, segments) in enumerate(people, start=1):
+            _, _, working, freq, amplitude = next(s for s in segments if s[0] <= t < s[1])
+            keypoints = SKELETON + (cx, cy)
+            if working:
+                swing = amplitude * math.sin(2 * math.pi * freq * t)
+                keypoints[9] += (swing * 0.5, swing)
+                keypoints[10] += (-swing * 0.5, -swing)
+            keypoints = keypoints + noise.normal(0, jitter, keypoints.shape).astype(np.float32)
+            detections.append((track_id, keypoints, visibility))
+        frames.append((1_700_000_000.0 + t, detections))
+    truth = {}
+    for zone_id, _, _, segments in people:
+        for start, end, working, _, _ in segments:
+            for second in range(math.ceil(start), min(math.ceil(end), int(minutes * 60))):
+                truth[(zone_id, 1_700_000_000 + second)] = "working" if working else "idle"
+    return frames, truth
+
+
+def subsample(frames, rate):
+    """Keep frames as a camera processing at `rate` fps would (by timestamp, not by index)"""
+    kept, next_time = [], None
+    for timestamp, detections in frames:
+        if next_time is None or timestamp >= next_time - 1e-6:
+            kept.append((timestamp, detections))
+            next_time = (next_time or timestamp) + 1.0 / rate
+    return kept
+
+
+def status_timeline(frames, zones, activity_window, tick=1.0):
+    """Status of every zone's person once per second of clip time"""
+    tracker = ZoneTracker(zones, 5 * 60, activity_window=activity_window)
+    timeline, next_tick = {}, None
+    for timestamp, detections in frames:
+        tracker.update(detections, timestamp, True, False)
+        if next_tick is None:
+            next_tick = math.ceil(timestamp)
+        while timestamp >= next_tick:
+            for zone_id in zones:
+                worker = tracker.zone_worker(zone_id)
+                timeline[(zone_id, next_tick)] = worker["status"] if worker else None
+            next_tick += tick
+    return timeline, tracker.zone_totals()
+
+
+def agreement(reference, timeline):
+    keys = [k for k in reference if k in timeline]
+    return sum(reference[k] == timeline[k] for k in keys) / len(keys) if keys else 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that activity classification agrees across processing rates of one clip")
+    parser.add_argument("--cache", help="Detection cache recorded at full rate (replay.py --save-detections); default: synthetic clip")
+    parser.add_argument("--camera", type=int, help="Camera index in config.json for the cache's zones")
+    parser.add_argument("--rates", type=float, nargs="+", default=[30, 15, 10, 5])
+    parser.add_argument("--minutes", type=float, default=10, help="Synthetic clip length")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if args.cache:
+        from detcache import DetectionCacheReader
+        reader = DetectionCacheReader(args.cache)
+        frames, truth = list(reader), None
+        cam_idx = args.camera or reader.meta.get("camera")
+        with open("config.json") as f:
+            zones = json.load(f)["video_sources"][cam_idx - 1][1]["zones"]
+    else:
+        frames, truth = synthetic_clip(args.minutes)
+        zones = ZONES
+    source_rate = (len(frames) - 1) / (frames[-1][0] - frames[0][0])
+    print(f"[Check] {len(frames)} frames at {source_rate:.1f} fps, rates {args.rates}")
+
+    ok = True
+    for label, window in (("per-frame", 0), ("window", ACTIVITY_WINDOW)):
+        reference, _ = status_timeline(frames, zones, window)
+        print(f"{label:<10}{'Rate':>6}{'Agreement':>11}{'Truth':>8}  Working seconds per zone")
+        for rate in args.rates:
+            timeline, totals = status_timeline(subsample(frames, rate), zones, window)
+            match = agreement(reference, timeline)
+            # Label sintetis: status idle baru muncul setelah idle_timeout, jadi 100% tidak mungkin
+            correct = f"{agreement(truth, timeline) * 100:>7.1f}%" if truth else f"{'-':>8}"
+            working = ", ".join(f"{name} {t['working_time']:.0f}" for name, t in totals.items())
+            print(f"{'':<10}{rate:>6g}{match * 100:>10.1f}%{correct}  {working}")
+            # Hanya mode window yang dijanjikan konsisten; per-frame ditampilkan sebagai pembanding
+            if window and rate <= source_rate + 0.5 and rate >= 1.0 / ACTIVITY_GRID - 1e-6 and match < args.min_agreement:
+                ok = False
+    print(f"[Check] {'PASS' if ok else 'FAIL'}: window classification agreement >= {args.min_agreement * 100:.0f}% at every rate")
+    sys.exit(0 if ok else 1)
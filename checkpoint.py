@@ -0,0 +1,97 @@
+import os
+import time
+import pickle
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT = {
+    "enabled": False,
+    "dir": "checkpoints",
+    "interval": 30,       # Detik antar checkpoint
+    "max_gap": 6 * 3600,  # Checkpoint lebih tua dari ini tidak dipakai
+}
+
+
+def checkpoint_settings(checkpoint_config=None):
+    settings = dict(DEFAULT_CHECKPOINT)
+    settings.update(checkpoint_config or {})
+    return settings
+
+
+def checkpoint_path(checkpoint_dir, cam_idx):
+    return os.path.join(checkpoint_dir, f"cam{cam_idx}.ckpt")
+
+
+def save_checkpoint(path, cam_idx, tracker, saved_at, day):
+    """Pickle the tracker state next to the target, then rename so a crash never leaves half a file"""
+    payload = {
+        "version": CHECKPOINT_VERSION,
+        "camera": cam_idx,
+        "saved_at": saved_at,
+        "day": day.isoformat(),
+        "state": tracker.snapshot(),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, cam_idx, now, day, max_gap):
+    """Return (payload, gap seconds), or (None, reason) when there is nothing usable"""
+    if not os.path.exists(path):
+        return None, "no checkpoint"
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        return None, f"unreadable checkpoint ({e})"
+    if payload.get("version") != CHECKPOINT_VERSION or payload.get("camera") != cam_idx:
+        return None, "checkpoint from another version/camera"
+    if payload["day"] != day.isoformat():
+        return None, f"checkpoint is from {payload['day']}"
+    gap = now - payload["saved_at"]
+    if gap < 0 or gap > max_gap:
+        return None, f"checkpoint gap {gap:.0f}s out of range"
+    return payload, gap
+
+
+def restore_tracker(path, cam_idx, tracker, now, day, max_gap):
+    """Restore tracker in place; returns gap seconds (None when nothing was restored)"""
+    t0 = time.perf_counter()
+    payload, gap = load_checkpoint(path, cam_idx, now, day, max_gap)
+    if payload is None:
+        print(f"[Checkpoint] Camera {cam_idx}: starting fresh, {gap}")
+        return None
+    tracker.restore(payload["state"], gap)
+    print(f"[Checkpoint] Camera {cam_idx}: restored {len(tracker.worker_data)} people in "
+          f"{(time.perf_counter() - t0) * 1000:.1f}ms, downtime gap {gap:.0f}s")
+    return gap
+
+
+def seed_from_database(db_manager, cam_idx, tracker, day):
+    """Continue today's totals from the latest worker_summary rows when they are ahead of the tracker.
+
+    Checkpoints live on local disk: a camera moved to another node starts
+    without one, and a camera moved back finds a stale one. Either way the
+    first save_summary would overwrite the current hour with lower totals.
+    Returns True when the database totals replaced the tracker state.
+    """
+    try:
+        rows = db_manager.get_day_totals(day.isoformat(), cam_idx, strict=True)
+    except Exception as e:
+        print(f"[Checkpoint] Camera {cam_idx}: cannot read today's totals ({e}), keeping local state")
+        return False
+    recorded = {row["zone_name"]: {
+        "working_time": float(row["working_time_seconds"]),
+        "idle_time": float(row["idle_time_seconds"]),
+        "away_time": float(row["away_time_seconds"]),
+    } for row in rows}
+    current = tracker.zone_totals()
+    # Summary ditulis tiap 5 menit, checkpoint tiap 30 detik: normalnya checkpoint yang lebih maju
+    if not any(sum(t.values()) > sum(current.get(zone_name, {}).values()) + 1 for zone_name, t in recorded.items()):
+        return False
+    tracker.reset_day()
+    tracker.seed_totals(recorded)
+    print(f"[Checkpoint] Camera {cam_idx}: continuing today's totals of {len(recorded)} zones from the database")
+    return True
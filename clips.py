@@ -0,0 +1,214 @@
+import os
+import sys
+import glob
+import json
+import time
+import bisect
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from recording import TS_PACKET, ts_program_headers
+
+STREAMS = ("rec", "timelapse")
+CHUNK = 1 << 20
+
+
+def parse_time(value):
+    """Epoch seconds or ISO datetime ("2025-01-01 10:00:00") to epoch seconds"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+class SegmentIndex:
+    """Reads the .idx sidecars written by recording.SegmentWriter, re-reading a file only when it grew"""
+
+    def __init__(self, rec_dir="recordings"):
+        self.rec_dir = rec_dir
+        self.cache = {}  # path -> (idx size, times, offsets)
+        self.headers_cache = {}  # ts path -> PAT + PMT
+        self.lock = threading.Lock()
+
+    def load(self, idx_path):
+        size = os.path.getsize(idx_path)
+        with self.lock:
+            cached = self.cache.get(idx_path)
+            if cached is not None and cached[0] == size:
+                return cached[1], cached[2]
+        times, offsets = [], []
+        with open(idx_path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    times.append(float(parts[0]))
+                    offsets.append(int(parts[1]))
+        with self.lock:
+            self.cache[idx_path] = (size, times, offsets)
+        return times, offsets
+
+    def headers(self, path):
+        """PAT + PMT packets of a segment (b"" if not found yet), prepended to cuts that start mid-file"""
+        with self.lock:
+            cached = self.headers_cache.get(path)
+        if cached is not None:
+            return cached
+        with open(path, "rb") as f:
+            headers = ts_program_headers(f.read(64 * TS_PACKET))
+        if headers is None:
+            return b""
+        with self.lock:
+            self.headers_cache[path] = headers
+        return headers
+
+    def default_stream(self, cam_idx):
+        """rec when continuous segments exist, otherwise timelapse (recording.mode = events)"""
+        return "rec" if self.segments(cam_idx, "rec") else "timelapse"
+
+    def segments(self, cam_idx, stream="rec"):
+        """[(ts path, keyframe times, byte offsets)] in time order"""
+        pattern = os.path.join(self.rec_dir, f"cam{cam_idx}", "*", f"{stream}_cam{cam_idx}_*.ts.idx")
+        result = []
+        for idx_path in glob.glob(pattern):
+            times, offsets = self.load(idx_path)
+            if times:
+                result.append((idx_path[:-len(".idx")], times, offsets))
+        result.sort(key=lambda s: s[1][0])
+        return result
+
+    def ranges(self, cam_idx, start, end, stream="rec"):
+        """Byte ranges [(ts path, begin, stop, headers)] covering start..end, cut at the surrounding keyframes"""
+        segments = self.segments(cam_idx, stream)
+        ranges = []
+        for i, (path, times, offsets) in enumerate(segments):
+            segment_end = segments[i + 1][1][0] if i + 1 < len(segments) else float("inf")
+            if times[0] > end or segment_end <= start:
+                continue
+            # Keyframe terakhir <= start, dan keyframe pertama > end (atau akhir file)
+            first = max(0, bisect.bisect_right(times, start) - 1)
+            last = bisect.bisect_right(times, end)
+            stop = offsets[last] if last < len(offsets) else os.path.getsize(path)
+            stop -= stop % TS_PACKET
+            if stop > offsets[first]:
+                begin = offsets[first]
+                ranges.append((path, begin, stop, self.headers(path) if begin > 0 else b""))
+        return ranges
+
+
+def iter_clip(ranges):
+    """Stream the clip bytes; PAT/PMT from the segment start are prepended so each cut plays on its own"""
+    for path, begin, stop, headers in ranges:
+        with open(path, "rb") as f:
+            if headers:
+                yield headers
+            f.seek(begin)
+            remaining = stop - begin
+            while remaining > 0:
+                data = f.read(min(CHUNK, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+
+def clip_server(port=9500, rec_dir="recordings", host="localhost"):
+    """GET /clip?camera=1&start=..&end=..[&stream=rec|timelapse] returns MPEG-TS; /segments?camera=1 lists coverage.
+
+    Without stream, rec is used when it exists and timelapse otherwise.
+    No authentication: keep host on localhost unless a proxy guards it.
+    """
+    index = SegmentIndex(rec_dir)
+
+    class ClipHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                cam_idx = int(query["camera"])
+                stream = query.get("stream") or index.default_stream(cam_idx)
+                if stream not in STREAMS:
+                    raise ValueError(f"stream must be one of {', '.join(STREAMS)}")
+                if url.path == "/segments":
+                    body = json.dumps([{"path": path, "start": times[0], "last_keyframe": times[-1], "keyframes": len(times)}
+                                       for path, times, _ in index.segments(cam_idx, stream)]).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if url.path != "/clip":
+                    self.send_error(404)
+                    return
+                start, end = parse_time(query["start"]), parse_time(query["end"])
+            except (KeyError, ValueError) as e:
+                self.send_error(400, f"bad request: {e}")
+                return
+            t0 = time.perf_counter()
+            ranges = index.ranges(cam_idx, start, end, stream)
+            if not ranges:
+                self.send_error(404, "no recording covers that range")
+                return
+            length = sum(stop - begin + len(headers) for _, begin, stop, headers in ranges)
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp2t")
+            self.send_header("Content-Length", str(length))
+            self.send_header("Content-Disposition", f'inline; filename="cam{cam_idx}_{int(start)}_{int(end)}.ts"')
+            self.send_header("X-Lookup-Ms", f"{(time.perf_counter() - t0) * 1000:.1f}")
+            self.end_headers()
+            try:
+                for data in iter_clip(ranges):
+                    self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), ClipHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"[Clips] Serving http://{host}:{port}/clip from {rec_dir}/")
+    return httpd
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cut clips from indexed recordings without re-encoding")
+    sub = parser.add_subparsers(dest="command", required=True)
+    extract = sub.add_parser("extract", help="Write one clip to a file")
+    extract.add_argument("--camera", type=int, required=True)
+    extract.add_argument("--start", required=True, help="Epoch seconds or ISO datetime")
+    extract.add_argument("--end", required=True)
+    extract.add_argument("--stream", choices=STREAMS, help="Default: rec if recorded, else timelapse")
+    extract.add_argument("-o", "--output", required=True)
+    serve = sub.add_parser("serve", help="Run the extraction HTTP API")
+    serve.add_argument("--port", type=int, default=9500)
+    serve.add_argument("--host", default="localhost")
+    for p in (extract, serve):
+        p.add_argument("--dir", default="recordings")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        clip_server(args.port, args.dir, args.host)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
+    t0 = time.perf_counter()
+    index = SegmentIndex(args.dir)
+    args.stream = args.stream or index.default_stream(args.camera)
+    ranges = index.ranges(args.camera, parse_time(args.start), parse_time(args.end), args.stream)
+    if not ranges:
+        print(f"[Clips] No {args.stream} recording of camera {args.camera} covers that range")
+        sys.exit(1)
+    size = 0
+    with open(args.output, "wb") as f:
+        for data in iter_clip(ranges):
+            f.write(data)
+            size += len(data)
+    print(f"[Clips] {args.output}: {size / 1e6:.1f} MB from {len(ranges)} segment(s) in {(time.perf_counter() - t0) * 1000:.0f}ms")
@@ -0,0 +1,60 @@
+import time
+from datetime import datetime
+
+
+class WallClock:
+    """Live mode: timers and schedules follow the system clock"""
+
+    replay = False
+
+    def update(self, cap):
+        pass
+
+    def time(self):
+        return time.time()
+
+    def now(self):
+        return datetime.now()
+
+
+class VideoClock:
+    """Replay mode: time = configured start datetime + the frame's position in the stream"""
+
+    replay = True
+
+    def __init__(self, start, fps=30):
+        if isinstance(start, str):
+            start = parse_replay_start(start)
+        self.start = start
+        self.start_ts = start.timestamp()
+        self.fps = fps or 30
+        self.frames = 0
+        self.offset = 0.0
+
+    def update(self, cap):
+        """Advance to the frame just read from cap"""
+        import cv2
+        self.frames += 1
+        pos_msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+        # Setelah frame pertama, POS_MSEC 0 berarti backend tidak tahu timestamp-nya
+        has_ts = pos_msec is not None and (pos_msec > 0 or (pos_msec == 0 and self.frames == 1))
+        if has_ts and pos_msec / 1000.0 >= self.offset:
+            self.offset = pos_msec / 1000.0
+        else:
+            # Container tanpa timestamp, pakai nomor frame
+            self.offset = (self.frames - 1) / self.fps
+
+    def time(self):
+        return self.start_ts + self.offset
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+
+def parse_replay_start(value):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid replay start '{value}', expected YYYY-MM-DD HH:MM[:SS]")
@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from supervisor import CameraSupervisor
+from configwatch import config_digest
+
+DEFAULT_CLUSTER = {
+    "host": "0.0.0.0",
+    "port": 9600,
+    "heartbeat_interval": 2,
+    "node_timeout": 10,   # Node tanpa heartbeat selama ini dianggap hilang, kameranya dipindah
+}
+# Node yang terputus melepas kameranya setelah node_timeout * RELEASE_FRACTION, jauh sebelum
+# coordinator memindahkannya, supaya satu kamera tidak pernah jalan di dua node sekaligus
+RELEASE_FRACTION = 0.5
+
+
+def cluster_settings(cluster_config=None):
+    settings = dict(DEFAULT_CLUSTER)
+    settings.update(cluster_config or {})
+    return settings
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class Coordinator:
+    """Assigns cameras to nodes by declared capacity; cameras stay put until their node disappears"""
+
+    def __init__(self, config_path="config.json"):
+        self.config_path = config_path
+        self.config_mtime = None
+        self.cameras = {}      # cam_idx -> [source, cam_config]
+        self.nodes = {}        # node_id -> {"capacity", "last_seen", "running"}
+        self.assignment = {}   # cam_idx -> node_id
+        self.unplaced = set()
+        self.lock = threading.Lock()
+        self.reload()
+        self.settings = cluster_settings(load_json(config_path).get("cluster"))
+
+    def reload(self):
+        mtime = os.path.getmtime(self.config_path)
+        if mtime == self.config_mtime:
+            return
+        try:
+            config = load_json(self.config_path)
+        except ValueError:
+            return  # Sedang ditulis, coba lagi nanti
+        self.config_mtime = mtime
+        self.cameras = {idx: entry for idx, entry in enumerate(config["video_sources"], start=1)}
+        for cam_idx in [c for c in self.assignment if c not in self.cameras]:
+            del self.assignment[cam_idx]
+        self.digest = config_digest(config)
+
+    def cost(self, cam_idx):
+        return self.cameras[cam_idx][1].get("cost", 1)
+
+    def load(self, node_id):
+        return sum(self.cost(c) for c, n in self.assignment.items() if n == node_id)
+
+    def rebalance(self, now):
+        self.reload()
+        for node_id in [n for n, node in self.nodes.items() if now - node["last_seen"] > self.settings["node_timeout"]]:
+            moved = sorted(c for c, n in self.assignment.items() if n == node_id)
+            for cam_idx in moved:
+                del self.assignment[cam_idx]
+            del self.nodes[node_id]
+            print(f"[Cluster] Node {node_id} lost, reassigning cameras {moved}")
+        # Kapasitas node turun: lepas kamera termahal dulu
+        for node_id, node in self.nodes.items():
+            while self.load(node_id) > node["capacity"]:
+                cam_idx = max((c for c, n in self.assignment.items() if n == node_id), key=self.cost)
+                del self.assignment[cam_idx]
+
+        unplaced = set()
+        for cam_idx in sorted((c for c in self.cameras if c not in self.assignment), key=self.cost, reverse=True):
+            free = {n: node["capacity"] - self.load(n) for n, node in self.nodes.items()}
+            candidates = [n for n, f in free.items() if f >= self.cost(cam_idx)]
+            if not candidates:
+                unplaced.add(cam_idx)
+                continue
+            node_id = max(candidates, key=lambda n: (free[n], n))
+            self.assignment[cam_idx] = node_id
+            print(f"[Cluster] Camera {cam_idx} -> node {node_id}")
+        if unplaced and unplaced != self.unplaced:
+            print(f"[Cluster] Not enough capacity for cameras {sorted(unplaced)}")
+        self.unplaced = unplaced
+
+    def heartbeat(self, node_id, capacity, running):
+        """Register/refresh a node; returns the camera entries it should be running"""
+        now = time.time()
+        with self.lock:
+            if node_id not in self.nodes:
+                print(f"[Cluster] Node {node_id} joined (capacity {capacity})")
+            self.nodes[node_id] = {"capacity": capacity, "last_seen": now, "running": running}
+            self.rebalance(now)
+            cameras = [[c, *self.cameras[c]] for c, n in sorted(self.assignment.items()) if n == node_id]
+            return {"cameras": cameras, "digest": self.digest}
+
+    def status(self):
+        with self.lock:
+            self.rebalance(time.time())
+            return {
+                "nodes": {n: {"capacity": node["capacity"], "load": self.load(n), "running": node["running"],
+                              "age": round(time.time() - node["last_seen"], 1)} for n, node in self.nodes.items()},
+                "assignment": {str(c): n for c, n in sorted(self.assignment.items())},
+                "unplaced": sorted(self.unplaced),
+            }
+
+    def serve(self):
+        coordinator = self
+
+        class CoordinatorHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/heartbeat":
+                    self.send_error(404)
+                    return
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    reply = coordinator.heartbeat(str(body["node"]), float(body["capacity"]), body.get("running", []))
+                except (KeyError, ValueError) as e:
+                    self.send_error(400, str(e))
+                    return
+                self.send_json(reply)
+
+            def do_GET(self):
+                if self.path != "/status":
+                    self.send_error(404)
+                    return
+                self.send_json(coordinator.status())
+
+            def send_json(self, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        httpd = ThreadingHTTPServer((self.settings["host"], self.settings["port"]), CoordinatorHandler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        print(f"[Cluster] Coordinator on port {self.settings['port']}, {len(self.cameras)} cameras")
+        return httpd
+
+
+def idle_worker(cam_idx, source, *args, stop_event=None, heartbeat=None, **kwargs):
+    """Dry-run camera: only heartbeats, for testing placement without models or streams"""
+    print(f"[Cluster] Camera {cam_idx} (dry run) started in pid {os.getpid()}")
+    parent = os.getppid()
+    while not stop_event.is_set() and os.getppid() == parent:
+        heartbeat[cam_idx - 1] = time.time()
+        time.sleep(1)
+    return True
+
+
+class Node:
+    """Runs the coordinator's shard of cameras under a local CameraSupervisor"""
+
+    def __init__(self, node_id, capacity, coordinator_url, config_path="config.json", dry_run=False):
+        self.node_id = node_id
+        self.capacity = capacity
+        self.url = coordinator_url.rstrip("/")
+        self.config = load_json(config_path)
+        self.settings = cluster_settings(self.config.get("cluster"))
+        self.dry_run = dry_run
+        self.running = {}  # cam_idx -> [source, cam_config]
+
+    def start(self):
+        if self.dry_run:
+            target, self.build = idle_worker, lambda idx, src, cam_config: ((idx, src), {})
+        else:
+            from main import run_tracking, camera_worker_spec
+            from inference import export_model
+            export_model(self.config.get("inference"))
+            target = run_tracking
+            self.build = lambda idx, src, cam_config: camera_worker_spec(idx, src, cam_config, None)
+        metrics_dir = self.config.get("metrics", {}).get("dir", "metrics")
+        self.supervisor = CameraSupervisor(target, [], self.config.get("supervisor"), metrics_dir, f"supervisor_{self.node_id}")
+        self.supervisor.start()
+
+    def apply(self, cameras, release_timeout=None):
+        desired = {c[0]: c[1:] for c in cameras}
+        for cam_idx in [c for c in self.running if c not in desired]:
+            self.supervisor.remove_camera(cam_idx, release_timeout)
+            del self.running[cam_idx]
+            print(f"[Cluster] Node {self.node_id} released camera {cam_idx}")
+        for cam_idx, entry in desired.items():
+            if self.running.get(cam_idx) == entry:
+                continue
+            args, kwargs = self.build(cam_idx, *entry)
+            if cam_idx in self.running:
+                self.supervisor.update_camera(cam_idx, args, restart=True, kwargs=kwargs)
+            else:
+                self.supervisor.add_camera(cam_idx, args, kwargs)
+            self.running[cam_idx] = entry
+
+    def run(self):
+        self.start()
+        release_after = self.settings["node_timeout"] * RELEASE_FRACTION
+        # Worker yang belum keluar sampai separuh sisa waktu sebelum dipindah di-kill
+        release_timeout = self.settings["node_timeout"] * (1 - RELEASE_FRACTION) / 2
+        # Request dan jeda heartbeat dibatasi supaya cek release_after tidak terlambat
+        request_timeout = min(self.settings["heartbeat_interval"] * 2, release_after / 4)
+        last_ok = time.time()
+        while True:
+            body = json.dumps({"node": self.node_id, "capacity": self.capacity, "running": sorted(self.running)}).encode("utf-8")
+            request = urllib.request.Request(self.url + "/heartbeat", data=body, headers={"Content-Type": "application/json"})
+            sent = time.time()
+            try:
+                with urllib.request.urlopen(request, timeout=request_timeout) as resp:
+                    reply = json.loads(resp.read())
+                # Coordinator mencatat last_seen saat request diterima, jadi hitung dari waktu kirim
+                last_ok = sent
+                if reply["digest"] != config_digest(self.config):
+                    print(f"[Cluster] Node {self.node_id}: local config.json differs from the coordinator's")
+                self.apply(reply["cameras"])
+            except OSError as e:
+                # Lepas kamera jauh sebelum coordinator memindahkannya (node_timeout), jangan jalan dobel
+                if self.running and time.time() - last_ok > release_after:
+                    print(f"[Cluster] Node {self.node_id} lost the coordinator ({e}), stopping its cameras")
+                    self.apply([], release_timeout)
+            delay = self.settings["heartbeat_interval"]
+            if self.running:
+                # Jangan tidur melewati batas release_after
+                delay = min(delay, max(0.1, last_ok + release_after - time.time()))
+            time.sleep(delay)
+
+    def stop(self):
+        self.supervisor.stop()
+
+
+def run_node(node_id, capacity, coordinator_url, config_path, dry_run):
+    node = Node(node_id, capacity, coordinator_url, config_path, dry_run)
+
+    def on_term(sig, frame):
+        node.stop()
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, on_term)
+    node.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shard cameras across hosts: one coordinator, many nodes")
+    parser.add_argument("--config", default="config.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("coordinator", help="Run the coordinator")
+    node_parser = sub.add_parser("node", help="Run a worker node")
+    node_parser.add_argument("--id", required=True)
+    node_parser.add_argument("--capacity", type=float, required=True, help="Camera cost units this host can run")
+    node_parser.add_argument("--coordinator", default="http://localhost:9600")
+    node_parser.add_argument("--dry-run", action="store_true")
+    local = sub.add_parser("local", help="Coordinator plus N node processes on this machine")
+    local.add_argument("--nodes", type=int, default=3)
+    local.add_argument("--capacity", type=float, default=2)
+    local.add_argument("--kill-after", type=float, help="Terminate the first node after this many seconds")
+    local.add_argument("--seconds", type=float, default=60)
+    local.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "node":
+        run_node(args.id, args.capacity, args.coordinator, args.config, args.dry_run)
+        sys.exit(0)
+
+    coordinator = Coordinator(args.config)
+    coordinator.serve()
+    if args.command == "coordinator":
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            sys.exit(0)
+
+    url = f"http://localhost:{coordinator.settings['port']}"
+    nodes = [multiprocessing.Process(target=run_node, args=(f"node{i}", args.capacity, url, args.config, args.dry_run))
+             for i in range(1, args.nodes + 1)]
+    for p in nodes:
+        p.start()
+    t_start = time.time()
+    killed = False
+    try:
+        while time.time() - t_start < args.seconds:
+            time.sleep(coordinator.settings["heartbeat_interval"] * 2)
+            if args.kill_after is not None and not killed and time.time() - t_start >= args.kill_after:
+                print(f"[Cluster] Simulating loss of node1 (pid {nodes[0].pid})")
+                nodes[0].terminate()
+                killed = True
+            status = coordinator.status()
+            print(f"[Cluster] t={time.time() - t_start:.0f}s assignment {status['assignment']} unplaced {status['unplaced']}")
+    finally:
+        for p in nodes:
+            if p.is_alive():
+                p.terminate()
+        for p in nodes:
+            p.join()
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import multiprocessing
+
+# Key per kamera yang bisa diterapkan ke worker yang sedang jalan
+LIVE_CAMERA_KEYS = ("zones", "work_start", "work_end", "breaks", "overtime", "away_timeout")
+
+
+def config_digest(config):
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+
+
+def diff_camera(old, new):
+    """Live-applicable keys that differ between two camera configs"""
+    return [key for key in LIVE_CAMERA_KEYS if old.get(key) != new.get(key)]
+
+
+class ConfigWatcher:
+    """Watches config.json and pushes per-camera changes into running workers.
+
+    Zone/schedule/timeout edits go through each camera's update queue so
+    the worker keeps its model and timers. A changed source restarts
+    only that camera; added/removed cameras are started/stopped through
+    the supervisor.
+    """
+
+    def __init__(self, supervisor, build_camera, config, path="config.json", interval=2):
+        self.supervisor = supervisor
+        self.build_camera = build_camera  # (cam_idx, source, cam_config) -> (args, kwargs)
+        self.config = config
+        self.path = path
+        self.interval = interval
+        self.version = 1
+        self.last_mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        print(f"[Config] Version {self.version} ({config_digest(config)}) loaded from {path}")
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                continue
+            if mtime != self.last_mtime and self.reload():
+                self.last_mtime = mtime
+
+    def reload(self):
+        try:
+            with open(self.path) as f:
+                new_config = json.load(f)
+        except ValueError:
+            # File mungkin sedang ditulis GUI, coba lagi di poll berikutnya
+            return False
+        except OSError as e:
+            print(f"[Config] Cannot read {self.path}: {e}")
+            return False
+        if config_digest(new_config) == config_digest(self.config):
+            return True
+
+        old_sources = self.config.get("video_sources", [])
+        new_sources = new_config.get("video_sources", [])
+        changes = []
+        for i in range(max(len(old_sources), len(new_sources))):
+            cam_idx = i + 1
+            if i >= len(new_sources):
+                self.supervisor.remove_camera(cam_idx)
+                changes.append(f"camera {cam_idx} removed")
+                continue
+            source, cam_config = new_sources[i]
+            args, kwargs = self.build_camera(cam_idx, source, cam_config)
+            if i >= len(old_sources):
+                kwargs["config_updates"] = multiprocessing.Queue()
+                self.supervisor.add_camera(cam_idx, args, kwargs)
+                changes.append(f"camera {cam_idx} added")
+                continue
+            old_source, old_cam_config = old_sources[i]
+            if source != old_source:
+                self.supervisor.update_camera(cam_idx, args, restart=True, kwargs=kwargs)
+                changes.append(f"camera {cam_idx} source changed (restarted)")
+                continue
+            keys = diff_camera(old_cam_config, cam_config)
+            if keys:
+                # Args baru dipakai bila kamera ini nanti di-restart supervisor
+                self.supervisor.update_camera(cam_idx, args, kwargs={"away_timeout": kwargs["away_timeout"]})
+                updates = self.supervisor.cameras[i][1].get("config_updates")
+                if updates is not None:
+                    updates.put({"version": self.version + 1, "changes": {key: cam_config.get(key) for key in keys}})
+                changes.append(f"camera {cam_idx} {', '.join(keys)}")
+
+        other_keys = sorted(k for k in set(self.config) | set(new_config)
+                            if k not in ("video_sources", "date", "schedule_templates") and self.config.get(k) != new_config.get(k))
+        if other_keys:
+            changes.append(f"restart needed for {', '.join(other_keys)}")
+
+        self.version += 1
+        self.config = new_config
+        print(f"[Config] Version {self.version} ({config_digest(new_config)}): {'; '.join(changes) or 'no camera changes'}")
+        return True
@@ -0,0 +1,96 @@
+import os
+
+# Thread pool OpenMP/BLAS dibaca saat library di-import, jadi harus di-set sebelum torch/ultralytics
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cpu(num_cameras, cpu_config=None, cores=None):
+    """Split the available cores into one core set + thread count per camera.
+
+    The first `reserve` cores stay with the launcher (GUI, frame server,
+    metrics). When there are fewer cores than cameras, cameras share
+    cores round-robin with one thread each. cpu_config can override the
+    reserve, the thread count of every camera, or whole entries per camera.
+    """
+    cpu_config = cpu_config or {}
+    cores = list(cores or available_cores())
+    reserve = cpu_config.get("reserve")
+    if reserve is None:
+        reserve = 1 if len(cores) > num_cameras else 0
+    launcher_cores = cores[:reserve]
+    worker_cores = cores[reserve:] or cores
+
+    cameras = {}
+    if len(worker_cores) >= num_cameras:
+        per_camera, extra = divmod(len(worker_cores), num_cameras)
+        pos = 0
+        for cam_idx in range(1, num_cameras + 1):
+            count = per_camera + (1 if cam_idx <= extra else 0)
+            cameras[cam_idx] = {"cores": worker_cores[pos:pos + count], "threads": count}
+            pos += count
+    else:
+        for cam_idx in range(1, num_cameras + 1):
+            cameras[cam_idx] = {"cores": [worker_cores[(cam_idx - 1) % len(worker_cores)]], "threads": 1}
+
+    if cpu_config.get("threads_per_camera"):
+        for entry in cameras.values():
+            entry["threads"] = cpu_config["threads_per_camera"]
+    for cam_idx, override in cpu_config.get("cameras", {}).items():
+        if int(cam_idx) in cameras:
+            cameras[int(cam_idx)].update(override)
+    return {"launcher": {"cores": launcher_cores, "threads": None}, "cameras": cameras}
+
+
+def apply_cpu_plan(entry, label="process"):
+    """Pin the current process to entry["cores"] and cap its torch/OpenCV/OpenMP threads"""
+    if not entry:
+        return
+    cores = entry.get("cores")
+    threads = entry.get("threads")
+    if threads:
+        for var in THREAD_ENV_VARS:
+            os.environ[var] = str(threads)
+    if cores:
+        try:
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, cores)
+            else:
+                import psutil  # Windows/macOS: affinity lewat psutil (opsional)
+                psutil.Process().cpu_affinity(list(cores))
+        except ImportError:
+            print(f"[CPU] {label}: psutil not installed, core affinity not applied")
+        except (OSError, ValueError) as e:
+            print(f"[CPU] {label}: cannot set affinity {cores}: {e}")
+    if threads:
+        import cv2
+        cv2.setNumThreads(threads)
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    print(f"[CPU] {label}: cores={cores or 'all'} threads={threads or 'default'}")
+
+
+def describe_plan(plan):
+    lines = [f"launcher: cores={plan['launcher']['cores'] or 'shared'}"]
+    for cam_idx, entry in sorted(plan["cameras"].items()):
+        lines.append(f"camera {cam_idx}: cores={entry['cores']} threads={entry['threads']}")
+    return lines
+
+
+if __name__ == "__main__":
+    # Lihat plan yang akan dipakai launcher: python cpuplan.py
+    import json
+    with open("config.json") as f:
+        config = json.load(f)
+    plan = plan_cpu(len(config["video_sources"]), config.get("cpu"))
+    print(f"[CPU] {len(available_cores())} cores available")
+    for line in describe_plan(plan):
+        print(f"[CPU] {line}")
@@ -3,6 +3,10 @@ from psycopg2.extras import RealDictCursor
 import json
 from datetime import datetime
 import time
+import select
+
+# NOTIFY channel: payload "activity:<camera>" / "summary:<camera>" setelah setiap write
+CHANGE_CHANNEL = "tracking_changes"
 
 class DatabaseManager:
     def __init__(self, config_file="db_config.json"):
@@ -62,9 +66,12 @@ class DatabaseManager:
                     event VARCHAR(50) NOT NULL,
                     status_change VARCHAR(50),
                     last_seen TIMESTAMP,
+                    clip_path VARCHAR(255),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            # Tabel lama dibuat sebelum ada kolom clip_path
+            cursor.execute("ALTER TABLE activity_logs ADD COLUMN IF NOT EXISTS clip_path VARCHAR(255)")
             
             # Summary table - untuk summary per jam
             cursor.execute("""
@@ -101,17 +108,24 @@ class DatabaseManager:
         except Exception as e:
             print(f"[DB] Error creating tables: {e}")
     
-    def log_activity(self, camera, zone_name, event, status_change, last_seen_timestamp):
-        """Insert activity log immediately"""
+    def log_activity(self, camera, zone_name, event, status_change, last_seen_timestamp, timestamp=None, clip_path=None):
+        """Insert activity log immediately (timestamp overrides the DB clock, used by replay)"""
         try:
             cursor = self.connection.cursor()
             
             last_seen = datetime.fromtimestamp(last_seen_timestamp) if last_seen_timestamp else None
             
-            cursor.execute("""
-                INSERT INTO activity_logs (camera, zone_name, event, status_change, last_seen)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (camera, zone_name, event, status_change, last_seen))
+            if timestamp is None:
+                cursor.execute("""
+                    INSERT INTO activity_logs (camera, zone_name, event, status_change, last_seen, clip_path)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, (camera, zone_name, event, status_change, last_seen, clip_path))
+            else:
+                cursor.execute("""
+                    INSERT INTO activity_logs (timestamp, camera, zone_name, event, status_change, last_seen, clip_path)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (timestamp, camera, zone_name, event, status_change, last_seen, clip_path))
+            cursor.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, f"activity:{camera}"))
             
             cursor.close()
             
@@ -146,6 +160,7 @@ class DatabaseManager:
                     times['working_time_formatted'], times['idle_time_formatted'], 
                     times['away_time_formatted'], summary_hour
                 ))
+            cursor.execute("SELECT pg_notify(%s, %s)", (CHANGE_CHANNEL, f"summary:{camera}"))
             
             cursor.close()
             print(f"[DB] Summary saved for Camera {camera} at {summary_hour}")
@@ -153,22 +168,32 @@ class DatabaseManager:
         except Exception as e:
             print(f"[DB] Error saving summary: {e}")
     
-    def get_recent_activities(self, limit=50):
-        """Get recent activity logs"""
+    def get_recent_activities(self, limit=50, camera=None, strict=False):
+        """Get recent activity logs (strict=True raises on errors instead of returning [])"""
         try:
             cursor = self.connection.cursor(cursor_factory=RealDictCursor)
-            cursor.execute("""
-                SELECT * FROM activity_logs 
-                ORDER BY timestamp DESC 
-                LIMIT %s
-            """, (limit,))
+            if camera:
+                cursor.execute("""
+                    SELECT * FROM activity_logs 
+                    WHERE camera = %s
+                    ORDER BY timestamp DESC 
+                    LIMIT %s
+                """, (camera, limit))
+            else:
+                cursor.execute("""
+                    SELECT * FROM activity_logs 
+                    ORDER BY timestamp DESC 
+                    LIMIT %s
+                """, (limit,))
             return cursor.fetchall()
         except Exception as e:
             print(f"[DB] Error fetching activities: {e}")
+            if strict:
+                raise
             return []
     
-    def get_summary_by_hour(self, camera=None, date=None):
-        """Get summary data by hour"""
+    def get_summary_by_hour(self, camera=None, date=None, strict=False):
+        """Get summary data by hour (strict=True raises on errors instead of returning [])"""
         try:
             cursor = self.connection.cursor(cursor_factory=RealDictCursor)
             query = "SELECT * FROM worker_summary WHERE 1=1"
@@ -188,7 +213,48 @@ class DatabaseManager:
             return cursor.fetchall()
         except Exception as e:
             print(f"[DB] Error fetching summary: {e}")
+            if strict:
+                raise
+            return []
+    
+    def get_day_totals(self, date, camera=None, strict=False):
+        """Per-worker (camera, zone) totals for one day: summaries are cumulative, so the latest hour wins"""
+        try:
+            cursor = self.connection.cursor(cursor_factory=RealDictCursor)
+            query = """
+                SELECT DISTINCT ON (camera, zone_name)
+                    camera, zone_name, working_time_seconds, idle_time_seconds,
+                    away_time_seconds, summary_hour
+                FROM worker_summary
+                WHERE DATE(summary_hour) = %s
+            """
+            params = [date]
+            if camera:
+                query += " AND camera = %s"
+                params.append(camera)
+            query += " ORDER BY camera, zone_name, summary_hour DESC"
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"[DB] Error fetching day totals: {e}")
+            if strict:
+                raise
+            return []
+    
+    def listen_changes(self):
+        """Subscribe this connection to write notifications (see wait_changes)"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"LISTEN {CHANGE_CHANNEL}")
+        cursor.close()
+    
+    def wait_changes(self, timeout=5):
+        """Block up to timeout seconds; returns the NOTIFY payloads received"""
+        if select.select([self.connection], [], [], timeout) == ([], [], []):
             return []
+        self.connection.poll()
+        payloads = [n.payload for n in self.connection.notifies]
+        self.connection.notifies.clear()
+        return payloads
     
     def close(self):
         """Close database connection"""
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+from tracker import ZoneTracker
+
+NUM_KEYPOINTS = 17
+CHUNK_FRAMES = 5000  # Frame per file npz
+
+
+class DetectionCacheWriter:
+    """Append per-frame pose detections to chunked npz files (timestamps, track ids, keypoints, visibility)"""
+
+    def __init__(self, path, meta=None, chunk_frames=CHUNK_FRAMES):
+        self.path = path
+        self.meta = dict(meta or {})
+        self.chunk_frames = chunk_frames
+        self.chunks = []
+        self.frames = 0
+        self.reset_buffer()
+        os.makedirs(path, exist_ok=True)
+
+    def reset_buffer(self):
+        self.timestamps = []
+        self.counts = []
+        self.track_ids = []
+        self.keypoints = []
+        self.visibility = []
+
+    def add(self, timestamp, detections):
+        self.timestamps.append(timestamp)
+        self.counts.append(len(detections))
+        for track_id, keypoints, visibility in detections:
+            self.track_ids.append(track_id)
+            self.keypoints.append(keypoints)
+            self.visibility.append(visibility)
+        self.frames += 1
+        if len(self.timestamps) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if not self.timestamps:
+            return
+        name = f"chunk_{len(self.chunks):05d}.npz"
+        np.savez_compressed(
+            os.path.join(self.path, name),
+            timestamps=np.asarray(self.timestamps, dtype=np.float64),
+            counts=np.asarray(self.counts, dtype=np.int32),
+            track_ids=np.asarray(self.track_ids, dtype=np.int32),
+            keypoints=np.asarray(self.keypoints, dtype=np.float32).reshape(-1, NUM_KEYPOINTS, 2),
+            visibility=np.asarray(self.visibility, dtype=np.float32).reshape(-1, NUM_KEYPOINTS),
+        )
+        self.chunks.append({"file": name, "frames": len(self.timestamps),
+                            "start": self.timestamps[0], "end": self.timestamps[-1]})
+        self.reset_buffer()
+        self.write_meta()
+
+    def write_meta(self):
+        meta = dict(self.meta, frames=self.frames, chunks=self.chunks)
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def close(self):
+        self.flush()
+        self.write_meta()
+
+
+class DetectionCacheReader:
+    """Iterate a detection cache frame by frame, one chunk in memory at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+    @property
+    def frames(self):
+        return sum(chunk["frames"] for chunk in self.meta["chunks"])
+
+    def load_chunk(self, chunk):
+        with np.load(os.path.join(self.path, chunk["file"])) as data:
+            return {key: data[key] for key in data.files}
+
+    def __iter__(self):
+        """Yield (timestamp, [(track_id, keypoints, visibility), ...]) in the same shape as extract_detections"""
+        for chunk in self.meta["chunks"]:
+            data = self.load_chunk(chunk)
+            track_ids = data["track_ids"].tolist()
+            keypoints = data["keypoints"]
+            visibility = data["visibility"]
+            pos = 0
+            for timestamp, count in zip(data["timestamps"].tolist(), data["counts"].tolist()):
+                yield timestamp, [(track_ids[i], keypoints[i], visibility[i]) for i in range(pos, pos + count)]
+                pos += count
+
+
+def schedule_checker(cam_config):
+    """(timestamp) -> (work_active, break_active), cached per second since the schedule has minute resolution"""
+    from main import is_work_time, is_break_time
+    work_start = cam_config.get("work_start", "")
+    work_end = cam_config.get("work_end", "")
+    overtime = cam_config.get("overtime", [])
+    breaks = cam_config.get("breaks", [])
+    cache = {"second": None, "value": (True, False)}
+
+    def check(timestamp):
+        second = int(timestamp)
+        if second != cache["second"]:
+            now_dt = datetime.fromtimestamp(timestamp)
+            cache["second"] = second
+            cache["value"] = (is_work_time(now_dt, work_start, work_end, overtime), is_break_time(now_dt, breaks))
+        return cache["value"]
+    return check
+
+
+def replay_detections(frames, cam_config, tracker=None, **tracker_params):
+    """Run cached detections through ZoneTracker only; returns (tracker, events)"""
+    if tracker is None:
+        away_timeout = tracker_params.pop("away_timeout", cam_config.get("away_timeout", 5) * 60)
+        tracker = ZoneTracker(cam_config.get("zones", {}), away_timeout, **tracker_params)
+    check = schedule_checker(cam_config)
+    events = []
+    for timestamp, detections in frames:
+        work_active, break_active = check(timestamp)
+        events.extend(tracker.update(detections, timestamp, work_active, break_active))
+    return tracker, events
+
+
+if __name__ == "__main__":
+    # Contoh: python replay.py "1105 V2.mp4" --start "2025-11-07 05:00" --save-detections cache/1105
+    #         python detcache.py cache/1105 --activity-threshold 8 --away-timeout 3
+    parser = argparse.ArgumentParser(description="Replay cached pose detections through the zone/status logic without inference")
+    parser.add_argument("cache", help="Directory written by --save-detections")
+    parser.add_argument("--camera", type=int, help="Camera index in config.json (default: the one the cache was recorded for)")
+    parser.add_argument("--activity-threshold", type=float)
+    parser.add_argument("--idle-timeout", type=float, help="Seconds")
+    parser.add_argument("--away-timeout", type=float, help="Minutes")
+    parser.add_argument("--log-return-threshold", type=float, help="Seconds")
+    parser.add_argument("--visibility-threshold", type=float)
+    parser.add_argument("--hand-weight", type=float)
+    parser.add_argument("--shoulder-weight", type=float)
+    args = parser.parse_args()
+
+    reader = DetectionCacheReader(args.cache)
+    cam_idx = args.camera or reader.meta.get("camera")
+    if not cam_idx:
+        sys.exit("Cache has no camera index, use --camera")
+    with open("config.json") as f:
+        cam_config = json.load(f)["video_sources"][cam_idx - 1][1]
+
+    params = {}
+    if args.activity_threshold is not None:
+        params["activity_threshold"] = args.activity_threshold
+    if args.idle_timeout is not None:
+        params["idle_timeout"] = args.idle_timeout
+    if args.away_timeout is not None:
+        params["away_timeout"] = args.away_timeout * 60
+    if args.log_return_threshold is not None:
+        params["log_return_threshold"] = args.log_return_threshold
+    if args.visibility_threshold is not None:
+        params["visibility_threshold"] = args.visibility_threshold
+    if args.hand_weight is not None:
+        params["hand_weight"] = args.hand_weight
+    if args.shoulder_weight is not None:
+        params["shoulder_weight"] = args.shoulder_weight
+
+    t0 = time.perf_counter()
+    tracker, events = replay_detections(reader, cam_config, **params)
+    elapsed = time.perf_counter() - t0
+    frames = reader.frames
+
+    from main import format_time
+    for event in events:
+        print(f"{datetime.fromtimestamp(event['timestamp']):%Y-%m-%d %H:%M:%S} {event['message']}")
+    print(f"\nCamera {cam_idx} (cache {args.cache}): {frames} frames in {elapsed:.2f}s ({frames / max(elapsed, 1e-9):.0f} fps)")
+    for zone_name, w in tracker.zone_totals().items():
+        print(f"Zone {zone_name}:")
+        print(f"  Working Time: {format_time(w['working_time'])}")
+        print(f"  Idle Time   : {format_time(w['idle_time'])}")
+        print(f"  Away Time   : {format_time(w['away_time'])}")
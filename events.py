@@ -0,0 +1,220 @@
+import json
+import time
+import queue
+import threading
+import multiprocessing
+from collections import deque
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_EVENTS = {
+    "enabled": False,
+    "host": "localhost",      # Tanpa auth + CORS *, jangan expose ke LAN tanpa reverse proxy
+    "port": 9300,
+    "replay_buffer": 1000,     # Event terakhir yang disimpan untuk subscriber yang (re)connect
+    "subscriber_queue": 256,   # Subscriber lambat kehilangan event terlama, bukan memperlambat hub
+    "snapshot_interval": 1.0,  # Detik antar snapshot timer per zona dari tiap kamera
+    "keepalive": 15,
+}
+EVENT_TYPES = ("status", "zone", "snapshot", "camera")
+
+
+def events_settings(events_config=None):
+    settings = dict(DEFAULT_EVENTS)
+    settings.update(events_config or {})
+    return settings
+
+
+class EventPublisher:
+    """Worker side: turns tracker state into status events on the hub queue (never blocks the loop)"""
+
+    def __init__(self, cam_idx, event_queue, snapshot_interval=1.0):
+        self.cam_idx = cam_idx
+        self.queue = event_queue
+        self.snapshot_interval = snapshot_interval
+        self.last_status = {}
+        self.last_snapshot = None
+        self.dropped = 0
+
+    def publish(self, event_type, **fields):
+        event = {"type": event_type, "camera": self.cam_idx, "time": time.time()}
+        event.update(fields)
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def update(self, tracker, current_time, zone_events=()):
+        """Publish zone events, working/idle/away transitions and periodic per-zone timer snapshots"""
+        for event in zone_events:
+            self.publish("zone", zone=event["zone_name"], event=event["event"],
+                         status_change=event["status_change"], event_time=event["timestamp"])
+        for zone_id in tracker.zones:
+            zone_name = tracker.zone_name(zone_id)
+            worker = tracker.zone_worker(zone_id)
+            status = worker["status"] if worker else None
+            previous = self.last_status.get(zone_name)
+            if status != previous:
+                self.last_status[zone_name] = status
+                if status is not None:
+                    self.publish("status", zone=zone_name, status=status, previous=previous, event_time=current_time)
+        if self.last_snapshot is None or current_time - self.last_snapshot >= self.snapshot_interval:
+            self.last_snapshot = current_time
+            zones = {}
+            for zone_name, totals in tracker.zone_totals().items():
+                zones[zone_name] = dict(totals, status=self.last_status.get(zone_name))
+            self.publish("snapshot", zones=zones, event_time=current_time)
+
+
+class Subscriber:
+    def __init__(self, cameras=None, zones=None, types=None, maxsize=256):
+        self.cameras = cameras
+        self.zones = zones
+        self.types = types
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def matches(self, event):
+        if self.cameras is not None and event["camera"] not in self.cameras:
+            return False
+        if self.types is not None and event["type"] not in self.types:
+            return False
+        if self.zones is not None:
+            if "zone" in event:
+                return event["zone"] in self.zones
+            if "zones" in event:
+                # Snapshot dipotong ke zona yang diminta subscriber
+                return any(zone in self.zones for zone in event["zones"])
+        return True
+
+    def view(self, event):
+        if self.zones is not None and "zones" in event:
+            event = dict(event, zones={z: v for z, v in event["zones"].items() if z in self.zones})
+        return event
+
+    def offer(self, event):
+        event = self.view(event)
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class EventHub:
+    """Launcher side: drains worker events and fans them out to SSE / in-process subscribers with a replay buffer"""
+
+    def __init__(self, events_config=None):
+        self.settings = events_settings(events_config)
+        self.queue = multiprocessing.Queue(maxsize=10000)
+        self.buffer = deque(maxlen=self.settings["replay_buffer"])
+        self.subscribers = []
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.httpd = None
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        self.serve()
+
+    def run(self):
+        while True:
+            try:
+                event = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            self.dispatch(event)
+
+    def dispatch(self, event):
+        with self.lock:
+            event["id"] = self.next_id
+            self.next_id += 1
+            self.buffer.append(event)
+            subscribers = list(self.subscribers)
+        for sub in subscribers:
+            if sub.matches(event):
+                sub.offer(event)
+
+    def subscribe(self, cameras=None, zones=None, types=None, since=None):
+        """Register a subscriber; buffered events newer than `since` are queued first (replay)"""
+        sub = Subscriber(cameras, zones, types, self.settings["subscriber_queue"])
+        with self.lock:
+            if since is not None:
+                for event in self.buffer:
+                    if event["id"] > since and sub.matches(event):
+                        sub.offer(event)
+            self.subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            if sub in self.subscribers:
+                self.subscribers.remove(sub)
+
+    def serve(self):
+        hub = self
+        keepalive = self.settings["keepalive"]
+
+        class EventHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/events":
+                    self.send_error(404)
+                    return
+                try:
+                    cameras, zones, types, since = parse_filters(parse_qs(url.query), self.headers.get("Last-Event-ID"))
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+                sub = hub.subscribe(cameras, zones, types, since)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                try:
+                    while True:
+                        try:
+                            event = sub.queue.get(timeout=keepalive)
+                        except queue.Empty:
+                            self.wfile.write(b": keepalive\n\n")
+                            self.wfile.flush()
+                            continue
+                        data = json.dumps(event, separators=(",", ":"))
+                        self.wfile.write(f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError, OSError):
+                    pass
+                finally:
+                    hub.unsubscribe(sub)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.settings["host"], self.settings["port"]), EventHandler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"[Events] Serving SSE at http://{self.settings['host']}:{self.settings['port']}/events")
+
+
+def parse_filters(query, last_event_id=None):
+    """?camera=1,2&zone=Zone 1&type=status,zone&since=<id> (Last-Event-ID header wins over since)"""
+    def values(key):
+        items = [v for raw in query.get(key, []) for v in raw.split(",") if v]
+        return set(items) if items else None
+
+    cameras = values("camera")
+    if cameras is not None:
+        cameras = {int(c) for c in cameras}
+    types = values("type")
+    if types is not None and not types <= set(EVENT_TYPES):
+        raise ValueError(f"unknown event type, expected {', '.join(EVENT_TYPES)}")
+    since = last_event_id or (query.get("since") or [None])[0]
+    return cameras, values("zone"), types, int(since) if since is not None else None
@@ -0,0 +1,105 @@
+import os
+import shutil
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+DEFAULT_INFERENCE = {
+    "backend": "pytorch",
+    "model": "yolov8n-pose.pt",
+    "imgsz": 640,
+    "int8": False,
+    "conf": 0.4,
+    "models_dir": "models",
+    "calibration_data": None,  # Dataset yaml untuk kalibrasi INT8 OpenVINO (default ultralytics)
+}
+
+
+def inference_settings(inference_config=None):
+    settings = dict(DEFAULT_INFERENCE)
+    settings.update(inference_config or {})
+    if settings["backend"] not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{settings['backend']}', expected one of {', '.join(BACKENDS)}")
+    if settings["backend"] == "pytorch" and settings["int8"]:
+        # Quantization hanya lewat export ONNX/OpenVINO; jangan sampai nama model mengklaim int8
+        print("[Inference] int8 is ignored by the pytorch backend, use onnx or openvino to quantize")
+        settings["int8"] = False
+    return settings
+
+
+def exported_path(settings):
+    """Where the exported model for this backend/imgsz/int8 combination lives"""
+    base = os.path.splitext(os.path.basename(settings["model"]))[0]
+    name = f"{base}_{settings['imgsz']}" + ("_int8" if settings["int8"] else "")
+    if settings["backend"] == "onnx":
+        return os.path.join(settings["models_dir"], name + ".onnx")
+    if settings["backend"] == "openvino":
+        return os.path.join(settings["models_dir"], name + "_openvino_model")
+    return settings["model"]
+
+
+def export_model(inference_config=None, force=False):
+    """One-time export of the PyTorch weights to the configured backend; returns the model path"""
+    settings = inference_settings(inference_config)
+    path = exported_path(settings)
+    if settings["backend"] == "pytorch" or (os.path.exists(path) and not force):
+        return path
+    from ultralytics import YOLO
+    os.makedirs(settings["models_dir"], exist_ok=True)
+    model = YOLO(settings["model"])
+    print(f"[Inference] Exporting {settings['model']} to {settings['backend']} "
+          f"(imgsz={settings['imgsz']}, int8={settings['int8']})...")
+
+    if settings["backend"] == "onnx":
+        exported = model.export(format="onnx", imgsz=settings["imgsz"], dynamic=False, simplify=True)
+        if settings["int8"]:
+            # Ultralytics tidak punya INT8 untuk ONNX, pakai dynamic quantization ONNX Runtime
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(exported, path, weight_type=QuantType.QUInt8)
+            os.remove(exported)
+        else:
+            shutil.move(exported, path)
+    else:
+        kwargs = {"format": "openvino", "imgsz": settings["imgsz"], "int8": settings["int8"]}
+        if settings["int8"] and settings["calibration_data"]:
+            kwargs["data"] = settings["calibration_data"]
+        exported = model.export(**kwargs)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        shutil.move(exported, path)
+    print(f"[Inference] Exported model saved to {path}")
+    return path
+
+
+class PoseModel:
+    """YOLO pose model on the configured backend; track()/predict() return ultralytics Results for every backend"""
+
+    def __init__(self, inference_config=None):
+        from ultralytics import YOLO
+        self.settings = inference_settings(inference_config)
+        self.path = export_model(self.settings)
+        self.imgsz = self.settings["imgsz"]
+        self.conf = self.settings["conf"]
+        # Model hasil export perlu task eksplisit, ultralytics tidak bisa menebak dari nama file
+        self.model = YOLO(self.path, task="pose")
+
+    @property
+    def name(self):
+        return f"{self.settings['backend']}{'-int8' if self.settings['int8'] else ''}@{self.imgsz}"
+
+    def warmup(self, shape=(360, 640, 3)):
+        """Run one inference on a blank frame so the first real frame is not slow"""
+        import numpy as np
+        self.predict(np.zeros(shape, dtype=np.uint8))
+
+    def track(self, frame):
+        return self.model.track(frame, conf=self.conf, imgsz=self.imgsz, persist=True, verbose=False)
+
+    def predict(self, frame):
+        return self.model.predict(frame, conf=self.conf, imgsz=self.imgsz, verbose=False)
+
+
+if __name__ == "__main__":
+    # Export sekali sebelum deploy: python inference.py
+    import json
+    with open("config.json") as f:
+        inference_config = json.load(f).get("inference", {})
+    print(export_model(inference_config, force=True))
@@ -0,0 +1,361 @@
+import os
+import sys
+import json
+import math
+import time
+import queue
+import random
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from urllib.parse import urlparse, parse_qs, urlencode
+import cv2
+import numpy as np
+
+SYNTHETIC_ZONES = {
+    "1": [100, 130, 225, 350, "Zone 1"],
+    "2": [250, 130, 450, 350, "Zone 2"],
+    "3": [460, 130, 597, 350, "Zone 3"],
+}
+# Titik tubuh relatif terhadap pusat orang (x, y) untuk figur sintetis
+BODY = {"head": (0, -70), "neck": (0, -50), "hip": (0, 10), "l_shoulder": (-18, -48), "r_shoulder": (18, -48),
+        "l_knee": (-10, 45), "r_knee": (10, 45), "l_foot": (-12, 80), "r_foot": (12, 80)}
+
+
+class LoopCapture:
+    """loop://<file>: replays a local file forever, paced to its fps like a live camera (pace=0 = as fast as possible)"""
+
+    def __init__(self, path, pace=True):
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.pace = pace
+        self.next_frame = time.perf_counter()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def grab(self):
+        if self.pace:
+            delay = self.next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame = max(self.next_frame + 1.0 / self.fps, time.perf_counter() - 1.0)
+        if self.cap.grab():
+            return True
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.cap.grab()
+
+    def retrieve(self):
+        return self.cap.retrieve()
+
+    def read(self):
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticCapture:
+    """synthetic://?fps=15&size=1280x720&seed=1: stick figures working, idling and leaving their zones"""
+
+    def __init__(self, fps=15, size=(1280, 720), seed=0, zones=None, pace=True):
+        self.fps = fps
+        self.size = size
+        self.pace = pace
+        self.rng = random.Random(seed)
+        self.zones = zones or SYNTHETIC_ZONES
+        self.frame_index = 0
+        self.next_frame = time.perf_counter()
+        self.background = np.full((size[1], size[0], 3), 90, dtype=np.uint8)
+        noise = np.random.default_rng(seed).integers(0, 25, self.background.shape, dtype=np.uint8)
+        self.background = cv2.add(self.background, noise)
+        # Per orang: fase gerak tangan dan jadwal keluar zona
+        self.people = [{"phase": self.rng.random() * 6.28, "away_until": 0.0} for _ in self.zones]
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.frame_index * 1000.0 / self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def grab(self):
+        if self.pace:
+            delay = self.next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_frame = max(self.next_frame + 1.0 / self.fps, time.perf_counter() - 1.0)
+        self.frame_index += 1
+        return True
+
+    def retrieve(self):
+        t = self.frame_index / self.fps
+        frame = self.background.copy()
+        sx, sy = self.size[0] / 640, self.size[1] / 360
+        for person, zone in zip(self.people, self.zones.values()):
+            if t < person["away_until"]:
+                continue
+            if self.rng.random() < 0.0005:
+                person["away_until"] = t + self.rng.uniform(20, 120)
+            x1, y1, x2, y2 = zone[:4]
+            cx, cy = (x1 + x2) / 2 * sx, (y1 + y2) / 2 * sy
+            # Separuh waktu tangan bergerak (working), separuh diam (idle)
+            working = math.sin(t / 30 + person["phase"]) > 0
+            swing = math.sin(t * 4 + person["phase"]) * 25 if working else 0
+            points = {name: (int(cx + dx * sx), int(cy + dy * sy)) for name, (dx, dy) in BODY.items()}
+            points["l_hand"] = (int(cx - 35 * sx), int(cy + (-10 + swing) * sy))
+            points["r_hand"] = (int(cx + 35 * sx), int(cy + (-10 - swing) * sy))
+            color, thickness = (40, 40, 200), max(2, int(6 * sx))
+            for a, b in (("neck", "hip"), ("l_shoulder", "r_shoulder"), ("l_shoulder", "l_hand"), ("r_shoulder", "r_hand"),
+                         ("hip", "l_knee"), ("l_knee", "l_foot"), ("hip", "r_knee"), ("r_knee", "r_foot")):
+                cv2.line(frame, points[a], points[b], color, thickness)
+            cv2.circle(frame, points["head"], int(16 * sx), (60, 120, 220), -1)
+        return True, frame
+
+    def read(self):
+        self.grab()
+        return self.retrieve()
+
+    def release(self):
+        pass
+
+
+def open_synthetic(source, zones=None):
+    """Capture object for loop:// and synthetic:// sources (see main.open_stream)"""
+    url = urlparse(source)
+    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    pace = params.get("pace", "1") != "0"
+    if url.scheme == "loop":
+        return LoopCapture(source[len("loop://"):].split("?")[0], pace)
+    width, height = map(int, params.get("size", "1280x720").split("x"))
+    return SyntheticCapture(float(params.get("fps", 15)), (width, height), int(params.get("seed", 0)), zones, pace)
+
+
+class StubDatabase:
+    """DatabaseManager stand-in for load tests: counts writes and optionally adds a fixed write latency"""
+
+    def __init__(self, database_config=None):
+        self.latency = (database_config or {}).get("latency", 0.0)
+        self.writes = 0
+
+    def log_activity(self, camera, zone_name, event, status_change, last_seen_timestamp, timestamp=None, clip_path=None):
+        self.write()
+
+    def save_summary(self, camera, zone_summaries, summary_hour):
+        self.write()
+
+    def write(self):
+        self.writes += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_recent_activities(self, limit=50, camera=None, strict=False):
+        return []
+
+    def get_summary_by_hour(self, camera=None, date=None, strict=False):
+        return []
+
+    def get_day_totals(self, date, camera=None, strict=False):
+        return []
+
+    def close(self):
+        print(f"[LoadGen] Stub database received {self.writes} writes")
+
+
+# =========================
+# Capacity harness
+# =========================
+
+def harness_worker(config, args, kwargs):
+    """Camera process: run the real pipeline with the harness config instead of config.json"""
+    import main
+    main._config = config
+    main.run_tracking(*args, **kwargs)
+
+
+def proc_usage(pid):
+    """(cpu seconds, rss bytes) of one process from /proc"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        return cpu, rss
+    except (OSError, StopIteration, IndexError):
+        return 0.0, 0
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def camera_source(source, i):
+    """Each synthetic camera gets its own seed so scenes are not identical"""
+    url = urlparse(source)
+    if url.scheme != "synthetic":
+        return source
+    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    params["seed"] = str(int(params.get("seed", 0)) + i)
+    return f"synthetic://?{urlencode(params)}"
+
+
+def harness_config(base, source, num_cameras, database):
+    config = json.loads(json.dumps(base))
+    cam_config = {"zones": SYNTHETIC_ZONES, "work_start": "00:00", "work_end": "23:59", "breaks": [], "overtime": [], "away_timeout": 2}
+    config["video_sources"] = [[camera_source(source, i), cam_config] for i in range(num_cameras)]
+    config["database"] = {"backend": database}
+    config["metrics"] = dict(config.get("metrics", {}), dir="loadgen_metrics", http_port=None)
+    # Layanan launcher dan fitur state lintas-run dimatikan supaya run bisa diulang
+    for key in ("events", "read_api", "clips", "checkpoint", "budget", "low_power", "profiling", "cpu"):
+        config[key] = dict(config.get(key, {}), enabled=False)
+    config["recording"] = dict(config.get("recording", {}), dir="loadgen_recordings")
+    return config
+
+
+def measure(base, source, num_cameras, database, warmup, seconds):
+    """Run N cameras through the full pipeline; returns one capacity-curve point"""
+    from main import camera_worker_spec
+    config = harness_config(base, source, num_cameras, database)
+    frame_queue = multiprocessing.Queue(maxsize=30 * num_cameras)
+    jobs, stops = [], []
+    for idx, (src, cam_config) in enumerate(config["video_sources"], start=1):
+        args, kwargs = camera_worker_spec(idx, src, cam_config, frame_queue)
+        stop_event = multiprocessing.Event()
+        kwargs["stop_event"] = stop_event
+        p = multiprocessing.Process(target=harness_worker, args=(config, args, kwargs))
+        p.start()
+        jobs.append(p)
+        stops.append(stop_event)
+
+    samples = []  # (cam_idx, seq, t_get, meta)
+    measuring = threading.Event()
+    done = threading.Event()
+
+    def consume():
+        # Pengganti frame_server: mengosongkan queue dan mencatat latency per frame
+        while not done.is_set():
+            try:
+                cam_idx, frame_rgb, meta = frame_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if measuring.is_set():
+                samples.append((cam_idx, meta["seq"], time.time(), meta))
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    time.sleep(warmup)
+    usage_start = [proc_usage(p.pid) for p in jobs]
+    t_start = time.time()
+    measuring.set()
+    time.sleep(seconds)
+    measuring.clear()
+    elapsed = time.time() - t_start
+    usage_end = [proc_usage(p.pid) for p in jobs]
+
+    for ev in stops:
+        ev.set()
+    for p in jobs:
+        p.join(30)
+        if p.is_alive():
+            p.terminate()
+    done.set()
+    consumer.join()
+
+    per_camera = {}
+    for cam_idx, seq, t_get, meta in samples:
+        first, last = per_camera.get(cam_idx, (seq, seq))
+        per_camera[cam_idx] = (min(first, seq), max(last, seq))
+    # seq dihitung worker, jadi frame yang tidak sampai ke queue tetap terhitung
+    fps = [(last - first) / elapsed for first, last in per_camera.values()] + [0.0] * (num_cameras - len(per_camera))
+    latency = [t_get - meta["t_capture"] for _, _, t_get, meta in samples]
+    inference = [meta["t_inferred"] - meta["t_capture"] for _, _, _, meta in samples]
+    cpu_seconds = sum(end[0] - start[0] for start, end in zip(usage_start, usage_end))
+    return {
+        "cameras": num_cameras,
+        "fps_min": round(min(fps), 2),
+        "fps_mean": round(sum(fps) / len(fps), 2),
+        "cpu_percent": round(cpu_seconds / elapsed * 100, 1),
+        "rss_mb": round(sum(end[1] for end in usage_end) / 1e6, 1),
+        "latency_p50_ms": round(percentile(latency, 0.5) * 1000, 1),
+        "latency_p95_ms": round(percentile(latency, 0.95) * 1000, 1),
+        "latency_p99_ms": round(percentile(latency, 0.99) * 1000, 1),
+        "capture_to_inferred_p95_ms": round(percentile(inference, 0.95) * 1000, 1),
+    }
+
+
+def release_label():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_curve(curve, previous=None):
+    header = f"{'Cameras':>8}{'FPS min':>9}{'FPS mean':>10}{'CPU %':>8}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header + ("  vs previous FPS min" if previous else ""))
+    old = {p["cameras"]: p for p in (previous or {}).get("points", [])}
+    for p in curve["points"]:
+        line = (f"{p['cameras']:>8}{p['fps_min']:>9.2f}{p['fps_mean']:>10.2f}{p['cpu_percent']:>8.0f}{p['rss_mb']:>9.0f}"
+                f"{p['latency_p50_ms']:>9.1f}{p['latency_p95_ms']:>9.1f}{p['latency_p99_ms']:>9.1f}")
+        if p["cameras"] in old:
+            line += f"  {old[p['cameras']]['fps_min']:.2f} ({p['fps_min'] - old[p['cameras']]['fps_min']:+.2f})"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capacity curve: N synthetic cameras through the full tracking pipeline")
+    parser.add_argument("--source", default="synthetic://?fps=15&size=1280x720&seed=0",
+                        help="synthetic://?fps=&size=&seed=&pace=0|1 or loop://<video file>")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--warmup", type=float, default=30, help="Seconds for model load and warmup before measuring")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--db", choices=["stub", "postgres"], default="stub")
+    parser.add_argument("--target-fps", type=float, help="FPS a camera must sustain to count (default: 90%% of source fps)")
+    parser.add_argument("--output", default="capacity.json")
+    parser.add_argument("--compare", help="Earlier capacity.json to compare against")
+    args = parser.parse_args()
+
+    with open("config.json") as f:
+        base = json.load(f)
+    params = parse_qs(urlparse(args.source).query)
+    target_fps = args.target_fps or 0.9 * float(params.get("fps", [15])[0])
+    curve = {"release": release_label(), "source": args.source, "db": args.db, "target_fps": target_fps,
+             "inference": base.get("inference", {}), "cpu_count": os.cpu_count(), "points": []}
+    for n in args.cameras:
+        print(f"[LoadGen] {n} camera(s): warmup {args.warmup:.0f}s, measuring {args.seconds:.0f}s")
+        point = measure(base, args.source, n, args.db, args.warmup, args.seconds)
+        curve["points"].append(point)
+        print(f"[LoadGen] {json.dumps(point)}")
+        if point["fps_min"] < target_fps * 0.5:
+            print(f"[LoadGen] Stopping: {n} cameras are far below {target_fps:.1f} fps")
+            break
+    sustained = [p["cameras"] for p in curve["points"] if p["fps_min"] >= target_fps]
+    curve["capacity"] = max(sustained) if sustained else 0
+    with open(args.output, "w") as f:
+        json.dump(curve, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_curve(curve, previous)
+    print(f"[LoadGen] Release {curve['release']}: {curve['capacity']} cameras sustain {target_fps:.1f} fps"
+          + (f" (previous {previous['release']}: {previous.get('capacity')})" if previous else "") + f", saved {args.output}")
+    sys.exit(0)
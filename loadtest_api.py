@@ -0,0 +1,86 @@
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def build_paths(cameras, day):
+    paths = ["/api/activities?limit=50", f"/api/summary?date={day}", f"/api/totals?date={day}"]
+    for cam in range(1, cameras + 1):
+        paths += [f"/api/activities?camera={cam}&limit=50", f"/api/summary?camera={cam}&date={day}",
+                  f"/api/totals?camera={cam}&date={day}"]
+    return paths
+
+
+def run(base_url, paths, rate, seconds, workers, conditional):
+    """Open-loop load: requests are scheduled at a fixed rate regardless of response time"""
+    latencies = []
+    codes = {}
+    etags = {}
+    lock = threading.Lock()
+
+    def request(path):
+        req = urllib.request.Request(base_url + path)
+        if conditional and path in etags:
+            req.add_header("If-None-Match", etags[path])
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                resp.read()
+                code = resp.status
+                etag = resp.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            code, etag = e.code, None
+        except OSError:
+            code, etag = "error", None
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            codes[code] = codes.get(code, 0) + 1
+            if etag:
+                etags[path] = etag
+
+    t_start = time.perf_counter()
+    total = int(rate * seconds)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i in range(total):
+            delay = t_start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(request, random.choice(paths))
+    elapsed = time.perf_counter() - t_start
+    return latencies, codes, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the read API (readapi.py) at a fixed request rate")
+    parser.add_argument("--url", default="http://localhost:9400")
+    parser.add_argument("--rates", type=float, nargs="*", default=[100, 200, 400, 800], help="Requests per second steps")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--date", default=time.strftime("%Y-%m-%d"))
+    parser.add_argument("--no-etag", action="store_true", help="Do not send If-None-Match")
+    args = parser.parse_args()
+
+    paths = build_paths(args.cameras, args.date)
+    print(f"{'Target rps':>11}{'Achieved':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  Status codes")
+    for rate in args.rates:
+        latencies, codes, elapsed = run(args.url, paths, rate, args.seconds, args.workers, not args.no_etag)
+        print(f"{rate:>11.0f}{len(latencies) / elapsed:>10.1f}{percentile(latencies, 0.5) * 1000:>9.1f}"
+              f"{percentile(latencies, 0.95) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}  {codes}")
+    try:
+        with urllib.request.urlopen(args.url + "/api/stats", timeout=5) as resp:
+            print(f"[LoadTest] Server cache stats: {resp.read().decode()}")
+    except OSError:
+        pass
@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+
+DEFAULT_LOW_POWER = {
+    "enabled": False,
+    "fps": 0.5,            # Rate inference di luar jam kerja / saat istirahat
+    "recording": "sampled",  # off | sampled (hanya frame yang di-inference) | full (semua frame, tanpa inference)
+    "wake_before": 120,    # Detik sebelum jam kerja berikutnya untuk kembali ke mode normal
+}
+RECORDING_POLICIES = ("off", "sampled", "full")
+
+
+class LowPowerMode:
+    """Per-camera low-power switch driven by the work schedule, with CPU-time accounting"""
+
+    def __init__(self, cam_idx, is_active, low_power_config=None):
+        self.cam_idx = cam_idx
+        self.is_active = is_active  # (datetime) -> bool, jam kerja dan bukan istirahat
+        self.settings = dict(DEFAULT_LOW_POWER)
+        self.settings.update(low_power_config or {})
+        if self.settings["recording"] not in RECORDING_POLICIES:
+            raise ValueError(f"Unknown low-power recording policy '{self.settings['recording']}'")
+        self.low = False
+        self.checked_second = None
+        self.last_inference = None
+
+        # CPU accounting: proses (semua thread) vs wall clock
+        self.last_wall = time.time()
+        self.last_cpu = time.process_time()
+        self.normal_cpu_rate = None  # CPU-detik per detik saat mode normal
+        self.day = None
+        self.saved_cpu_seconds = 0.0
+        self.low_seconds = 0.0
+
+    @property
+    def record_processed(self):
+        return not self.low or self.settings["recording"] in ("sampled", "full")
+
+    @property
+    def record_skipped(self):
+        return self.low and self.settings["recording"] == "full"
+
+    def update(self, now_dt):
+        """Re-evaluate once per camera-clock second; returns True while in low-power mode"""
+        self.account(now_dt)
+        second = int(now_dt.timestamp())
+        if second == self.checked_second:
+            return self.low
+        self.checked_second = second
+        # Bangun lebih awal supaya model & tracker sudah stabil saat jam kerja mulai
+        wake_at = now_dt + timedelta(seconds=self.settings["wake_before"])
+        low = not self.is_active(now_dt) and not self.is_active(wake_at)
+        if low != self.low:
+            self.low = low
+            self.last_inference = None
+            state = f"entering low-power ({self.settings['fps']} fps, recording {self.settings['recording']})" if low else "back to full rate"
+            print(f"[LowPower] Camera {self.cam_idx} {state} at {now_dt:%H:%M:%S}")
+        return self.low
+
+    def should_infer(self, now):
+        if not self.low:
+            return True
+        if self.last_inference is not None and 0 <= now - self.last_inference < 1.0 / self.settings["fps"]:
+            return False
+        self.last_inference = now
+        return True
+
+    def account(self, now_dt):
+        wall = time.time()
+        dt_wall = wall - self.last_wall
+        if dt_wall < 5:
+            return
+        cpu = time.process_time()
+        dt_cpu = cpu - self.last_cpu
+        self.last_wall = wall
+        self.last_cpu = cpu
+
+        day = now_dt.date()
+        if self.day is not None and day != self.day:
+            print(self.report(self.day))
+            self.saved_cpu_seconds = 0.0
+            self.low_seconds = 0.0
+        self.day = day
+
+        if self.low:
+            self.low_seconds += dt_wall
+            if self.normal_cpu_rate is not None:
+                self.saved_cpu_seconds += max(0.0, self.normal_cpu_rate * dt_wall - dt_cpu)
+        else:
+            rate = dt_cpu / dt_wall
+            self.normal_cpu_rate = rate if self.normal_cpu_rate is None else 0.9 * self.normal_cpu_rate + 0.1 * rate
+
+    @property
+    def saved_cpu_hours(self):
+        return self.saved_cpu_seconds / 3600
+
+    def report(self, day=None):
+        day = day or self.day
+        return (f"[LowPower] Camera {self.cam_idx} {day}: {self.saved_cpu_hours:.2f} CPU-hours saved "
+                f"over {self.low_seconds / 3600:.1f}h in low-power")
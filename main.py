@@ -1,57 +1,188 @@
-from ultralytics import YOLO
-import cv2
-import numpy as np
 import time
-from datetime import datetime, timedelta
+_import_started = time.perf_counter()
+import cv2
+from datetime import datetime
 import multiprocessing
 import json
 import signal
-import pandas as pd
-import os
 import threading
 import socket
 import pickle
 import struct
 import queue
 from database import DatabaseManager
-
-with open("config.json") as f:
-    config = json.load(f)
+from metrics import StageMetrics, metrics_server, process_rss_bytes
+from inference import PoseModel, export_model
+from cpuplan import plan_cpu, apply_cpu_plan
+from budget import InferenceBudget
+from lowpower import LowPowerMode
+from supervisor import CameraSupervisor, supervisor_settings
+from configwatch import ConfigWatcher
+from clock import WallClock, VideoClock
+from events import EventHub, EventPublisher, events_settings
+from recording import Recorder
+from checkpoint import checkpoint_settings, checkpoint_path, save_checkpoint, restore_tracker, seed_from_database
+from tracker import ZoneTracker, TRACK_TTL, ACTIVITY_WINDOW
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+_config = None
+
+def load_config(path="config.json"):
+    """Read config.json once, on first use instead of at import"""
+    global _config
+    if _config is None:
+        with open(path) as f:
+            _config = json.load(f)
+    return _config
 
 # =========================
 # Helper Functions
 # =========================
 
-def frame_server(frame_queue, host='localhost', port=9999):
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.bind((host, port))
-    server_socket.listen(1)
-    print(f"[FrameServer] Listening on {host}:{port}")
+STREAM_PAUSED = 0   # Tile tidak terlihat, worker tidak perlu kirim frame
+STREAM_MOSAIC = 1   # Hanya untuk mosaic, resolusi kecil dengan fps rendah
+STREAM_TILE = 2     # Tile terlihat di grid, cukup resolusi kecil
+STREAM_FULL = 3     # Focus view, kirim resolusi penuh
+TILE_SIZE = (320, 180)
+
+def send_message(conn, payload):
+    """Send a length-prefixed JSON message (control channel)"""
+    data = json.dumps(payload).encode("utf-8")
+    conn.sendall(struct.pack("Q", len(data)) + data)
+
+def recv_message(conn):
+    """Receive a length-prefixed JSON message, None when the peer closed"""
+    payload_size = struct.calcsize("Q")
+    data = b""
+    while len(data) < payload_size:
+        packet = conn.recv(payload_size - len(data))
+        if not packet:
+            return None
+        data += packet
+    msg_size = struct.unpack("Q", data)[0]
+    data = b""
+    while len(data) < msg_size:
+        packet = conn.recv(min(4096, msg_size - len(data)))
+        if not packet:
+            return None
+        data += packet
+    return json.loads(data.decode("utf-8"))
+
+def refresh_stream_modes(stream_modes, stream_state):
+    """Translate client visibility and mosaic demand into per-camera stream modes"""
+    if stream_modes is None:
+        return
+    visible = stream_state.get("visible")
+    focus = stream_state.get("focus")
+    floor = STREAM_MOSAIC if stream_state.get("mosaic") else STREAM_PAUSED
+    for i in range(len(stream_modes)):
+        cam_idx = i + 1
+        if not stream_state.get("client"):
+            mode = STREAM_PAUSED
+        elif cam_idx == focus:
+            mode = STREAM_FULL
+        elif visible is None or cam_idx in visible:
+            mode = STREAM_TILE
+        else:
+            mode = STREAM_PAUSED
+        stream_modes[i] = max(mode, floor)
+
+def read_stream_control(conn, client_state, stream_modes, stream_state):
+    """Read visibility/focus updates sent by the GUI on the frame socket"""
+    while True:
+        try:
+            msg = recv_message(conn)
+        except Exception:
+            break
+        if msg is None:
+            break
+        client_state["visible"] = set(msg.get("visible", []))
+        client_state["focus"] = msg.get("focus")
+        stream_state["visible"] = client_state["visible"]
+        stream_state["focus"] = client_state["focus"]
+        refresh_stream_modes(stream_modes, stream_state)
+        print(f"[FrameServer] Stream control: visible={sorted(client_state['visible'])} focus={client_state['focus']}")
+    client_state["closed"] = True
+
+def accept_clients(server_socket, client_slot, stream_modes, stream_state):
+    """Accept GUI connections; a new client replaces the previous one"""
     while True:
         print("[FrameServer] Waiting for client connection...")
         conn, addr = server_socket.accept()
         print(f"[FrameServer] Client connected: {addr}")
 
-        # Flush frame_queue to avoid sending old frames
-        try:
-            while not frame_queue.empty():
-                frame_queue.get_nowait()
-        except Exception:
-            pass
+        # Sampai client kirim visibility, anggap semua tile terlihat
+        client_state = {"conn": conn, "addr": addr, "visible": None, "focus": None, "closed": False}
+        old_client = client_slot.get("client")
+        if old_client is not None:
+            old_client["closed"] = True
+        client_slot["client"] = client_state
+        stream_state.update({"client": True, "visible": None, "focus": None})
+        refresh_stream_modes(stream_modes, stream_state)
+        threading.Thread(target=read_stream_control, args=(conn, client_state, stream_modes, stream_state), daemon=True).start()
+
+def drop_client(client_slot, client_state, stream_modes, stream_state):
+    try:
+        client_state["conn"].close()
+    except Exception:
+        pass
+    if client_slot.get("client") is client_state:
+        client_slot["client"] = None
+        # Tidak ada yang menonton, worker berhenti kirim frame
+        stream_state.update({"client": False, "visible": None, "focus": None})
+        refresh_stream_modes(stream_modes, stream_state)
+        print(f"[FrameServer] Client disconnected: {client_state['addr']}")
+
+def frame_server(frame_queue, host='localhost', port=9999, stream_modes=None, mosaic=None):
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.bind((host, port))
+    server_socket.listen(1)
+    print(f"[FrameServer] Listening on {host}:{port}")
 
+    stream_state = {"client": False, "visible": None, "focus": None, "mosaic": False}
+    client_slot = {"client": None}
+    if mosaic is not None:
+        def on_mosaic_demand(active):
+            stream_state["mosaic"] = active
+            refresh_stream_modes(stream_modes, stream_state)
+        mosaic.on_demand_change = on_mosaic_demand
+    refresh_stream_modes(stream_modes, stream_state)
+    threading.Thread(target=accept_clients, args=(server_socket, client_slot, stream_modes, stream_state), daemon=True).start()
+
+    # Queue selalu dikosongkan supaya mosaic tetap dapat frame terbaru
+    while True:
+        client_state = client_slot.get("client")
+        if client_state is not None and client_state["closed"]:
+            drop_client(client_slot, client_state, stream_modes, stream_state)
         try:
-            while True:
-                try:
-                    cam_idx, frame_rgb = frame_queue.get(timeout=1)
-                    data = pickle.dumps((cam_idx, frame_rgb))
-                    msg = struct.pack("Q", len(data)) + data
-                    conn.sendall(msg)
-                except queue.Empty:
-                    continue
+            cam_idx, frame_rgb, meta = frame_queue.get(timeout=1)
+            meta["t_server_get"] = time.time()
+        except queue.Empty:
+            continue
+        except Exception as e:
+            print(f"[FrameServer] Queue error: {e}")
+            continue
+
+        if mosaic is not None:
+            mosaic.update(cam_idx, frame_rgb)
+
+        client_state = client_slot.get("client")
+        if client_state is None or client_state["closed"]:
+            continue
+        visible = client_state["visible"]
+        focus = client_state["focus"]
+        if visible is not None and cam_idx not in visible and cam_idx != focus:
+            continue
+        if cam_idx != focus and frame_rgb.shape[1] > TILE_SIZE[0]:
+            frame_rgb = cv2.resize(frame_rgb, TILE_SIZE, interpolation=cv2.INTER_AREA)
+        try:
+            meta["t_sent"] = time.time()
+            data = pickle.dumps((cam_idx, frame_rgb, meta))
+            msg = struct.pack("Q", len(data)) + data
+            client_state["conn"].sendall(msg)
         except Exception as e:
             print(f"[FrameServer] Error: {e}")
-            conn.close()
-    server_socket.close()
+            drop_client(client_slot, client_state, stream_modes, stream_state)
 
 def format_time(seconds):
     minutes = int(seconds // 60)
@@ -89,54 +220,9 @@ def is_break_time(now, break_times):
             return True
     return False
 
-def get_person_center(keypoints, visibility, HEAD_KEYPOINT, SHOULDER_KEYPOINTS, HIP_KEYPOINTS, VISIBILITY_THRESHOLD):
-    visible_points = []
-    for idx in [HEAD_KEYPOINT] + SHOULDER_KEYPOINTS + HIP_KEYPOINTS:
-        if visibility[idx] > VISIBILITY_THRESHOLD:
-            visible_points.append(keypoints[idx])
-    if len(visible_points) > 0:
-        center = np.mean(visible_points, axis=0)
-        return int(center[0]), int(center[1])
-    return None
-
-def find_zone_by_position(center, WORKSTATION_ZONES):
-    if center is None:
-        return None
-    x, y = center
-    for zone_id, zone_data in WORKSTATION_ZONES.items():
-        x1, y1, x2, y2 = zone_data[:4]
-        if x1 <= x <= x2 and y1 <= y <= y2:
-            return zone_id
-    return None
-
-def is_in_zone(center, zone_id, WORKSTATION_ZONES):
-    if center is None or zone_id is None or zone_id not in WORKSTATION_ZONES:
-        return False
-    x, y = center
-    x1, y1, x2, y2 = WORKSTATION_ZONES[zone_id][:4]
-    return x1 <= x <= x2 and y1 <= y <= y2
-
-def calculate_activity_score(pose1, pose2, vis1, vis2, HAND_KEYPOINTS, SHOULDER_KEYPOINTS, VISIBILITY_THRESHOLD):
-    if pose1 is None or pose2 is None:
-        return 0
-    score = 0
-    for hand_idx in HAND_KEYPOINTS:
-        if vis1[hand_idx] > VISIBILITY_THRESHOLD and vis2[hand_idx] > VISIBILITY_THRESHOLD:
-            movement = np.linalg.norm(pose1[hand_idx] - pose2[hand_idx])
-            score += movement * 2.0
-    for shoulder_idx in SHOULDER_KEYPOINTS:
-        if vis1[shoulder_idx] > VISIBILITY_THRESHOLD and vis2[shoulder_idx] > VISIBILITY_THRESHOLD:
-            movement = np.linalg.norm(pose1[shoulder_idx] - pose2[shoulder_idx])
-            score += movement * 1.0
-    return score
-
-def is_valid_detection(visibility, HEAD_KEYPOINT, VISIBILITY_THRESHOLD):
-    head_visible = visibility[HEAD_KEYPOINT] > VISIBILITY_THRESHOLD
-    shoulders_visible = (visibility[5] > VISIBILITY_THRESHOLD and visibility[6] > VISIBILITY_THRESHOLD)
-    return head_visible or shoulders_visible
-
-def draw_zones(frame, WORKSTATION_ZONES, worker_data, zone_ownership, format_time, AWAY_TIMEOUT):
-    current_time = time.time()
+def draw_zones(frame, WORKSTATION_ZONES, worker_data, zone_ownership, format_time, AWAY_TIMEOUT, current_time=None):
+    if current_time is None:
+        current_time = time.time()
     
     # Draw time info in top right corner
     y_offset = 30  # Starting y position
@@ -154,7 +240,6 @@ def draw_zones(frame, WORKSTATION_ZONES, worker_data, zone_ownership, format_tim
             person_id = zone_ownership[zone_id]
             data = worker_data.get(person_id)
             if data:
-                current_time = time.time()
                 # Cek jika sudah away berdasarkan last_seen
                 if current_time - data["last_seen"] > AWAY_TIMEOUT:
                     color = (0, 0, 255)      # Merah untuk away
@@ -194,331 +279,428 @@ def draw_zones(frame, WORKSTATION_ZONES, worker_data, zone_ownership, format_tim
         
         y_offset += 25  # Move down for next zone's info
 
-def log_activity_to_db(db_manager, cam_idx, zone_name, event, status_change, last_seen_timestamp):
+def log_activity_to_db(db_manager, cam_idx, zone_name, event, status_change, last_seen_timestamp, metrics=None, event_time=None, clip_path=None):
     """Log activity to database immediately"""
+    t0 = time.perf_counter()
     try:
-        db_manager.log_activity(cam_idx, zone_name, event, status_change, last_seen_timestamp)
+        db_manager.log_activity(cam_idx, zone_name, event, status_change, last_seen_timestamp, event_time, clip_path)
     except Exception as e:
         print(f"[ERROR] Failed to log activity to DB: {e}")
-
-def save_hourly_summary_to_db(db_manager, cam_idx, WORKSTATION_ZONES, zone_ownership, worker_data):
+    if metrics is not None:
+        metrics.observe("db", time.perf_counter() - t0)
+
+def zone_summaries_from_totals(zone_totals):
+    """Add formatted strings to per-zone working/idle/away seconds for save_summary"""
+    zone_summaries = {}
+    for zone_name, totals in zone_totals.items():
+        zone_summaries[zone_name] = {
+            'working_time': totals['working_time'],
+            'idle_time': totals['idle_time'],
+            'away_time': totals['away_time'],
+            'working_time_formatted': format_time(totals['working_time']),
+            'idle_time_formatted': format_time(totals['idle_time']),
+            'away_time_formatted': format_time(totals['away_time'])
+        }
+    return zone_summaries
+
+def save_hourly_summary_to_db(db_manager, cam_idx, tracker, metrics=None, now=None):
     """Save hourly summary to database"""
+    t0 = time.perf_counter()
     try:
-        now = datetime.now()
+        now = now or datetime.now()
         summary_hour = now.replace(minute=0, second=0, microsecond=0)
-        
-        zone_summaries = {}
-        for zone_id, zone_data in WORKSTATION_ZONES.items():
-            zone_name = zone_data[4] if len(zone_data) > 4 else f"Zone {zone_id}"
-            person_id = zone_ownership.get(zone_id)
-            
-            if person_id and person_id in worker_data:
-                w = worker_data[person_id]
-                zone_summaries[zone_name] = {
-                    'working_time': w['working_time'],
-                    'idle_time': w['idle_time'],
-                    'away_time': w['away_time'],
-                    'working_time_formatted': format_time(w['working_time']),
-                    'idle_time_formatted': format_time(w['idle_time']),
-                    'away_time_formatted': format_time(w['away_time'])
-                }
-            else:
-                zone_summaries[zone_name] = {
-                    'working_time': 0,
-                    'idle_time': 0,
-                    'away_time': 0,
-                    'working_time_formatted': "0s",
-                    'idle_time_formatted': "0s",
-                    'away_time_formatted': "0s"
-                }
-        
+        zone_summaries = zone_summaries_from_totals(tracker.zone_totals())
         db_manager.save_summary(cam_idx, zone_summaries, summary_hour)
         print(f"[INFO] Hourly summary saved to DB for Camera {cam_idx} at {summary_hour}")
         
     except Exception as e:
         print(f"[ERROR] Failed to save summary to DB: {e}")
+    if metrics is not None:
+        metrics.observe("db", time.perf_counter() - t0)
+
+def extract_detections(results):
+    """Flatten ultralytics pose results into (track_id, keypoints, visibility) tuples"""
+    detections = []
+    for result in results:
+        if not hasattr(result, "keypoints") or result.boxes.id is None:
+            continue
+        track_ids = result.boxes.id.int().cpu().tolist()
+        keypoints_xy = result.keypoints.xy.cpu().numpy()
+        keypoints_conf = result.keypoints.conf.cpu().numpy()
+        for idx, track_id in enumerate(track_ids):
+            detections.append((track_id, keypoints_xy[idx], keypoints_conf[idx]))
+    return detections
+
+def is_live_source(source):
+    return isinstance(source, str) and source.startswith(("rtsp://", "http://", "https://"))
+
+def open_stream(source):
+    if isinstance(source, str) and source.startswith(("loop://", "synthetic://")):
+        # Sumber buatan untuk load test (lihat loadgen.py)
+        from loadgen import open_synthetic
+        return open_synthetic(source)
+    cap = cv2.VideoCapture(source)
+    if is_live_source(source):
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+def reconnect_stream(cap, source, cam_idx, attempts, delay, heartbeat=None, stop_event=None):
+    """Reopen a dropped live stream with growing delays; None when it stays down"""
+    cap.release()
+    for attempt in range(1, attempts + 1):
+        wait = min(delay * 2 ** (attempt - 1), 30)
+        print(f"[Stream] Camera {cam_idx} lost, reconnect {attempt}/{attempts} in {wait:.0f}s")
+        wait_until = time.time() + wait
+        while time.time() < wait_until:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            # Tetap kirim heartbeat, reconnect bukan hang
+            if heartbeat is not None:
+                heartbeat[cam_idx - 1] = time.time()
+            time.sleep(0.5)
+        cap = open_stream(source)
+        if cap.isOpened() and cap.grab():
+            print(f"[Stream] Camera {cam_idx} reconnected")
+            return cap
+        cap.release()
+    print(f"[Stream] Camera {cam_idx} still down after {attempts} attempts")
+    return None
+
+def camera_worker_spec(idx, src, cam_config, frame_queue, stream_modes=None, cpu_plan=None, budget=None, events=None):
+    """(args, kwargs) of run_tracking for one camera, as started by the supervisor"""
+    args = (idx, src, cam_config.get("zones", {}), cam_config.get("breaks", []), cam_config.get("work_start", ""),
+            cam_config.get("work_end", ""), cam_config.get("overtime", []), frame_queue)
+    kwargs = {
+        "stream_modes": stream_modes if stream_modes is not None and idx <= len(stream_modes) else None,
+        "replay_start": cam_config.get("replay_start"),
+        "cpu_plan": cpu_plan["cameras"].get(idx) if cpu_plan else None,
+        "budget": budget.client(idx) if budget is not None and idx <= budget.num_cameras else None,
+        "event_queue": events.queue if events is not None else None,
+        "away_timeout": cam_config.get("away_timeout", 5),
+    }
+    return args, kwargs
+
+SKELETON_PAIRS = [
+    (0, 5), (0, 6), (5, 7), (7, 9), (6, 8), (8, 10), (5, 6), (5, 11), (6, 12), (11, 12)
+]
+
+def draw_skeleton(frame, keypoints, visibility):
+    for i, (x, y) in enumerate(keypoints):
+        if visibility[i] > 0.5:
+            cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
+    for a, b in SKELETON_PAIRS:
+        if visibility[a] > 0.5 and visibility[b] > 0.5:
+            pt1 = tuple(map(int, keypoints[a]))
+            pt2 = tuple(map(int, keypoints[b]))
+            cv2.line(frame, pt1, pt2, (255, 0, 0), 2)
 
 # =========================
 # Tracking Function
 # =========================
 
-def run_tracking(cam_idx, VIDEO_SOURCE, WORKSTATION_ZONES, break_times, work_start, work_end, overtime, frame_queue, stop_event=None):
+def run_tracking(cam_idx, VIDEO_SOURCE, WORKSTATION_ZONES, break_times, work_start, work_end, overtime, frame_queue, stop_event=None, stream_modes=None, replay_start=None, detection_cache=None, cpu_plan=None, budget=None, heartbeat=None, config_updates=None, event_queue=None, away_timeout=5):
     """
-    Fixed tracking function with proper sequential logging
+    Fixed tracking function with proper sequential logging.
+    With replay_start set, timers and schedules follow the video's frame
+    timestamps instead of the wall clock (see clock.VideoClock).
+    With detection_cache set, per-frame detections are also saved there
+    for detcache.py. cpu_plan is this camera's entry from cpuplan.plan_cpu.
+    budget is a budget.BudgetClient that limits the inference rate.
+    heartbeat is the supervisor's shared array; returns False on failure.
+    config_updates receives live zone/schedule/timeout changes (configwatch.py).
+    event_queue is the EventHub queue that status changes are published to (events.py).
+    away_timeout is the camera's away timeout in minutes.
     """
+    # Startup dicatat per fase; capture dibuka paralel dengan DB + load model
+    t_startup = time.perf_counter()
+    startup_phases = [("imports", IMPORT_SECONDS)]
+    # Affinity & thread count harus di-set sebelum torch/OpenCV membuat thread pool
+    t_phase = time.perf_counter()
+    apply_cpu_plan(cpu_plan, f"Camera {cam_idx}")
+    startup_phases.append(("cpu", time.perf_counter() - t_phase))
+    t_phase = time.perf_counter()
+    config = load_config()
+    startup_phases.append(("config", time.perf_counter() - t_phase))
+
+    capture = {}
+    def open_capture():
+        t_open = time.perf_counter()
+        capture["cap"] = open_stream(VIDEO_SOURCE)
+        capture["seconds"] = time.perf_counter() - t_open
+    capture_thread = threading.Thread(target=open_capture, daemon=True)
+    capture_thread.start()
+
     # Initialize database connection
+    t_phase = time.perf_counter()
     try:
-        db_manager = DatabaseManager()
+        if config.get("database", {}).get("backend") == "stub":
+            from loadgen import StubDatabase
+            db_manager = StubDatabase(config["database"])
+        else:
+            db_manager = DatabaseManager()
     except Exception as e:
         print(f"[ERROR] Cannot connect to database: {e}")
-        return
-    
-    # Keypoints & Thresholds
-    HAND_KEYPOINTS = [9, 10]
-    SHOULDER_KEYPOINTS = [5, 6]
-    HEAD_KEYPOINT = 0
-    HIP_KEYPOINTS = [11, 12]
-    ACTIVITY_THRESHOLD = 5
-    IDLE_TIMEOUT = 3
-    VISIBILITY_THRESHOLD = 0.5
+        capture_thread.join()
+        # open_stream bisa gagal (exception) sehingga cap tidak pernah diisi
+        if capture.get("cap") is not None:
+            capture["cap"].release()
+        return False
+    startup_phases.append(("database", time.perf_counter() - t_phase))
     
-    # Get away timeout from config (in minutes, convert to seconds)
-    config_away_timeout = config["video_sources"][cam_idx-1][1].get("away_timeout", 5)
+    # Away timeout ikut args worker (menit -> detik); config.json di proses ini bisa salinan lama hasil fork
+    config_away_timeout = away_timeout
     AWAY_TIMEOUT = config_away_timeout * 60  # Convert minutes to seconds
     
-    # Threshold untuk return
-    LOG_RETURN_THRESHOLD = 15  # Log "Returned to Zone" setelah 15 detik STABIL dalam zona
-
     print(f"\n=== Camera {cam_idx} ===")
     print(f"🔌 Connecting to video source: {VIDEO_SOURCE}")
     print(f"⏱️ Away Timeout: {config_away_timeout} minutes ({AWAY_TIMEOUT} seconds)")
+    tracking_config = config.get("tracking", {})
+    tracker = ZoneTracker(WORKSTATION_ZONES, AWAY_TIMEOUT,
+                          track_ttl=tracking_config.get("track_ttl", TRACK_TTL),
+                          long_idle=tracking_config.get("long_idle", 0),
+                          activity_window=tracking_config.get("activity_window", ACTIVITY_WINDOW))
+    LOG_RETURN_THRESHOLD = tracker.log_return_threshold
     print(f"🔄 Log Return Threshold: {LOG_RETURN_THRESHOLD} seconds")
 
-    model = YOLO("yolov8n-pose.pt")
-    worker_data = {}
-    zone_ownership = {}
-    person_to_zone = {}
-    track_to_person = {}
-    next_person_id = 1
-
-    cap = cv2.VideoCapture(VIDEO_SOURCE)
-    if VIDEO_SOURCE.startswith("rtsp://") or VIDEO_SOURCE.startswith("http://"):
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    if not cap.isOpened():
+    t_phase = time.perf_counter()
+    model = PoseModel(config.get("inference"))
+    startup_phases.append(("model", time.perf_counter() - t_phase))
+    print(f"🧠 Inference backend: {model.name}")
+    # Inference pertama selalu lambat (alokasi, graph init), lakukan sebelum capture jalan
+    t_phase = time.perf_counter()
+    model.warmup()
+    startup_phases.append(("warmup", time.perf_counter() - t_phase))
+
+    capture_thread.join()
+    cap = capture.get("cap")
+    startup_phases.append(("capture", capture.get("seconds", 0.0)))
+    t_phase = time.perf_counter()
+    if cap is None or not cap.isOpened():
         print(f"❌ Error: Cannot connect to video source {VIDEO_SOURCE}")
-        return
+        db_manager.close()
+        return False
 
     frame_count = 0
     fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    clock = VideoClock(replay_start, fps) if replay_start else WallClock()
+    if clock.replay:
+        print(f"⏩ Replay mode from {clock.start} (video time)")
     fps_display = 0
     fps_timer = time.time()
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(f"output_tracking_cam{cam_idx}.mp4", fourcc, fps, (640, 360))
+    # Timelapse + clip di sekitar event (atau mp4 penuh pada mode continuous), lihat recording.py
+    recorder = Recorder(cam_idx, fps, config.get("recording"))
 
-    last_summary_update = time.time()
+    last_summary_update = None
     SUMMARY_UPDATE_INTERVAL = 300  # 5 minutes
-
+    last_stream_put = 0
+    MOSAIC_FPS = config.get("mosaic", {}).get("fps", 2)
+
+    # Per-stage timers, di-flush ke metrics/cam{idx}.prom
+    metrics_config = config.get("metrics", {})
+    metrics = StageMetrics(cam_idx, metrics_config.get("dir", "metrics"), metrics_config.get("flush_interval", 5))
+    metrics.set_gauge("zones", len(WORKSTATION_ZONES))
+
+    # Opt-in profiling lewat control socket (lihat profiling.py)
+    profiling_config = config.get("profiling", {})
+    profiler = None
+    if profiling_config.get("enabled"):
+        from profiling import ProfileController
+        profiler = ProfileController(cam_idx, profiling_config.get("base_port", 9200), profiling_config.get("dir", "profiles"))
+        profiler.start()
+
+    # Di luar jam kerja / saat istirahat: inference & recording dikurangi (lihat lowpower.py)
+    power = None
+    if config.get("low_power", {}).get("enabled"):
+        power = LowPowerMode(
+            cam_idx,
+            lambda dt: is_work_time(dt, work_start, work_end, overtime) and not is_break_time(dt, break_times),
+            config["low_power"])
+
+    cache_writer = None
+    if detection_cache:
+        from detcache import DetectionCacheWriter
+        cache_writer = DetectionCacheWriter(detection_cache, {
+            "camera": cam_idx, "source": VIDEO_SOURCE, "fps": fps, "replay_start": replay_start,
+        })
+        print(f"💾 Saving detections to {detection_cache}")
+
+    publisher = None
+    if event_queue is not None:
+        publisher = EventPublisher(cam_idx, event_queue, events_settings(config.get("events"))["snapshot_interval"])
+
+    # Checkpoint state tracker supaya restart melanjutkan hari yang sama (tidak dipakai saat replay)
+    checkpoint_config = checkpoint_settings(config.get("checkpoint"))
+    checkpoint_file = None
+    last_checkpoint = time.time()
+    gap = None
+    if not clock.replay:
+        now = clock.time()
+        if checkpoint_config["enabled"]:
+            checkpoint_file = checkpoint_path(checkpoint_config["dir"], cam_idx)
+            gap = restore_tracker(checkpoint_file, cam_idx, tracker, now, clock.now().date(), checkpoint_config["max_gap"])
+        # Checkpoint ada di disk lokal: kamera yang pindah node (atau kembali dengan checkpoint basi)
+        # melanjutkan total hari ini dari DB
+        if seed_from_database(db_manager, cam_idx, tracker, clock.now().date()):
+            gap = None
+        if gap is not None:
+            # Downtime dicatat eksplisit per zona, bukan dihitung sebagai working/away
+            for zone_name in sorted({tracker.zone_name(zone_id) for zone_id in WORKSTATION_ZONES}):
+                log_activity_to_db(db_manager, cam_idx, zone_name, "Downtime",
+                                   f"No data for {format_time(gap)}", now - gap, metrics)
+            metrics.set_gauge("downtime_seconds_today", round(tracker.downtime))
+            if publisher is not None:
+                publisher.publish("camera", state="restored", downtime=gap)
+    if publisher is not None:
+        publisher.publish("camera", state="started")
+
+    supervisor_config = supervisor_settings(config.get("supervisor"))
+    stream_lost = False
+    last_config_check = time.time()
+    current_day = None
+    last_frame_dt = None
     while True:
         if stop_event is not None and stop_event.is_set():
             print(f"[INFO] Camera {cam_idx} received stop event, exiting...")
             break
-        ret, frame = cap.read()
+        if heartbeat is not None:
+            heartbeat[cam_idx - 1] = time.time()
+        if config_updates is not None and time.time() - last_config_check >= 1.0:
+            last_config_check = time.time()
+            while True:
+                try:
+                    update = config_updates.get_nowait()
+                except queue.Empty:
+                    break
+                # Terapkan di tempat: model, stream & timer worker tetap jalan
+                changes = update["changes"]
+                # Key yang dihapus dari config.json datang sebagai None: kembali ke default
+                if "zones" in changes:
+                    WORKSTATION_ZONES = changes["zones"] or {}
+                    tracker.set_zones(WORKSTATION_ZONES)
+                    metrics.set_gauge("zones", len(WORKSTATION_ZONES))
+                if "away_timeout" in changes:
+                    config_away_timeout = changes["away_timeout"] if changes["away_timeout"] is not None else 5
+                    AWAY_TIMEOUT = config_away_timeout * 60
+                    tracker.away_timeout = AWAY_TIMEOUT
+                if "breaks" in changes:
+                    break_times = changes["breaks"] or []
+                if "work_start" in changes:
+                    work_start = changes["work_start"] or ""
+                if "work_end" in changes:
+                    work_end = changes["work_end"] or ""
+                if "overtime" in changes:
+                    overtime = changes["overtime"] or []
+                print(f"[Config] Camera {cam_idx} applied version {update['version']}: {', '.join(changes)}")
+        if profiler is not None:
+            profiler.poll()
+        t_read_start = time.time()
+        t_loop = time.perf_counter()
+        if not cap.grab():
+            if not is_live_source(VIDEO_SOURCE):
+                break
+            # Stream putus: coba reconnect di worker dulu sebelum supervisor restart proses
+            cap = reconnect_stream(cap, VIDEO_SOURCE, cam_idx, supervisor_config["reconnect_attempts"],
+                                   supervisor_config["reconnect_delay"], heartbeat, stop_event)
+            if cap is None:
+                stream_lost = True
+                break
+            metrics.inc("reconnects")
+            continue
+        clock.update(cap)
+        low_power = power is not None and power.update(clock.now())
+        if ((budget is not None and not budget.should_infer(clock.time())) or
+                (low_power and not power.should_infer(clock.time()))):
+            # Di luar jatah inference: frame di-grab saja (tanpa decode penuh) supaya stream tetap terkuras
+            if power is not None and power.record_skipped:
+                ret, frame = cap.retrieve()
+                if ret:
+                    recorder.write(cv2.resize(frame, (640, 360)), clock.time())
+            metrics.inc("frames_skipped")
+            continue
+        ret, frame = cap.retrieve()
         if not ret:
             break
+        # Latency trace: timestamp tiap tahap ikut dikirim bersama frame
+        frame_meta = {"seq": frame_count + 1, "t_read_start": t_read_start, "t_capture": time.time()}
+        t_stage = time.perf_counter()
+        metrics.observe("capture", t_stage - t_loop)
         frame = cv2.resize(frame, (640, 360))
+        metrics.observe("resize", time.perf_counter() - t_stage)
         frame_count += 1
-        current_time = time.time()
-        now_dt = datetime.now()
+        wall_time = time.time()
+        current_time = clock.time()
+        now_dt = clock.now()
+        event_time = now_dt if clock.replay else None
+        if last_summary_update is None:
+            last_summary_update = current_time
+        if current_day is None:
+            current_day = now_dt.date()
+        elif now_dt.date() != current_day:
+            # Tutup hari sebelumnya, lalu mulai state tracking baru supaya tidak tumbuh berhari-hari
+            save_hourly_summary_to_db(db_manager, cam_idx, tracker, metrics, last_frame_dt)
+            tracker.reset_day()
+            last_summary_update = current_time
+            current_day = now_dt.date()
+            print(f"[Tracker] Camera {cam_idx} state reset for {current_day}")
+        last_frame_dt = now_dt
         break_active = is_break_time(now_dt, break_times)
         work_active = is_work_time(now_dt, work_start, work_end, overtime)
 
         if frame_count % 10 == 0:
-            elapsed = current_time - fps_timer
+            elapsed = wall_time - fps_timer
             if elapsed > 0:
                 fps_display = 10 / elapsed
-            fps_timer = current_time
-
-        draw_zones(frame, WORKSTATION_ZONES, worker_data, zone_ownership, format_time, AWAY_TIMEOUT)
-        results = model.track(frame, conf=0.4, persist=True, verbose=False)
-        active_persons = set()
-
-        for result in results:
-            if not hasattr(result, "keypoints") or result.boxes.id is None:
-                continue
-            track_ids = result.boxes.id.int().cpu().tolist()
-            for idx, track_id in enumerate(track_ids):
-                keypoints = result.keypoints.xy[idx].cpu().numpy()
-                visibility = result.keypoints.conf[idx].cpu().numpy()
-                
-                # Draw keypoints and skeleton
-                for i, (x, y) in enumerate(keypoints):
-                    if visibility[i] > 0.5:
-                        cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
-                skeleton_pairs = [
-                    (0, 5), (0, 6), (5, 7), (7, 9), (6, 8), (8, 10), (5, 6), (5, 11), (6, 12), (11, 12)
-                ]
-                for a, b in skeleton_pairs:
-                    if visibility[a] > 0.5 and visibility[b] > 0.5:
-                        pt1 = tuple(map(int, keypoints[a]))
-                        pt2 = tuple(map(int, keypoints[b]))
-                        cv2.line(frame, pt1, pt2, (255, 0, 0), 2)
-                
-                if not is_valid_detection(visibility, HEAD_KEYPOINT, VISIBILITY_THRESHOLD):
-                    continue
-                center = get_person_center(keypoints, visibility, HEAD_KEYPOINT, SHOULDER_KEYPOINTS, HIP_KEYPOINTS, VISIBILITY_THRESHOLD)
-                
-                if track_id in track_to_person:
-                    person_id = track_to_person[track_id]
-                else:
-                    zone_id = find_zone_by_position(center, WORKSTATION_ZONES)
-                    if zone_id is None:
-                        continue
-                    if zone_id in zone_ownership:
-                        person_id = zone_ownership[zone_id]
-                    else:
-                        person_id = next_person_id
-                        next_person_id += 1
-                        zone_ownership[zone_id] = person_id
-                        person_to_zone[person_id] = zone_id
-                    track_to_person[track_id] = person_id
-
-                active_persons.add(person_id)
-                if person_id not in worker_data:
-                    zone_id = person_to_zone.get(person_id)
-                    worker_data[person_id] = {
-                        "last_pose": keypoints,
-                        "last_visibility": visibility,
-                        "last_update": current_time,
-                        "last_activity_time": current_time,
-                        "last_seen": current_time,
-                        "working_time": 0,
-                        "idle_time": 0,
-                        "away_time": 0,
-                        "status": "working",
-                        "last_activity_score": 0,
-                        "center": center,
-                        "zone_id": zone_id,
-                        "track_ids": {track_id},
-                        "previous_status": "working",
-                        "status_change_time": current_time,
-                        
-                        # Enhanced fields for sequential logging
-                        "in_zone_start_time": current_time,
-                        "left_zone_logged": False,
-                        "returned_zone_logged": False,
-                        "was_in_zone": True,
-                        "consecutive_in_zone_time": 0,
-                        "can_log_return": False,
-                        "last_left_log_time": None,
-                    }
-                else:
-                    worker_data[person_id]["track_ids"].add(track_id)
-                
-                data = worker_data[person_id]
-                data["last_seen"] = current_time
-                zone_id = person_to_zone.get(person_id)
-                zone_name = WORKSTATION_ZONES.get(zone_id, [None, None, None, None, f"Zone {zone_id}"])[4]
-                in_zone = is_in_zone(center, zone_id, WORKSTATION_ZONES)
-                activity_score = calculate_activity_score(
-                    keypoints, 
-                    data["last_pose"],
-                    visibility,
-                    data["last_visibility"],
-                    HAND_KEYPOINTS,
-                    SHOULDER_KEYPOINTS,
-                    VISIBILITY_THRESHOLD
-                )
-                time_delta = current_time - data["last_update"]
-                
-                if work_active and not break_active:
-                    if not in_zone:
-                        # Person keluar zona
-                        if data["status"] != "away":
-                            # Baru mulai away
-                            data["status"] = "away"
-                            # JANGAN reset flags jika sudah pernah log "Left Zone"
-                            if not data["left_zone_logged"]:
-                                data["left_zone_logged"] = False
-                                data["returned_zone_logged"] = False
-                                data["can_log_return"] = False
-                            data["was_in_zone"] = False
-                            # Reset in-zone tracking
-                            data["in_zone_start_time"] = None
-                            data["consecutive_in_zone_time"] = 0
-                        
-                        data["away_time"] += time_delta
-                        
-                    else:  # Person dalam zona
-                        # Reset status away jika masuk zona
-                        if data["status"] == "away":
-                            data["status"] = "working"
-                        
-                        # Update in-zone tracking
-                        if data["in_zone_start_time"] is None:
-                            # Baru masuk zona, mulai tracking
-                            data["in_zone_start_time"] = current_time
-                            data["consecutive_in_zone_time"] = 0
-                            data["was_in_zone"] = True
-                            
-                            # Cek apakah sudah pernah log "Left Zone" sebelumnya
-                            if data["left_zone_logged"] and not data["returned_zone_logged"]:
-                                data["can_log_return"] = True
-                        else:
-                            # Masih dalam zona, tambah waktu consecutive
-                            data["consecutive_in_zone_time"] = current_time - data["in_zone_start_time"]
-                        
-                        # Update status berdasarkan aktivitas
-                        if activity_score > ACTIVITY_THRESHOLD:
-                            data["status"] = "working"
-                            data["working_time"] += time_delta
-                            data["last_activity_time"] = current_time
-                        else:
-                            if current_time - data["last_activity_time"] > IDLE_TIMEOUT:
-                                data["status"] = "idle"
-                                data["idle_time"] += time_delta
-                            else:
-                                data["status"] = "working"
-                                data["working_time"] += time_delta
-                        
-                        # Log "Returned to Zone" 
-                        can_log_conditions = [
-                            not data["returned_zone_logged"],  # Belum pernah log return
-                            data["can_log_return"],            # Sudah pernah log "Left Zone"
-                            data["consecutive_in_zone_time"] >= LOG_RETURN_THRESHOLD,  # Sudah stabil 15 detik
-                            data["status"] in ["working", "idle"]  # Status working/idle
-                        ]
-                        
-                        if all(can_log_conditions):
-                            log_activity_to_db(
-                                db_manager, cam_idx, zone_name, "Returned to Zone", 
-                                "away → working", current_time
-                            )
-                            data["returned_zone_logged"] = True
-                            data["can_log_return"] = False  # Reset permission
-                            stable_seconds = data["consecutive_in_zone_time"]
-                            print(f"[LOG] {zone_name}: Returned to Zone after {stable_seconds:.1f}s stable in zone")
-
-                data["last_pose"] = keypoints
-                data["last_visibility"] = visibility
-                data["last_update"] = current_time
-                data["center"] = center
-
-        # Handle persons not currently detected
-        current_time = time.time()
-        for person_id, data in worker_data.items():
-            if person_id not in active_persons:
-                # Reset in-zone tracking saat tidak terdeteksi
-                data["in_zone_start_time"] = None
-                data["consecutive_in_zone_time"] = 0
-                
-                # Gunakan AWAY_TIMEOUT untuk menentukan kapan log "Left Zone"
-                if current_time - data["last_seen"] > AWAY_TIMEOUT:
-                    if data["status"] != "away":
-                        # Person sudah tidak terdeteksi lebih dari AWAY_TIMEOUT
-                        data["status"] = "away"
-                        data["was_in_zone"] = False
-                    
-                    data["away_time"] += current_time - data["last_update"]
-                    
-                    # Log "Left Zone" LANGSUNG setelah AWAY_TIMEOUT terlewati
-                    if not data["left_zone_logged"]:
-                        zone_id = person_to_zone.get(person_id)
-                        zone_name = WORKSTATION_ZONES.get(zone_id, [None, None, None, None, f"Zone {zone_id}"])[4]
-                        log_activity_to_db(
-                            db_manager, cam_idx, zone_name, "Left Zone", 
-                            "working → away", current_time
-                        )
-                        data["left_zone_logged"] = True
-                        data["can_log_return"] = True  # PENTING: Izinkan log return
-                        data["returned_zone_logged"] = False  # Reset returned flag
-                        data["last_left_log_time"] = current_time  # Track waktu log
-                        away_minutes = (current_time - data["last_seen"]) / 60
-                        print(f"[LOG] {zone_name}: Left Zone after {away_minutes:.1f} minutes away")
-                
-                data["last_update"] = current_time
+            fps_timer = wall_time
+
+        t_stage = time.perf_counter()
+        draw_zones(frame, WORKSTATION_ZONES, tracker.worker_data, tracker.zone_ownership, format_time, AWAY_TIMEOUT, current_time)
+        draw_seconds = time.perf_counter() - t_stage
+        t_stage = time.perf_counter()
+        results = model.track(frame)
+        frame_meta["t_inferred"] = time.time()
+        inference_seconds = time.perf_counter() - t_stage
+        metrics.observe("inference", inference_seconds)
+        t_tracking = time.perf_counter()
+        detections = extract_detections(results)
+        if frame_count == 1:
+            startup_phases.append(("first_frame", time.perf_counter() - t_phase))
+            startup_seconds = time.perf_counter() - t_startup + IMPORT_SECONDS
+            phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in startup_phases)
+            print(f"[Startup] Camera {cam_idx} ready in {startup_seconds:.2f}s ({phases})")
+            metrics.set_gauge("startup_seconds", round(startup_seconds, 3))
+        if cache_writer is not None:
+            cache_writer.add(current_time, detections)
+
+        # Draw keypoints and skeleton
+        t_stage = time.perf_counter()
+        for track_id, keypoints, visibility in detections:
+            draw_skeleton(frame, keypoints, visibility)
+        skeleton_seconds = time.perf_counter() - t_stage
+        draw_seconds += skeleton_seconds
+
+        events = tracker.update(detections, current_time, work_active, break_active)
+        db_seconds = 0.0
+        for event in events:
+            clip_path = recorder.trigger(event["event"], current_time)
+            # Sudah diobservasi sebagai "db", jangan ikut dihitung ke "tracking"
+            t_db = time.perf_counter()
+            log_activity_to_db(
+                db_manager, cam_idx, event["zone_name"], event["event"],
+                event["status_change"], event["timestamp"], metrics, event_time, clip_path
+            )
+            db_seconds += time.perf_counter() - t_db
+            print(event["message"])
+        if publisher is not None:
+            publisher.update(tracker, current_time, events)
+
+        if budget is not None:
+            budget.report(current_time, len(detections), tracker.pending_transitions(current_time), inference_seconds)
+
+        t_stage = time.perf_counter()
+        metrics.observe("tracking", t_stage - t_tracking - skeleton_seconds - db_seconds)
 
         # Display info
-        total_workers = len(worker_data)
+        total_workers = len(tracker.worker_data)
 
         overlay = frame.copy()
         overlay_width = frame.shape[1] // 2
@@ -528,7 +710,7 @@ def run_tracking(cam_idx, VIDEO_SOURCE, WORKSTATION_ZONES, break_times, work_sta
                      (0, 0, 0), -1)
         cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
         
-        now_dt = datetime.now()
+        now_dt = clock.now()
         timestamp_str = now_dt.strftime("%H:%M:%S")
         x_pos = 10
         
@@ -538,31 +720,91 @@ def run_tracking(cam_idx, VIDEO_SOURCE, WORKSTATION_ZONES, break_times, work_sta
                    (x_pos, 75), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 2)
         cv2.putText(frame, f"FPS: {fps_display:.2f} | Away Timeout: {config_away_timeout}m", 
                    (x_pos, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 2)
+        if low_power:
+            cv2.putText(frame, "LOW POWER", 
+                       (x_pos, 125), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,165,255), 2)
+        draw_seconds += time.perf_counter() - t_stage
+        metrics.observe("draw", draw_seconds)
         
-        out.write(frame)
+        t_stage = time.perf_counter()
+        if power is None or power.record_processed:
+            recorder.write(frame, current_time)
+        metrics.observe("recording", time.perf_counter() - t_stage)
 
         # Save summary every 5 minutes
-        if time.time() - last_summary_update > SUMMARY_UPDATE_INTERVAL:
-            save_hourly_summary_to_db(db_manager, cam_idx, WORKSTATION_ZONES, zone_ownership, worker_data)
-            last_summary_update = time.time()
+        if clock.time() - last_summary_update > SUMMARY_UPDATE_INTERVAL:
+            save_hourly_summary_to_db(db_manager, cam_idx, tracker, metrics, clock.now())
+            last_summary_update = clock.time()
+
+        if checkpoint_file is not None and wall_time - last_checkpoint >= checkpoint_config["interval"]:
+            t_stage = time.perf_counter()
+            try:
+                save_checkpoint(checkpoint_file, cam_idx, tracker, current_time, current_day)
+            except OSError as e:
+                print(f"[Checkpoint] Camera {cam_idx} failed to write {checkpoint_file}: {e}")
+            metrics.observe("checkpoint", time.perf_counter() - t_stage)
+            last_checkpoint = wall_time
 
         # Send frame to queue (non-blocking)
+        t_stage = time.perf_counter()
+        stream_mode = stream_modes[cam_idx - 1] if stream_modes is not None else STREAM_FULL
+        if stream_mode == STREAM_MOSAIC:
+            # Mosaic cukup beberapa frame per detik
+            if wall_time - last_stream_put < 1.0 / MOSAIC_FPS:
+                stream_mode = STREAM_PAUSED
         try:
-            if not frame_queue.full():
+            if frame_queue is not None and stream_mode != STREAM_PAUSED and not frame_queue.full():
                 if frame is not None and frame.shape == (360, 640, 3):
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    frame_queue.put((cam_idx, frame_rgb), block=False)
+                    last_stream_put = wall_time
+                    if stream_mode in (STREAM_TILE, STREAM_MOSAIC):
+                        frame_rgb = cv2.cvtColor(cv2.resize(frame, TILE_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+                    else:
+                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    frame_meta["t_queue_put"] = time.time()
+                    frame_queue.put((cam_idx, frame_rgb, frame_meta), block=False)
                 else:
                     print(f"[WARNING] Frame shape invalid: {frame.shape if frame is not None else None}")
         except Exception as e:
             print(f"[ERROR] Queue put error: {e}")
-
-    cap.release()
-    out.release()
+        metrics.observe("queue_put", time.perf_counter() - t_stage)
+
+        metrics.observe("loop", time.perf_counter() - t_loop)
+        metrics.inc("frames")
+        metrics.set_gauge("fps", round(fps_display, 2))
+        metrics.set_gauge("workers", total_workers)
+        if publisher is not None:
+            metrics.set_gauge("events_dropped", publisher.dropped)
+        if frame_count % 100 == 0:
+            for name, value in tracker.state_size().items():
+                metrics.set_gauge(f"state_{name}", value)
+            metrics.set_gauge("memory_rss_bytes", process_rss_bytes())
+        if power is not None:
+            metrics.set_gauge("low_power", int(low_power))
+            metrics.set_gauge("cpu_hours_saved_today", round(power.saved_cpu_hours, 3))
+        if budget is not None:
+            metrics.set_gauge("target_fps", round(budget.target_fps, 2))
+            metrics.set_gauge("effective_fps", round(budget.effective_fps, 2))
+        metrics.maybe_flush(wall_time)
+
+    if cap is not None:
+        cap.release()
+    recorder.close()
+    if cache_writer is not None:
+        cache_writer.close()
+    metrics.flush()
+    if profiler is not None and profiler.profiler is not None:
+        profiler.stop_profile()
     
     # Final summary save before closing
-    save_hourly_summary_to_db(db_manager, cam_idx, WORKSTATION_ZONES, zone_ownership, worker_data)
+    save_hourly_summary_to_db(db_manager, cam_idx, tracker, now=clock.now())
+    if checkpoint_file is not None and last_frame_dt is not None:
+        try:
+            save_checkpoint(checkpoint_file, cam_idx, tracker, clock.time(), last_frame_dt.date())
+        except OSError as e:
+            print(f"[Checkpoint] Camera {cam_idx} failed to write {checkpoint_file}: {e}")
     db_manager.close()
+    if publisher is not None:
+        publisher.publish("camera", state="lost" if stream_lost else "stopped")
     
     # Print summary
     print(f"\nCamera {cam_idx} Summary:")
@@ -570,59 +812,85 @@ def run_tracking(cam_idx, VIDEO_SOURCE, WORKSTATION_ZONES, break_times, work_sta
     print(f"Log Return Threshold: {LOG_RETURN_THRESHOLD} seconds")
     print(f"Total Worker : {total_workers}")
     print(f"Total Zone   : {len(WORKSTATION_ZONES)}")
-    for zone_id, zone_data in WORKSTATION_ZONES.items():
-        zone_name = zone_data[4] if len(zone_data) > 4 else f"Zone {zone_id}"
-        person_id = zone_ownership.get(zone_id)
-        if person_id and person_id in worker_data:
-            w = worker_data[person_id]
-            print(f"Zone {zone_name}:")
-            print(f"  Working Time: {format_time(w['working_time'])}")
-            print(f"  Idle Time   : {format_time(w['idle_time'])}")
-            print(f"  Away Time   : {format_time(w['away_time'])}")
-        else:
-            print(f"Zone {zone_name}:")
-            print(f"  Working Time: 0s")
-            print(f"  Idle Time   : 0s")
-            print(f"  Away Time   : 0s")
+    if tracker.downtime:
+        print(f"Downtime     : {format_time(tracker.downtime)}")
+    if power is not None:
+        print(power.report())
+    for zone_name, w in tracker.zone_totals().items():
+        print(f"Zone {zone_name}:")
+        print(f"  Working Time: {format_time(w['working_time'])}")
+        print(f"  Idle Time   : {format_time(w['idle_time'])}")
+        print(f"  Away Time   : {format_time(w['away_time'])}")
     print("="*60)
+    return not stream_lost
      
-def terminate_all(jobs):
-    for p in jobs:
-        if p.is_alive():
-            p.terminate()
-            p.join()
-
 # =========================
 # Multiprocessing Main
 # =========================
 
 if __name__ == "__main__":
+    config = load_config()
     VIDEO_SOURCES = config["video_sources"]
     frame_queue = multiprocessing.Queue(maxsize=30)
-    jobs = []
-    server_thread = threading.Thread(target=frame_server, args=(frame_queue,), daemon=True)
+    stream_modes = multiprocessing.Array('i', [STREAM_PAUSED] * len(VIDEO_SOURCES))
+    mosaic = None
+    if config.get("mosaic", {}).get("enabled"):
+        from mosaic import MosaicChannel
+        mosaic = MosaicChannel(len(VIDEO_SOURCES), config["mosaic"])
+        mosaic.start()
+    server_thread = threading.Thread(target=frame_server, args=(frame_queue,), kwargs={"stream_modes": stream_modes, "mosaic": mosaic}, daemon=True)
     server_thread.start()
+    metrics_config = config.get("metrics", {})
+    if metrics_config.get("http_port"):
+        metrics_server(metrics_config["http_port"], metrics_config.get("dir", "metrics"), metrics_config.get("host", "localhost"))
     
+    # Export model (ONNX/OpenVINO) sekali sebelum worker kamera start
+    export_model(config.get("inference"))
+    cpu_config = config.get("cpu", {})
+    cpu_plan = plan_cpu(len(VIDEO_SOURCES), cpu_config) if cpu_config.get("enabled") else None
+    budget = None
+    if config.get("budget", {}).get("enabled"):
+        budget = InferenceBudget(len(VIDEO_SOURCES), config["budget"], [c.get("priority", 1.0) for _, c in VIDEO_SOURCES])
+        budget.start()
+    # Perubahan status di-push ke dashboard lewat SSE (lihat events.py)
+    events = None
+    if config.get("events", {}).get("enabled"):
+        events = EventHub(config["events"])
+        events.start()
+    # Dashboard membaca summary/log lewat API ber-cache, bukan query langsung (lihat readapi.py)
+    if config.get("read_api", {}).get("enabled"):
+        from readapi import ReadAPI
+        ReadAPI(config["read_api"]).start()
+    # Potong clip dari rekaman ter-index untuk click-to-play (lihat clips.py)
+    if config.get("clips", {}).get("enabled"):
+        from clips import clip_server
+        clip_server(config["clips"].get("port", 9500), config.get("recording", {}).get("dir", "recordings"),
+                    config["clips"].get("host", "localhost"))
+
+    def build_camera(idx, src, cam_config):
+        return camera_worker_spec(idx, src, cam_config, frame_queue, stream_modes, cpu_plan, budget, events)
+
+    cameras = []
     for idx, (src, cam_config) in enumerate(VIDEO_SOURCES, start=1):
-        zones = cam_config.get("zones", {})
-        breaks = cam_config.get("breaks", [])
-        work_start = cam_config.get("work_start", "")
-        work_end = cam_config.get("work_end", "")
-        overtime = cam_config.get("overtime", [])
-        
-        p = multiprocessing.Process(target=run_tracking, args=(idx, src, zones, breaks, work_start, work_end, overtime, frame_queue))
-        p.start()
-        jobs.append(p)
+        args, kwargs = build_camera(idx, src, cam_config)
+        kwargs["config_updates"] = multiprocessing.Queue()
+        cameras.append((args, kwargs))
+    # Satu proses per kamera, di-restart sendiri-sendiri oleh supervisor
+    supervisor = CameraSupervisor(run_tracking, cameras, config.get("supervisor"), metrics_config.get("dir", "metrics"))
+    supervisor.start()
+    # Perubahan zona/jadwal di config.json diteruskan ke worker tanpa restart
+    ConfigWatcher(supervisor, build_camera, config).start()
+    if cpu_plan:
+        apply_cpu_plan(cpu_plan["launcher"], "Launcher")
 
     def signal_handler(sig, frame):
-        print("Ctrl+C detected, terminating all processes...")
-        terminate_all(jobs)
+        print("Ctrl+C detected, stopping all cameras...")
+        supervisor.stop()
         exit(0)
 
     signal.signal(signal.SIGINT, signal_handler)
 
     try:
-        for p in jobs:
-            p.join()
+        supervisor.wait()
     except KeyboardInterrupt:
-        terminate_all(jobs)
\ No newline at end of file
+        supervisor.stop()
@@ -0,0 +1,155 @@
+import os
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bucket histogram dalam detik (cumulative, gaya Prometheus)
+STAGE_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+class StageMetrics:
+    """Per-camera stage histograms and gauges, flushed to a Prometheus text file"""
+
+    def __init__(self, cam_idx, metrics_dir="metrics", flush_interval=5, buckets=STAGE_BUCKETS):
+        self.cam_idx = cam_idx
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.buckets = list(buckets)
+        self.histograms = {}  # stage -> [bucket counts..., +Inf count, sum]
+        self.gauges = {}
+        self.counters = {}
+        self.last_flush = time.time()
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+
+    def observe(self, stage, seconds):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = [0] * (len(self.buckets) + 2)
+        hist[bisect.bisect_left(self.buckets, seconds)] += 1
+        hist[-1] += seconds
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def inc(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def render(self):
+        cam = f'camera="{self.cam_idx}"'
+        lines = [
+            "# HELP tracking_stage_seconds Time spent per pipeline stage",
+            "# TYPE tracking_stage_seconds histogram",
+        ]
+        for stage, hist in sorted(self.histograms.items()):
+            labels = f'{cam},stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, hist):
+                cumulative += count
+                lines.append(f'tracking_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += hist[len(self.buckets)]
+            lines.append(f'tracking_stage_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"tracking_stage_seconds_sum{{{labels}}} {hist[-1]:.6f}")
+            lines.append(f"tracking_stage_seconds_count{{{labels}}} {cumulative}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE tracking_{name}_total counter")
+            lines.append(f"tracking_{name}_total{{{cam}}} {value}")
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f"# TYPE tracking_{name} gauge")
+            lines.append(f"tracking_{name}{{{cam}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def maybe_flush(self, now=None):
+        now = now or time.time()
+        if now - self.last_flush >= self.flush_interval:
+            self.flush()
+            self.last_flush = now
+
+    def flush(self):
+        """Write metrics atomically so the endpoint never reads a half file"""
+        if not self.metrics_dir:
+            return
+        path = os.path.join(self.metrics_dir, f"cam{self.cam_idx}.prom")
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[Metrics] Failed to write {path}: {e}")
+
+
+def process_rss_bytes():
+    """Current resident memory of this process (Linux /proc, else psutil if installed, else peak RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+def collect_metrics(metrics_dir="metrics"):
+    """Merge per-camera metric files, grouping samples by metric family"""
+    families = {}
+    order = []
+    if not os.path.isdir(metrics_dir):
+        return ""
+    for filename in sorted(os.listdir(metrics_dir)):
+        if not filename.endswith(".prom"):
+            continue
+        try:
+            with open(os.path.join(metrics_dir, filename)) as f:
+                content = f.read()
+        except OSError:
+            continue
+        family = None
+        for line in content.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                family = line.split()[2]
+                if family not in families:
+                    families[family] = {"headers": [], "samples": []}
+                    order.append(family)
+                if line not in families[family]["headers"]:
+                    families[family]["headers"].append(line)
+            elif line and family is not None:
+                families[family]["samples"].append(line)
+    lines = []
+    for family in order:
+        lines.extend(families[family]["headers"])
+        lines.extend(families[family]["samples"])
+    return "\n".join(lines) + "\n"
+
+
+def metrics_server(port=9100, metrics_dir="metrics", host="localhost"):
+    """Serve merged camera metrics at /metrics in Prometheus text format"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = collect_metrics(metrics_dir).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"[Metrics] Serving http://{host}:{port}/metrics from {metrics_dir}/")
+    return httpd
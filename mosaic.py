@@ -0,0 +1,186 @@
+import cv2
+import numpy as np
+import math
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MosaicChannel:
+    """Tile latest frames of all cameras into one low-rate stream, encoded once per tick"""
+
+    def __init__(self, num_cameras, mosaic_config=None):
+        mosaic_config = mosaic_config or {}
+        self.num_cameras = num_cameras
+        self.fps = mosaic_config.get("fps", 2)
+        self.tile_width = mosaic_config.get("tile_width", 320)
+        self.tile_height = mosaic_config.get("tile_height", 180)
+        self.cols = mosaic_config.get("cols") or max(1, math.ceil(math.sqrt(num_cameras)))
+        self.rows = max(1, math.ceil(num_cameras / self.cols))
+        self.host = mosaic_config.get("host", "localhost")
+        self.http_port = mosaic_config.get("http_port", 8081)
+        self.jpeg_quality = mosaic_config.get("jpeg_quality", 70)
+        self.stale_after = mosaic_config.get("stale_after", 5)
+
+        self.latest = {}  # cam_idx -> (timestamp, frame_rgb)
+        self.lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.jpeg = None
+        self.seq = 0
+        self.viewers = 0
+        self.last_snapshot_request = 0
+        self.on_demand_change = None  # Dipasang oleh frame_server
+        self._demand_active = False
+        self._demand_lock = threading.Lock()  # Dipanggil dari thread run dan thread handler HTTP
+        self.httpd = None
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        self.httpd = ThreadingHTTPServer((self.host, self.http_port), make_mosaic_handler(self))
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"[Mosaic] Serving MJPEG on http://{self.host}:{self.http_port}/mosaic.mjpg ({self.fps} fps)")
+
+    def update(self, cam_idx, frame_rgb):
+        """Store the latest frame of a camera (called by frame_server)"""
+        with self.lock:
+            self.latest[cam_idx] = (time.time(), frame_rgb)
+
+    def has_demand(self):
+        return self.viewers > 0 or time.time() - self.last_snapshot_request < 10
+
+    def _update_demand(self):
+        with self._demand_lock:
+            active = self.has_demand()
+            if active != self._demand_active:
+                self._demand_active = active
+                if self.on_demand_change is not None:
+                    self.on_demand_change(active)
+
+    def add_viewer(self):
+        with self.cond:
+            self.viewers += 1
+        self._update_demand()
+
+    def remove_viewer(self):
+        with self.cond:
+            self.viewers -= 1
+        self._update_demand()
+
+    def compose(self):
+        tw, th = self.tile_width, self.tile_height
+        mosaic = np.zeros((self.rows * th, self.cols * tw, 3), dtype=np.uint8)
+        now = time.time()
+        with self.lock:
+            latest = dict(self.latest)
+        for i in range(self.num_cameras):
+            cam_idx = i + 1
+            x = (i % self.cols) * tw
+            y = (i // self.cols) * th
+            entry = latest.get(cam_idx)
+            if entry is not None and now - entry[0] <= self.stale_after:
+                frame = entry[1]
+                if frame.shape[1] != tw or frame.shape[0] != th:
+                    frame = cv2.resize(frame, (tw, th), interpolation=cv2.INTER_AREA)
+                mosaic[y:y + th, x:x + tw] = frame
+            else:
+                cv2.putText(mosaic, "No signal", (x + tw // 2 - 50, y + th // 2),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (128, 128, 128), 1)
+            cv2.putText(mosaic, f"Cam {cam_idx}", (x + 5, y + 18),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+        return mosaic
+
+    def encode(self):
+        mosaic = self.compose()
+        ok, buf = cv2.imencode(".jpg", cv2.cvtColor(mosaic, cv2.COLOR_RGB2BGR),
+                               [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return
+        with self.cond:
+            self.jpeg = buf.tobytes()
+            self.seq += 1
+            self.cond.notify_all()
+
+    def run(self):
+        interval = 1.0 / self.fps
+        next_tick = time.time()
+        while True:
+            self._update_demand()
+            if self.has_demand():
+                try:
+                    self.encode()
+                except Exception as e:
+                    print(f"[Mosaic] Encode error: {e}")
+            next_tick += interval
+            time.sleep(max(0, next_tick - time.time()))
+            if time.time() - next_tick > interval:
+                next_tick = time.time()  # Tertinggal jauh, jangan kejar
+
+    def wait_frame(self, last_seq, timeout=5):
+        # Sebelum encode pertama jpeg masih None: tunggu, jangan langsung kembali
+        with self.cond:
+            self.cond.wait_for(lambda: self.jpeg is not None and self.seq != last_seq, timeout=timeout)
+            return self.jpeg, self.seq
+
+    def snapshot(self):
+        self.last_snapshot_request = time.time()
+        self._update_demand()
+        if self.jpeg is None:
+            self.encode()
+        return self.jpeg
+
+
+def make_mosaic_handler(channel):
+    class MosaicHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/mosaic.mjpg":
+                self.stream_mjpeg()
+            elif path == "/mosaic.jpg":
+                jpeg = channel.snapshot()
+                if jpeg is None:
+                    # Belum ada frame kamera sama sekali (encode gagal / semua kamera belum mulai)
+                    self.send_error(503, "No camera frames yet")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(jpeg)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(jpeg)
+            elif path == "/":
+                body = b"<html><body style='margin:0;background:#000'><img src='/mosaic.mjpg' style='width:100%'></body></html>"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_error(404)
+
+        def stream_mjpeg(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            channel.add_viewer()
+            try:
+                last_seq = -1
+                while True:
+                    jpeg, seq = channel.wait_frame(last_seq)
+                    if jpeg is None or seq == last_seq:
+                        continue
+                    self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                    self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+                    last_seq = seq
+            except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                pass
+            finally:
+                channel.remove_viewer()
+
+        def log_message(self, format, *args):
+            pass
+
+    return MosaicHandler
@@ -0,0 +1,186 @@
+import os
+import sys
+import io
+import time
+import socket
+import queue
+import signal
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+
+
+class ProfileController:
+    """Local control socket that starts/stops cProfile and tracemalloc inside a camera worker"""
+
+    def __init__(self, cam_idx, base_port=9200, output_dir="profiles", host="localhost"):
+        self.cam_idx = cam_idx
+        self.port = base_port + cam_idx
+        self.host = host
+        self.output_dir = output_dir
+        self.profiler = None
+        self.profile_started = None
+        self.profile_deadline = None
+        # SimpleQueue, bukan list + lock: put() aman dipanggil dari thread socket mana pun
+        self.pending = queue.SimpleQueue()  # (command, args, reply dict, done event)
+        self.toggle_requested = False
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        threading.Thread(target=self.serve, daemon=True).start()
+        # SIGUSR1 toggle profile (hanya POSIX). Handler jalan di thread kamera di tengah poll(),
+        # jadi cukup set flag; poll() yang menjalankan toggle
+        if hasattr(signal, "SIGUSR1"):
+            try:
+                signal.signal(signal.SIGUSR1, lambda sig, frame: setattr(self, "toggle_requested", True))
+            except ValueError:
+                pass
+        print(f"[Profiler] Camera {self.cam_idx} control on {self.host}:{self.port}")
+
+    def serve(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server_socket.bind((self.host, self.port))
+        except OSError as e:
+            print(f"[Profiler] Camera {self.cam_idx} cannot bind {self.port}: {e}")
+            return
+        server_socket.listen(1)
+        while True:
+            conn, _ = server_socket.accept()
+            try:
+                line = conn.makefile("r").readline().strip()
+                parts = line.split()
+                if not parts:
+                    reply = "ERROR empty command"
+                else:
+                    reply = self.submit(parts[0], parts[1:], wait=10)
+                conn.sendall((reply + "\n").encode("utf-8"))
+            except Exception as e:
+                print(f"[Profiler] Control error: {e}")
+            finally:
+                conn.close()
+
+    def submit(self, command, args, wait=None):
+        """Queue a command for the tracking thread; optionally wait for its reply"""
+        reply = {}
+        done = threading.Event()
+        self.pending.put((command, args, reply, done))
+        if wait is None:
+            return None
+        if not done.wait(wait):
+            return "ERROR camera loop did not respond (stalled?)"
+        return reply.get("text", "OK")
+
+    def poll(self):
+        """Run queued commands; called once per frame from run_tracking"""
+        # cProfile hanya merekam thread yang memanggil enable(), jadi eksekusi di sini
+        if self.profile_deadline is not None and time.time() >= self.profile_deadline:
+            self.stop_profile()
+        if self.toggle_requested:
+            self.toggle_requested = False
+            print(f"[Profiler] Camera {self.cam_idx} SIGUSR1: {self.execute('profile', ['toggle'])}")
+        while not self.pending.empty():
+            command, args, reply, done = self.pending.get()
+            try:
+                reply["text"] = self.execute(command, args)
+            except Exception as e:
+                reply["text"] = f"ERROR {e}"
+            done.set()
+
+    def execute(self, command, args):
+        action = args[0] if args else ""
+        if command == "profile":
+            if action == "toggle":
+                action = "stop" if self.profiler is not None else "start"
+            if action == "start":
+                duration = float(args[1]) if len(args) > 1 else None
+                return self.start_profile(duration)
+            if action == "stop":
+                return self.stop_profile()
+        elif command == "tracemalloc":
+            if action == "start":
+                frames = int(args[1]) if len(args) > 1 else 10
+                tracemalloc.start(frames)
+                return f"OK tracemalloc started ({frames} frames)"
+            if action == "snapshot":
+                return self.snapshot_memory()
+            if action == "stop":
+                tracemalloc.stop()
+                return "OK tracemalloc stopped"
+        elif command == "status":
+            profiling = "running" if self.profiler is not None else "off"
+            tracing = "running" if tracemalloc.is_tracing() else "off"
+            return f"OK camera={self.cam_idx} profile={profiling} tracemalloc={tracing}"
+        return f"ERROR unknown command: {command} {' '.join(args)}"
+
+    def output_path(self, suffix):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.output_dir, f"cam{self.cam_idx}_{stamp}{suffix}")
+
+    def start_profile(self, duration=None):
+        if self.profiler is not None:
+            return "ERROR profile already running"
+        self.profiler = cProfile.Profile()
+        self.profile_started = time.time()
+        self.profile_deadline = time.time() + duration if duration else None
+        self.profiler.enable()
+        print(f"[Profiler] Camera {self.cam_idx} profile started")
+        return "OK profile started" + (f" for {duration:.0f}s" if duration else "")
+
+    def stop_profile(self):
+        if self.profiler is None:
+            return "ERROR profile not running"
+        self.profiler.disable()
+        path = self.output_path(".prof")
+        self.profiler.dump_stats(path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(40)
+        with open(path.replace(".prof", "_profile.txt"), "w") as f:
+            f.write(f"Camera {self.cam_idx} profile, {time.time() - self.profile_started:.1f}s\n")
+            f.write(stream.getvalue())
+        self.profiler = None
+        self.profile_deadline = None
+        print(f"[Profiler] Camera {self.cam_idx} profile written to {path}")
+        return f"OK {path}"
+
+    def snapshot_memory(self):
+        if not tracemalloc.is_tracing():
+            return "ERROR tracemalloc not started"
+        snapshot = tracemalloc.take_snapshot()
+        path = self.output_path(".tracemalloc")
+        snapshot.dump(path)
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path.replace(".tracemalloc", "_memory.txt"), "w") as f:
+            f.write(f"Camera {self.cam_idx} traced memory: current={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB\n")
+            for stat in snapshot.statistics("lineno")[:30]:
+                f.write(f"{stat}\n")
+        print(f"[Profiler] Camera {self.cam_idx} memory snapshot written to {path}")
+        return f"OK {path}"
+
+
+def send_command(cam_idx, command, base_port=9200, host="localhost", timeout=15):
+    """Send one control command to a running camera worker and return its reply"""
+    with socket.create_connection((host, base_port + cam_idx), timeout=timeout) as conn:
+        conn.sendall((command + "\n").encode("utf-8"))
+        return conn.makefile("r").readline().strip()
+
+
+if __name__ == "__main__":
+    # Contoh: python profiling.py 2 profile start 30
+    #         python profiling.py 2 tracemalloc start
+    #         python profiling.py 2 tracemalloc snapshot
+    if len(sys.argv) < 3:
+        print("Usage: python profiling.py <camera> <profile start [seconds]|profile stop|tracemalloc start|tracemalloc snapshot|tracemalloc stop|status>")
+        sys.exit(1)
+    base_port = 9200
+    try:
+        import json
+        with open("config.json") as f:
+            base_port = json.load(f).get("profiling", {}).get("base_port", base_port)
+    except Exception:
+        pass
+    print(send_command(int(sys.argv[1]), " ".join(sys.argv[2:]), base_port=base_port))
@@ -0,0 +1,229 @@
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import date
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import psycopg2
+from database import DatabaseManager
+
+DEFAULT_READ_API = {
+    "enabled": False,
+    "host": "0.0.0.0",
+    "port": 9400,
+    "ttl": 60,           # Batas atas umur cache bila NOTIFY tidak sampai
+    "activity_ttl": 5,
+}
+# Payload NOTIFY "<table>:<camera>" -> jenis cache yang harus dibuang
+INVALIDATES = {"activity": ("activities",), "summary": ("summary", "totals")}
+
+
+def read_api_settings(read_api_config=None):
+    settings = dict(DEFAULT_READ_API)
+    settings.update(read_api_config or {})
+    return settings
+
+
+class Flight:
+    """One in-progress query that identical concurrent requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+        self.error = None
+
+
+class ReadAPI:
+    """HTTP read API over activity logs and summaries with a TTL cache, NOTIFY invalidation, ETags and coalescing"""
+
+    def __init__(self, read_api_config=None, db_config="db_config.json"):
+        self.settings = read_api_settings(read_api_config)
+        self.db_config = db_config
+        self.db = None  # Dibuka saat query pertama, dibuka ulang setelah koneksi putus
+        self.db_lock = threading.Lock()
+        self.entries = {}
+        self.inflight = {}
+        self.generation = {"activities": 0, "summary": 0, "totals": 0}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "not_modified": 0, "invalidations": 0}
+        self.httpd = None
+
+    # --- Queries ---
+
+    def query(self, kind, params):
+        """Rows from the database; raises on DB errors so failures are never cached as empty results"""
+        camera = int(params["camera"]) if params.get("camera") else None
+        limit = min(int(params.get("limit", 50)), 1000)
+        with self.db_lock:
+            for attempt in range(2):
+                try:
+                    if self.db is None:
+                        self.db = DatabaseManager(self.db_config)
+                    if kind == "activities":
+                        return self.db.get_recent_activities(limit, camera, strict=True)
+                    if kind == "summary":
+                        return self.db.get_summary_by_hour(camera, params.get("date"), strict=True)
+                    return self.db.get_day_totals(params.get("date") or date.today().isoformat(), camera, strict=True)
+                except (psycopg2.InterfaceError, psycopg2.OperationalError):
+                    # Postgres restart: buang koneksi lama, coba sekali lagi dengan koneksi baru
+                    self.drop_connection()
+                    if attempt:
+                        raise
+
+    def drop_connection(self):
+        if self.db is not None:
+            try:
+                self.db.close()
+            except Exception:
+                pass
+            self.db = None
+
+    def ttl(self, kind):
+        return self.settings["activity_ttl"] if kind == "activities" else self.settings["ttl"]
+
+    def get(self, kind, params):
+        """(body, etag) from cache, from an identical in-flight query, or from the database"""
+        key = (kind, tuple(sorted(params.items())))
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["expires"] > now:
+                self.stats["hits"] += 1
+                return entry
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = Flight()
+                generation = self.generation[kind]
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.entry
+
+        try:
+            rows = self.query(kind, params)
+            body = json.dumps(rows, default=str, separators=(",", ":")).encode("utf-8")
+            entry = {
+                "body": body,
+                "etag": '"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+                "expires": time.monotonic() + self.ttl(kind),
+                "camera": params.get("camera"),
+            }
+            flight.entry = entry
+            with self.lock:
+                # Write yang masuk selama query berjalan berarti hasil ini mungkin sudah basi
+                if self.generation[kind] == generation:
+                    self.entries[key] = entry
+            return entry
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, payload):
+        table, _, camera = payload.partition(":")
+        kinds = INVALIDATES.get(table, tuple(self.generation))
+        with self.lock:
+            self.stats["invalidations"] += 1
+            for kind in kinds:
+                self.generation[kind] += 1
+            for key in [k for k, e in self.entries.items()
+                        if k[0] in kinds and (not camera or e["camera"] in (None, camera))]:
+                del self.entries[key]
+
+    def listen(self):
+        """Drop cached results when workers write (Postgres LISTEN/NOTIFY); TTL covers gaps while reconnecting"""
+        while True:
+            try:
+                listener = DatabaseManager(self.db_config)
+                listener.listen_changes()
+                # Notifikasi bisa hilang selama terputus, mulai dari cache kosong
+                self.invalidate("")
+                while True:
+                    for payload in listener.wait_changes(5):
+                        self.invalidate(payload)
+            except Exception as e:
+                print(f"[ReadAPI] Change listener error: {e}, retrying in 5s")
+                time.sleep(5)
+
+    # --- HTTP ---
+
+    def start(self):
+        threading.Thread(target=self.listen, daemon=True).start()
+        api = self
+        routes = {"/api/activities": "activities", "/api/summary": "summary", "/api/totals": "totals"}
+
+        class ReadHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/api/stats":
+                    with api.lock:
+                        self.send_json(json.dumps(dict(api.stats, entries=len(api.entries))).encode("utf-8"))
+                    return
+                kind = routes.get(url.path)
+                if kind is None:
+                    self.send_error(404)
+                    return
+                params = {k: v[-1] for k, v in parse_qs(url.query).items() if k in ("camera", "date", "limit")}
+                try:
+                    entry = api.get(kind, params)
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+                except Exception as e:
+                    print(f"[ReadAPI] Query failed: {e}")
+                    self.send_error(503)
+                    return
+                if self.headers.get("If-None-Match") == entry["etag"]:
+                    with api.lock:
+                        api.stats["not_modified"] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", entry["etag"])
+                    self.end_headers()
+                    return
+                self.send_json(entry["body"], entry["etag"], api.ttl(kind))
+
+            def send_json(self, body, etag=None, max_age=0):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", f"max-age={max_age}")
+                if etag:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.settings["host"], self.settings["port"]), ReadHandler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"[ReadAPI] Serving http://{self.settings['host']}:{self.settings['port']}/api/ (activities, summary, totals)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cached HTTP read API over activity logs and summaries")
+    parser.add_argument("--port", type=int, help="Override read_api.port from config.json")
+    args = parser.parse_args()
+
+    with open("config.json") as f:
+        config = json.load(f)
+    read_api_config = dict(config.get("read_api", {}))
+    if args.port:
+        read_api_config["port"] = args.port
+    ReadAPI(read_api_config).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
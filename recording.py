@@ -0,0 +1,323 @@
+import os
+import cv2
+import shutil
+import subprocess
+from collections import deque
+from datetime import datetime
+
+DEFAULT_RECORDING = {
+    "mode": "continuous",      # continuous (semua frame ke satu mp4, perilaku lama) | events
+    "dir": "recordings",
+    "pre_roll": 20,            # Detik sebelum event yang ikut masuk clip (ring buffer di memori)
+    "post_roll": 15,           # Detik setelah event terakhir
+    "max_clip": 180,           # Clip yang terus diperpanjang event baru dipotong di sini
+    "timelapse_fps": 1,        # Frame per detik kamera yang masuk timelapse
+    "timelapse_playback_fps": 10,
+    "buffer_quality": 85,      # JPEG quality frame di ring buffer (~40KB per frame 640x360)
+    "catchup_frames": 8,       # Frame pre-roll yang ditulis per loop, supaya trigger tidak menahan loop
+    "segments": True,          # Rekaman continuous/timelapse sebagai MPEG-TS + index keyframe (butuh ffmpeg)
+    "segment_seconds": 3600,
+    "keyframe_interval": 2,    # Detik video antar keyframe = granularitas potong clips.py
+}
+RECORDING_MODES = ("continuous", "events")
+TS_PACKET = 188
+VIDEO_PID = 0x100  # PID stream video default muxer mpegts ffmpeg
+PAT_PID = 0
+RESTART_DELAY = 30  # Detik menunggu sebelum membuka ffmpeg lagi setelah ia mati
+MAX_FILL = 5.0     # Gap lebih panjang dari ini tidak diisi frame duplikat di rekaman continuous
+
+
+def recording_settings(recording_config=None):
+    settings = dict(DEFAULT_RECORDING)
+    settings.update(recording_config or {})
+    if settings["mode"] not in RECORDING_MODES:
+        raise ValueError(f"Unknown recording mode '{settings['mode']}'")
+    return settings
+
+
+def open_writer(path, fps, size):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+
+
+def ts_keyframes(data, base_offset):
+    """Byte offsets of TS packets that start a video keyframe (PUSI + random_access_indicator)"""
+    offsets = []
+    for pos in range(0, len(data) - TS_PACKET + 1, TS_PACKET):
+        if data[pos] != 0x47:
+            continue
+        b1 = data[pos + 1]
+        pid = ((b1 & 0x1F) << 8) | data[pos + 2]
+        if pid != VIDEO_PID or not b1 & 0x40:
+            continue
+        # Adaptation field ada dan flag random_access_indicator di-set
+        if data[pos + 3] & 0x20 and data[pos + 4] > 0 and data[pos + 5] & 0x40:
+            offsets.append(base_offset + pos)
+    return offsets
+
+
+def ts_payload(packet):
+    """Payload of one TS packet after the header and adaptation field"""
+    start = 4
+    if packet[3] & 0x20:
+        start += 1 + packet[4]
+    return packet[start:] if packet[3] & 0x10 else b""
+
+
+def ts_program_headers(data):
+    """First PAT packet and the PMT packet it points to, so a cut from the middle of a file is playable.
+
+    ffmpeg's muxer writes SDT, PAT, PMT at the start (and again with
+    resend_headers), so both are located by PID instead of position.
+    """
+    pat = pmt = None
+    pmt_pid = None
+    for pos in range(0, len(data) - TS_PACKET + 1, TS_PACKET):
+        packet = data[pos:pos + TS_PACKET]
+        if packet[0] != 0x47 or not packet[1] & 0x40:
+            continue
+        pid = ((packet[1] & 0x1F) << 8) | packet[2]
+        if pat is None and pid == PAT_PID:
+            payload = ts_payload(packet)
+            section = payload[1 + payload[0]:] if payload else b""
+            # Section PAT: header 8 byte, lalu entri 4 byte (program_number, PID) sampai CRC
+            end = min(len(section), 3 + (((section[1] & 0x0F) << 8) | section[2]) - 4) if len(section) >= 3 else 0
+            for i in range(8, end - 3, 4):
+                if (section[i] << 8) | section[i + 1]:  # program 0 = network PID, bukan PMT
+                    pat, pmt_pid = packet, ((section[i + 2] & 0x1F) << 8) | section[i + 3]
+                    break
+        elif pmt_pid is not None and pid == pmt_pid:
+            pmt = packet
+            return pat + pmt
+    return None
+
+
+class SegmentWriter:
+    """MPEG-TS segments encoded by ffmpeg with a sidecar index of keyframe wall time -> byte offset (see clips.py)"""
+
+    def __init__(self, directory, prefix, fps, size, keyframe_interval, segment_seconds):
+        self.directory = directory
+        self.prefix = prefix
+        self.fps = fps
+        self.size = size
+        # Keyframe dipaksa tiap gop frame (tanpa scene-cut), jadi keyframe ke-i = frame ke-i*gop
+        self.gop = max(1, int(round(fps * keyframe_interval)))
+        self.segment_seconds = segment_seconds
+        self.proc = None
+        self.path = None
+        self.retry_at = 0.0
+
+    def open(self, now):
+        start = datetime.fromtimestamp(now)
+        self.path = os.path.join(self.directory, f"{start:%Y%m%d}", f"{self.prefix}_{start:%H%M%S}.ts")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.proc = subprocess.Popen([
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{self.size[0]}x{self.size[1]}", "-r", str(self.fps), "-i", "-",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-g", str(self.gop), "-keyint_min", str(self.gop), "-sc_threshold", "0",
+            "-mpegts_flags", "+resend_headers", "-f", "mpegts", self.path,
+        ], stdin=subprocess.PIPE)
+        self.index = open(self.path + ".idx", "a")
+        self.segment_start = now
+        self.day = start.date()
+        self.frames = 0
+        self.keyframe_times = []
+        self.indexed = 0
+        self.scanned = 0
+        self.last_scan = now
+
+    def write(self, frame, now):
+        if self.proc is None and now < self.retry_at:
+            return
+        if self.proc is None or now - self.segment_start >= self.segment_seconds or datetime.fromtimestamp(now).date() != self.day:
+            self.release()
+            self.open(now)
+        if self.frames % self.gop == 0:
+            self.keyframe_times.append(now)
+        try:
+            self.proc.stdin.write(frame.tobytes())
+        except (BrokenPipeError, OSError) as e:
+            print(f"[Recording] ffmpeg stopped writing {self.path}: {e}, retrying in {RESTART_DELAY}s")
+            self.release()
+            self.retry_at = now + RESTART_DELAY
+            return
+        self.frames += 1
+        if now - self.last_scan >= 1.0:
+            self.scan()
+            self.last_scan = now
+
+    def scan(self):
+        """Index keyframes ffmpeg has flushed since the last scan (only whole packets)"""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self.scanned)
+                data = f.read()
+        except OSError:
+            return
+        data = data[:len(data) - len(data) % TS_PACKET]
+        for offset in ts_keyframes(data, self.scanned):
+            if self.indexed >= len(self.keyframe_times):
+                break
+            self.index.write(f"{self.keyframe_times[self.indexed]:.3f} {offset}\n")
+            self.indexed += 1
+        self.index.flush()
+        self.scanned += len(data)
+
+    def release(self):
+        if self.proc is None:
+            return
+        # ffmpeg yang sudah mati membuat close() gagal saat flush; jangan sampai mematikan worker kamera
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.scan()
+        self.index.close()
+        self.proc = None
+
+
+class Clip:
+    def __init__(self, path, writer, end):
+        self.path = path
+        self.writer = writer
+        self.end = end
+        self.pending = deque()  # JPEG yang belum ditulis (pre-roll + frame yang masuk selama catch-up)
+
+
+class Recorder:
+    """Per-camera recording: a low-fps timelapse plus full-rate clips around status events from a pre-roll buffer"""
+
+    def __init__(self, cam_idx, fps, recording_config=None, size=(640, 360)):
+        self.cam_idx = cam_idx
+        self.fps = fps
+        self.size = size
+        self.settings = recording_settings(recording_config)
+        self.buffer = deque()  # (timestamp, jpeg bytes)
+        self.clip = None
+        self.clip_start = None
+        self.clips_written = 0
+        self.last_timelapse = None
+        self.timelapse_day = None
+        self.writer = None
+        self.stream_clock = None  # Waktu slot frame berikutnya di rekaman continuous
+        self.segmented = self.settings["segments"] and shutil.which("ffmpeg") is not None
+        if self.settings["segments"] and not self.segmented:
+            print(f"[Recording] ffmpeg not found, camera {cam_idx} records plain mp4 without a seek index")
+        if self.settings["mode"] == "continuous":
+            if self.segmented:
+                self.writer = self.open_segments(f"rec_cam{cam_idx}", fps)
+            else:
+                self.writer = open_writer(f"output_tracking_cam{cam_idx}.mp4", fps, size)
+
+    @property
+    def events_mode(self):
+        return self.settings["mode"] == "events"
+
+    def write(self, frame, now):
+        """Record one annotated frame at camera-clock time now"""
+        if not self.events_mode:
+            self.write_continuous(frame, now)
+            return
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.settings["buffer_quality"]])
+        if ok:
+            self.buffer.append((now, jpeg))
+            while self.buffer and now - self.buffer[0][0] > self.settings["pre_roll"]:
+                self.buffer.popleft()
+        if self.clip is not None:
+            if ok:
+                self.clip.pending.append(jpeg)
+            self.drain(self.settings["catchup_frames"])
+            if now >= self.clip.end:
+                self.close_clip()
+        if self.last_timelapse is None or not 0 <= now - self.last_timelapse < 1.0 / self.settings["timelapse_fps"]:
+            day = datetime.fromtimestamp(now).date()
+            if self.segmented:
+                if self.writer is None:
+                    self.writer = self.open_segments(f"timelapse_cam{self.cam_idx}", self.settings["timelapse_playback_fps"])
+            elif self.writer is None or day != self.timelapse_day:
+                # Satu file timelapse per hari per kamera
+                if self.writer is not None:
+                    self.writer.release()
+                self.writer = self.open_timelapse(now)
+                self.timelapse_day = day
+            self.write_stream(frame, now)
+            self.last_timelapse = now
+
+    def write_continuous(self, frame, now):
+        """Write at the writer's fps whatever rate frames arrive at, so playback stays real time"""
+        # Budget/low power hanya memproses sebagian frame; slot yang terlewat diisi frame terakhir
+        interval = 1.0 / self.fps
+        if self.stream_clock is None or not -interval <= now - self.stream_clock <= MAX_FILL:
+            self.stream_clock = now  # Frame pertama, atau gap panjang (reconnect, recording off): lompat saja
+        while self.stream_clock <= now + interval / 2:
+            self.write_stream(frame, self.stream_clock)
+            self.stream_clock += interval
+
+    def write_stream(self, frame, now):
+        if self.segmented:
+            self.writer.write(frame, now)
+        else:
+            self.writer.write(frame)
+
+    def open_segments(self, prefix, fps):
+        # Segment berputar sendiri per segment_seconds dan per hari
+        return SegmentWriter(os.path.join(self.settings["dir"], f"cam{self.cam_idx}"), prefix, fps, self.size,
+                             self.settings["keyframe_interval"], self.settings["segment_seconds"])
+
+    def open_timelapse(self, now):
+        day = datetime.fromtimestamp(now)
+        path = os.path.join(self.settings["dir"], f"cam{self.cam_idx}", f"{day:%Y%m%d}",
+                            f"timelapse_cam{self.cam_idx}_{day:%H%M%S}.mp4")
+        return open_writer(path, self.settings["timelapse_playback_fps"], self.size)
+
+    def buffer_fps(self):
+        """Rate frames actually arrive at (inference budget / low power), so clips play at real speed"""
+        if len(self.buffer) < 2:
+            return self.fps
+        span = self.buffer[-1][0] - self.buffer[0][0]
+        return max(1.0, min(self.fps, (len(self.buffer) - 1) / span)) if span > 0 else self.fps
+
+    def trigger(self, event, now):
+        """Start (or extend) a clip around an event; returns the clip path to link in activity_logs"""
+        if not self.events_mode:
+            return None
+        end = now + self.settings["post_roll"]
+        if self.clip is not None:
+            self.clip.end = min(max(self.clip.end, end), self.clip_start + self.settings["max_clip"])
+            return self.clip.path
+        start = self.buffer[0][0] if self.buffer else now
+        day = datetime.fromtimestamp(now)
+        slug = event.lower().replace(" ", "_")
+        path = os.path.join(self.settings["dir"], f"cam{self.cam_idx}", f"{day:%Y%m%d}",
+                            f"cam{self.cam_idx}_{day:%H%M%S}_{slug}.mp4")
+        self.clip = Clip(path, open_writer(path, self.buffer_fps(), self.size), end)
+        self.clip.pending.extend(jpeg for _, jpeg in self.buffer)
+        self.clip_start = start
+        print(f"[Recording] Camera {self.cam_idx} clip for {event}: {path}")
+        return path
+
+    def drain(self, limit=None):
+        written = 0
+        while self.clip.pending and (limit is None or written < limit):
+            frame = cv2.imdecode(self.clip.pending.popleft(), cv2.IMREAD_COLOR)
+            if frame is not None:
+                self.clip.writer.write(frame)
+            written += 1
+
+    def close_clip(self):
+        self.drain()
+        self.clip.writer.release()
+        self.clip = None
+        self.clips_written += 1
+
+    def close(self):
+        if self.clip is not None:
+            self.close_clip()
+        if self.writer is not None:
+            self.writer.release()
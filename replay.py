@@ -0,0 +1,39 @@
+import argparse
+import json
+from main import run_tracking
+
+
+def find_camera(video_sources, source, camera=None):
+    """Return (cam_idx, cam_config) for the recording, by explicit index or matching source"""
+    if camera is not None:
+        return camera, video_sources[camera - 1][1]
+    for idx, (src, cam_config) in enumerate(video_sources, start=1):
+        if src == source:
+            return idx, cam_config
+    raise SystemExit(f"Source '{source}' not found in config.json, use --camera to pick the zone/schedule config")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze a recording faster than real time using video timestamps")
+    parser.add_argument("source", help="Recorded video file, e.g. '1105 V2.mp4'")
+    parser.add_argument("--start", required=True, help="Wall-clock datetime of the first frame, e.g. '2025-11-07 05:00:00'")
+    parser.add_argument("--camera", type=int, help="Camera index in config.json whose zones/schedule apply (default: match by source)")
+    parser.add_argument("--save-detections", metavar="DIR", help="Also cache per-frame detections for detcache.py")
+    args = parser.parse_args()
+
+    with open("config.json") as f:
+        config = json.load(f)
+    cam_idx, cam_config = find_camera(config["video_sources"], args.source, args.camera)
+
+    run_tracking(
+        cam_idx, args.source,
+        cam_config.get("zones", {}),
+        cam_config.get("breaks", []),
+        cam_config.get("work_start", ""),
+        cam_config.get("work_end", ""),
+        cam_config.get("overtime", []),
+        None,
+        replay_start=args.start,
+        detection_cache=args.save_detections,
+        away_timeout=cam_config.get("away_timeout", 5)
+    )
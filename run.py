@@ -1,44 +1,80 @@
 import multiprocessing
-from scheduler import SchedulerGUI
-from main import run_tracking
+import threading
+from main import run_tracking, frame_server, camera_worker_spec, STREAM_PAUSED
+from metrics import metrics_server
+from inference import export_model
+from cpuplan import plan_cpu, apply_cpu_plan
+from budget import InferenceBudget
+from supervisor import CameraSupervisor
+from configwatch import ConfigWatcher
+from events import EventHub
 import json
 
-def terminate_all(jobs):
-    for p in jobs:
-        if p.is_alive():
-            p.terminate()
-            p.join()
-
-
 if __name__ == "__main__":
+    # GUI & mosaic hanya di proses launcher; worker yang di-spawn tidak perlu tkinter/PIL
+    from scheduler import SchedulerGUI
+    from mosaic import MosaicChannel
+
     # Load config
     with open("config.json") as f:
         config = json.load(f)
     VIDEO_SOURCES = config["video_sources"]
 
     frame_queue = multiprocessing.Queue(maxsize=30)
-    stop_events = []
-    jobs = []
+    stream_modes = multiprocessing.Array('i', [STREAM_PAUSED] * len(VIDEO_SOURCES))
+    mosaic = None
+    if config.get("mosaic", {}).get("enabled"):
+        mosaic = MosaicChannel(len(VIDEO_SOURCES), config["mosaic"])
+        mosaic.start()
+    server_thread = threading.Thread(target=frame_server, args=(frame_queue,), kwargs={"stream_modes": stream_modes, "mosaic": mosaic}, daemon=True)
+    server_thread.start()
+    metrics_config = config.get("metrics", {})
+    if metrics_config.get("http_port"):
+        metrics_server(metrics_config["http_port"], metrics_config.get("dir", "metrics"), metrics_config.get("host", "localhost"))
+
+    # Export model (ONNX/OpenVINO) sekali sebelum worker kamera start
+    export_model(config.get("inference"))
+    # Core set & jumlah thread per kamera (lihat cpuplan.py)
+    cpu_config = config.get("cpu", {})
+    cpu_plan = plan_cpu(len(VIDEO_SOURCES), cpu_config) if cpu_config.get("enabled") else None
+    # Jatah inference per kamera berdasarkan prioritas (lihat budget.py)
+    budget = None
+    if config.get("budget", {}).get("enabled"):
+        budget = InferenceBudget(len(VIDEO_SOURCES), config["budget"], [c.get("priority", 1.0) for _, c in VIDEO_SOURCES])
+        budget.start()
+    # Status event stream untuk dashboard (lihat events.py)
+    events = None
+    if config.get("events", {}).get("enabled"):
+        events = EventHub(config["events"])
+        events.start()
+    # Dashboard membaca summary/log lewat API ber-cache, bukan query langsung (lihat readapi.py)
+    if config.get("read_api", {}).get("enabled"):
+        from readapi import ReadAPI
+        ReadAPI(config["read_api"]).start()
+    # Potong clip dari rekaman ter-index untuk click-to-play (lihat clips.py)
+    if config.get("clips", {}).get("enabled"):
+        from clips import clip_server
+        clip_server(config["clips"].get("port", 9500), config.get("recording", {}).get("dir", "recordings"),
+                    config["clips"].get("host", "localhost"))
+
+    def build_camera(idx, src, cam_config):
+        return camera_worker_spec(idx, src, cam_config, frame_queue, stream_modes, cpu_plan, budget, events)
+
+    cameras = []
     for idx, (src, cam_config) in enumerate(VIDEO_SOURCES, start=1):
-        zones = cam_config.get("zones", {})
-        breaks = cam_config.get("breaks", [])
-        work_start = cam_config.get("work_start", "")
-        work_end = cam_config.get("work_end", "")
-        overtime = cam_config.get("overtime", [])
-        stop_event = multiprocessing.Event()
-        p = multiprocessing.Process(
-            target=run_tracking,
-            args=(idx, src, zones, breaks, work_start, work_end, overtime, frame_queue, stop_event)
-        )
-        p.start()
-        jobs.append(p)
-        stop_events.append(stop_event)
-
-    app = SchedulerGUI(frame_queue=frame_queue, jobs=jobs, stop_events=stop_events)
+        args, kwargs = build_camera(idx, src, cam_config)
+        kwargs["config_updates"] = multiprocessing.Queue()
+        cameras.append((args, kwargs))
+    # Heartbeat & restart per kamera (lihat supervisor.py)
+    supervisor = CameraSupervisor(run_tracking, cameras, config.get("supervisor"), metrics_config.get("dir", "metrics"))
+    supervisor.start()
+    # Simpan di GUI -> config.json berubah -> zona/jadwal diterapkan ke worker yang terdampak
+    ConfigWatcher(supervisor, build_camera, config).start()
+    if cpu_plan:
+        apply_cpu_plan(cpu_plan["launcher"], "Launcher")
+
+    app = SchedulerGUI(frame_queue=frame_queue, jobs=supervisor.jobs, stop_events=supervisor.stop_events)
     app.mainloop()
 
     # Cleanup
-    for ev in stop_events:
-        ev.set()
-    for p in jobs:
-        p.join()
\ No newline at end of file
+    supervisor.stop()
@@ -8,15 +8,50 @@ import socket
 import pickle
 import struct
 import time
+import webbrowser
+import csv
+from collections import deque
+
+# (nama tahap, timestamp awal, timestamp akhir) untuk latency trace
+LATENCY_STAGES = [
+    ("read", "t_read_start", "t_capture"),
+    ("inference", "t_capture", "t_inferred"),
+    ("annotate", "t_inferred", "t_queue_put"),
+    ("queue", "t_queue_put", "t_server_get"),
+    ("server", "t_server_get", "t_sent"),
+    ("socket", "t_sent", "t_recv"),
+    ("tk", "t_recv", "t_display"),
+]
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[int(round(pct / 100 * (len(ordered) - 1)))]
 
 class SchedulerGUI(tk.Tk):
-    def __init__(self):
+    def __init__(self, frame_queue=None, jobs=None, stop_events=None):
         super().__init__()
         self.title("Work Activity Tracking Scheduler by Puterako")
         self.geometry("1200x800")
 
+        self.frame_queue = frame_queue
+        self.jobs = jobs or []
+        self.stop_events = stop_events or []
+
         self.camera_labels = {}  # Store label widgets for each camera
 
+        # Visibility state dikirim ke frame server
+        self.visible_cameras = set()
+        self.focus_camera = None
+        self.focus_window = None
+        self.focus_label = None
+        self._visibility_pending = False
+
+        # Glass-to-glass latency per kamera + trace lengkap untuk dump
+        self.latency_samples = {}
+        self.latency_trace = deque(maxlen=20000)
+
         # Socket client attributes
         self.client_socket = None
         self.frame_thread = None
@@ -73,10 +108,16 @@ class SchedulerGUI(tk.Tk):
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+        # Tab lain aktif / window diminimize -> semua tile tersembunyi
+        self.notebook.bind("<<NotebookTabChanged>>", lambda e: self.schedule_visibility_update())
+        self.bind("<Map>", lambda e: self.schedule_visibility_update())
+        self.bind("<Unmap>", lambda e: self.schedule_visibility_update())
+
     def create_live_tracking_tab(self):
         """Create tab for live camera feeds"""
         live_tab = tk.Frame(self.notebook)
         self.notebook.add(live_tab, text="📹 Live Tracking")
+        self.live_tab = live_tab
 
         # Control panel
         control_frame = tk.Frame(live_tab, bg="#f0f0f0", height=50)
@@ -93,6 +134,11 @@ class SchedulerGUI(tk.Tk):
         btn_frame.pack(side="right")
         tk.Button(btn_frame, text="Connect", command=self.connect_to_server).pack(side="left", padx=5)
         tk.Button(btn_frame, text="Disconnect", command=self.disconnect_from_server).pack(side="left", padx=5)
+        tk.Button(btn_frame, text="Dump Latency", command=self.dump_latency_trace).pack(side="left", padx=5)
+        mosaic_config = (self.config_data or {}).get("mosaic", {})
+        if mosaic_config.get("enabled"):
+            mosaic_url = f"http://localhost:{mosaic_config.get('http_port', 8081)}/"
+            tk.Button(btn_frame, text="Mosaic", command=lambda: webbrowser.open(mosaic_url)).pack(side="left", padx=5)
 
         # Canvas with scrollbar for camera grid
         canvas_frame = tk.Frame(live_tab)
@@ -101,6 +147,7 @@ class SchedulerGUI(tk.Tk):
         canvas = tk.Canvas(canvas_frame, bg="#2b2b2b")
         scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
         self.camera_container = tk.Frame(canvas, bg="#2b2b2b")
+        self.live_canvas = canvas
         
         self.camera_container.bind(
             "<Configure>",
@@ -108,7 +155,13 @@ class SchedulerGUI(tk.Tk):
         )
         
         canvas.create_window((0, 0), window=self.camera_container, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+
+        def on_scroll(*args):
+            scrollbar.set(*args)
+            self.schedule_visibility_update()
+
+        canvas.configure(yscrollcommand=on_scroll)
+        canvas.bind("<Configure>", lambda e: self.schedule_visibility_update())
         
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -129,6 +182,8 @@ class SchedulerGUI(tk.Tk):
             self.status_label.config(text="● Connected", fg="green")
             self.frame_thread = threading.Thread(target=self.receive_frames, daemon=True)
             self.frame_thread.start()
+            self.visible_cameras = self.compute_visible_cameras()
+            self.send_stream_control()
         except Exception as e:
             messagebox.showerror("Error", f"Cannot connect to server: {e}")
             self.status_label.config(text="● Disconnected", fg="red")
@@ -161,8 +216,11 @@ class SchedulerGUI(tk.Tk):
                     data += self.client_socket.recv(4096)
                 frame_data = data[:msg_size]
                 data = data[msg_size:]
-                cam_idx, frame_rgb = pickle.loads(frame_data)
-                self.after(0, self.update_camera_display, cam_idx, frame_rgb)
+                cam_idx, frame_rgb, meta = pickle.loads(frame_data)
+                meta["t_recv"] = time.time()
+                if cam_idx not in self.visible_cameras and cam_idx != self.focus_camera:
+                    continue  # Tile tersembunyi, tidak perlu render
+                self.after(0, self.update_camera_display, cam_idx, frame_rgb, meta)
             except Exception as e:
                 print(f"[ERROR] Socket receive error: {e}")
                 self.disconnect_from_server()
@@ -187,14 +245,16 @@ class SchedulerGUI(tk.Tk):
                                     padx=5, pady=5)
             cam_frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
             
-            video_label = tk.Label(cam_frame, bg="black", width=320, height=180)
+            video_label = tk.Label(cam_frame, bg="black", width=320, height=180, cursor="hand2")
             video_label.pack()
+            video_label.bind("<Button-1>", lambda e, cam=idx + 1: self.open_focus_view(cam))
             
             info_label = tk.Label(cam_frame, text="Waiting for feed...", 
                                 bg="#1e1e1e", fg="gray", font=("Arial", 9))
             info_label.pack(pady=5)
             
             self.camera_labels[idx + 1] = {
+                'frame': cam_frame,
                 'video': video_label,
                 'info': info_label,
                 'last_update': 0
@@ -203,12 +263,126 @@ class SchedulerGUI(tk.Tk):
         for i in range(cols):
             self.camera_container.columnconfigure(i, weight=1)
 
-    def update_camera_display(self, cam_idx, frame_rgb):
+    def schedule_visibility_update(self):
+        """Coalesce scroll/resize/tab events into one visibility check"""
+        if not self._visibility_pending:
+            self._visibility_pending = True
+            self.after_idle(self.update_visibility)
+
+    def compute_visible_cameras(self):
+        """Return camera indexes whose tile intersects the visible canvas area"""
+        if not hasattr(self, "live_canvas"):
+            return set()
+        if self.state() == "iconic" or self.notebook.select() != str(self.live_tab):
+            return set()
+        canvas = self.live_canvas
+        view_top = canvas.canvasy(0)
+        view_bottom = view_top + canvas.winfo_height()
+        visible = set()
+        for cam_idx, widgets in self.camera_labels.items():
+            frame = widgets['frame']
+            top = frame.winfo_y()
+            bottom = top + frame.winfo_height()
+            if bottom > view_top and top < view_bottom:
+                visible.add(cam_idx)
+        return visible
+
+    def update_visibility(self):
+        self._visibility_pending = False
+        visible = self.compute_visible_cameras()
+        if visible != self.visible_cameras:
+            self.visible_cameras = visible
+            self.send_stream_control()
+
+    def send_stream_control(self):
+        """Tell the frame server which cameras are on screen and which one is focused"""
+        if not self.running or not self.client_socket:
+            return
+        data = json.dumps({
+            "visible": sorted(self.visible_cameras),
+            "focus": self.focus_camera
+        }).encode("utf-8")
+        try:
+            self.client_socket.sendall(struct.pack("Q", len(data)) + data)
+        except Exception as e:
+            print(f"[ERROR] Failed to send stream control: {e}")
+
+    def open_focus_view(self, cam_idx):
+        """Open a large view that receives full resolution for one camera"""
+        if self.focus_window is not None:
+            self.close_focus_view()
+        self.focus_camera = cam_idx
+        self.focus_window = tk.Toplevel(self)
+        self.focus_window.title(f"Camera {cam_idx} - Focus View")
+        self.focus_window.configure(bg="black")
+        self.focus_label = tk.Label(self.focus_window, bg="black", width=640, height=360)
+        self.focus_label.pack(fill="both", expand=True)
+        self.focus_window.protocol("WM_DELETE_WINDOW", self.close_focus_view)
+        self.send_stream_control()
+
+    def close_focus_view(self):
+        if self.focus_window is not None:
+            self.focus_window.destroy()
+        self.focus_window = None
+        self.focus_label = None
+        self.focus_camera = None
+        self.send_stream_control()
+
+    def record_latency(self, cam_idx, meta):
+        """Store stage timestamps of a displayed frame and return (p50, p95) in ms"""
+        meta["t_display"] = time.time()
+        self.latency_trace.append((cam_idx, meta))
+        samples = self.latency_samples.setdefault(cam_idx, deque(maxlen=300))
+        samples.append((meta["t_display"] - meta["t_capture"]) * 1000)
+        return percentile(samples, 50), percentile(samples, 95)
+
+    def dump_latency_trace(self):
+        """Write every traced frame with per-stage durations to a CSV file"""
+        if not self.latency_trace:
+            messagebox.showwarning("Warning", "Belum ada data latency")
+            return
+        filename = f"latency_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        try:
+            with open(filename, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["camera", "seq", "t_capture"] +
+                                [f"{name}_ms" for name, _, _ in LATENCY_STAGES] +
+                                ["glass_to_glass_ms"])
+                for cam_idx, meta in list(self.latency_trace):
+                    row = [cam_idx, meta.get("seq"), f"{meta['t_capture']:.6f}"]
+                    for name, start, end in LATENCY_STAGES:
+                        if start in meta and end in meta:
+                            row.append(f"{(meta[end] - meta[start]) * 1000:.2f}")
+                        else:
+                            row.append("")
+                    row.append(f"{(meta['t_display'] - meta['t_capture']) * 1000:.2f}")
+                    writer.writerow(row)
+            messagebox.showinfo("Sukses", f"Latency trace disimpan ke {filename}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal menyimpan latency trace!\n{e}")
+
+    def update_camera_display(self, cam_idx, frame_rgb, meta=None):
         """Update camera display with new frame (runs in main thread)"""
         if cam_idx not in self.camera_labels:
             print(f"[WARNING] cam_idx {cam_idx} not in camera_labels")
             return
 
+        if cam_idx == self.focus_camera and self.focus_label is not None:
+            try:
+                focus_width = self.focus_label.winfo_width() or 640
+                focus_height = self.focus_label.winfo_height() or 360
+                img = Image.fromarray(frame_rgb)
+                img = img.resize((focus_width, focus_height), Image.Resampling.LANCZOS)
+                photo = ImageTk.PhotoImage(image=img)
+                self.focus_label.configure(image=photo)
+                self.focus_label.image = photo
+            except Exception as e:
+                print(f"[ERROR] Error displaying focus frame for camera {cam_idx}: {e}")
+            if cam_idx not in self.visible_cameras:
+                if meta is not None:
+                    self.record_latency(cam_idx, meta)
+                return
+
         try:
             video_label = self.camera_labels[cam_idx]['video']
             label_width = video_label.winfo_width() or 320
@@ -221,8 +395,12 @@ class SchedulerGUI(tk.Tk):
             video_label.image = photo  # Keep reference
 
             current_time = datetime.now().strftime("%H:%M:%S")
+            info_text = f"Last update: {current_time}"
+            if meta is not None:
+                p50, p95 = self.record_latency(cam_idx, meta)
+                info_text += f" | Latency p50 {p50:.0f}ms / p95 {p95:.0f}ms"
             self.camera_labels[cam_idx]['info'].configure(
-                text=f"Last update: {current_time}",
+                text=info_text,
                 fg="lime"
             )
             self.camera_labels[cam_idx]['last_update'] = datetime.now().timestamp()
@@ -697,6 +875,7 @@ class SchedulerGUI(tk.Tk):
     def save_config(self):
         try:
             video_sources = []
+            previous_cameras = {src: cfg for src, cfg in (self.config_data or {}).get("video_sources", [])}
             
             for entry in self.camera_entries:
                 src = entry['source'].get().strip()
@@ -746,26 +925,32 @@ class SchedulerGUI(tk.Tk):
                         if len(parts) == 5:
                             x1, y1, x2, y2 = map(int, parts[:4])
                             name = parts[4].strip()
-                            zones[zone_id] = [x1, y1, x2, y2, name]
+                            zones[str(zone_id)] = [x1, y1, x2, y2, name]
                             zone_id += 1
                 
-                video_sources.append([src, {
+                # Key kamera lain (priority, replay_start, dll) yang tidak ada di form tetap dipertahankan
+                cam_config = dict(previous_cameras.get(src, {}))
+                cam_config.update({
                     "zones": zones,
                     "work_start": work_start,
                     "work_end": work_end,
                     "breaks": breaks,
                     "overtime": overtime,
                     "away_timeout": away_timeout  # Tambahan
-                }])
+                })
+                video_sources.append([src, cam_config])
             
-            config = {
+            # Pertahankan key lain (mosaic, dll) yang tidak diedit di GUI
+            config = dict(self.config_data or {})
+            config.update({
                 "video_sources": video_sources,
                 "schedule_templates": self.schedule_templates,
                 "date": datetime.now().strftime("%Y-%m-%d")
-            }
+            })
             
             with open("config.json", "w") as f:
                 json.dump(config, f, indent=2)
+            self.config_data = config
             
             messagebox.showinfo("Sukses", "Konfigurasi berhasil disimpan ke config.json!")
             
@@ -773,6 +958,7 @@ class SchedulerGUI(tk.Tk):
             messagebox.showerror("Error", f"Gagal menyimpan!\n{e}")
 
     def on_closing(self):
+        self.close_focus_view()
         self.disconnect_from_server()
         self.destroy()
         
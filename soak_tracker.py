@@ -0,0 +1,131 @@
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+import numpy as np
+from tracker import ZoneTracker, TRACK_TTL, EVICTION_INTERVAL
+
+ZONES = {
+    "1": [100, 130, 225, 350, "Zone 1"],
+    "2": [250, 130, 450, 350, "Zone 2"],
+    "3": [460, 130, 597, 350, "Zone 3"],
+}
+
+
+def pose_pool(zone, count=8):
+    """A few jittered standing poses centred in the zone, reused to keep the soak loop cheap"""
+    x1, y1, x2, y2 = zone[:4]
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    poses = []
+    for _ in range(count):
+        keypoints = np.column_stack([
+            np.full(17, cx) + np.random.uniform(-15, 15, 17),
+            np.linspace(cy - 60, cy + 60, 17) + np.random.uniform(-5, 5, 17),
+        ]).astype(np.float32)
+        poses.append(keypoints)
+    return poses
+
+
+def simulate(days, fps, churn_seconds, evict=True, seed=0, trace_memory=False, idle_step=60):
+    """Run a month of synthetic detections with ByteTrack-like id churn; returns per-day samples of peak state"""
+    random.seed(seed)
+    np.random.seed(seed)
+    tracker = ZoneTracker(ZONES, 5 * 60, track_ttl=TRACK_TTL if evict else float("inf"))
+    poses = {zone_id: pose_pool(zone) for zone_id, zone in ZONES.items()}
+    visibility = np.ones(17, dtype=np.float32)
+    track_ids = {zone_id: None for zone_id in ZONES}
+    next_track_id = 1
+    start = datetime(2025, 1, 1)
+    step = 1.0 / fps
+    samples = []
+
+    # tracemalloc memperlambat loop ~3x, jadi hanya bila diminta
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    frames = 0
+    elapsed_sim = 0.0
+    day = {"date": start.date(), "peak": {}, "new_ids": 0, "work_seconds": 0.0}
+    last_sample = None
+    while elapsed_sim < days * 86400:
+        now_dt = start + timedelta(seconds=elapsed_sim)
+        current_time = now_dt.timestamp()
+        if now_dt.date() != day["date"]:
+            current, _ = tracemalloc.get_traced_memory() if trace_memory else (0, 0)
+            samples.append(dict(day["peak"], day=day["date"].isoformat(), traced_kb=current / 1024,
+                                tracked_ids=next_track_id - 1, new_ids=day["new_ids"], work_seconds=day["work_seconds"]))
+            if evict:
+                tracker.reset_day()
+            day = {"date": now_dt.date(), "peak": {}, "new_ids": 0, "work_seconds": 0.0}
+
+        work_active = 8 <= now_dt.hour < 17
+        detections = []
+        if work_active:
+            for zone_id in ZONES:
+                # Orang kadang tidak terdeteksi, dan id ByteTrack berganti rata-rata tiap churn_seconds
+                if random.random() < 0.1:
+                    track_ids[zone_id] = None
+                    continue
+                if track_ids[zone_id] is None or random.random() < step / churn_seconds:
+                    track_ids[zone_id] = next_track_id
+                    next_track_id += 1
+                    day["new_ids"] += 1
+                detections.append((track_ids[zone_id], random.choice(poses[zone_id]), visibility))
+            day["work_seconds"] += step
+        tracker.update(detections, current_time, work_active, False)
+        frames += 1
+        # Puncak state diambil selama jam kerja, bukan di tengah malam setelah TTL mengosongkan semuanya
+        if work_active and (last_sample is None or current_time - last_sample >= 60):
+            last_sample = current_time
+            for name, value in tracker.state_size().items():
+                day["peak"][name] = max(day["peak"].get(name, 0), value)
+        # Di luar jam kerja tidak ada deteksi; cukup satu update per idle_step detik
+        elapsed_sim += step if work_active else max(step, idle_step)
+    if day["work_seconds"]:
+        current, _ = tracemalloc.get_traced_memory() if trace_memory else (0, 0)
+        samples.append(dict(day["peak"], day=day["date"].isoformat(), traced_kb=current / 1024,
+                            tracked_ids=next_track_id - 1, new_ids=day["new_ids"], work_seconds=day["work_seconds"]))
+    elapsed = time.perf_counter() - t0
+    if trace_memory:
+        tracemalloc.stop()
+    return samples, frames, elapsed
+
+
+def track_bound(sample, ttl):
+    """Live tracks a working eviction allows: per person, the ids started within one TTL plus one eviction interval"""
+    id_rate = sample["new_ids"] / (len(ZONES) * sample["work_seconds"]) if sample["work_seconds"] else 0.0
+    return len(ZONES) * ((ttl + EVICTION_INTERVAL) * id_rate + 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak ZoneTracker with a month of synthetic track id churn")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--fps", type=float, default=1.0, help="Simulated processed frames per second")
+    parser.add_argument("--churn", type=float, default=20, help="Mean seconds before a person's track id changes")
+    parser.add_argument("--no-eviction", action="store_true", help="Disable TTL eviction and day reset (old behaviour)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also track Python heap with tracemalloc (~3x slower)")
+    args = parser.parse_args()
+
+    samples, frames, elapsed = simulate(args.days, args.fps, args.churn, evict=not args.no_eviction,
+                                        trace_memory=args.trace_memory)
+    print(f"[Soak] {frames} frames ({args.days:g} days at {args.fps:g} fps during work hours) in {elapsed:.1f}s")
+    print(f"{'Day':<12}{'Track ids':>11}{'Peak tracks':>13}{'Bound':>7}{'People':>8}{'Person ids':>12}{'Traced KB':>11}")
+    for s in samples:
+        print(f"{s['day']:<12}{s['tracked_ids']:>11}{s.get('tracks', 0):>13}{track_bound(s, TRACK_TTL):>7.0f}"
+              f"{s.get('people', 0):>8}{s.get('person_track_ids', 0):>12}{s['traced_kb']:>11.0f}")
+
+    if samples and not args.no_eviction:
+        # Puncak harian harus di bawah batas TTL; tanpa eviction track menumpuk sepanjang hari kerja
+        over = [s["day"] for s in samples
+                if max(s.get("tracks", 0), s.get("person_track_ids", 0)) > track_bound(s, TRACK_TTL) * 1.5]
+        ok = not over
+        if args.trace_memory and len(samples) >= 14:
+            first_kb = max(s["traced_kb"] for s in samples[:7])
+            last_kb = max(s["traced_kb"] for s in samples[-7:])
+            ok = ok and last_kb <= first_kb * 1.5 + 64
+            print(f"[Soak] Traced memory {first_kb:.0f} -> {last_kb:.0f} KB")
+        print(f"[Soak] {'PASS' if ok else 'FAIL'}: peak tracks within 1.5x of people x ttl x id rate"
+              + (f" (over on {', '.join(over)})" if over else ""))
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,241 @@
+import os
+import sys
+import time
+import threading
+import multiprocessing
+
+DEFAULT_SUPERVISOR = {
+    "check_interval": 2,
+    "heartbeat_timeout": 60,   # Worker dianggap hang bila loop tidak jalan selama ini
+    "startup_grace": 120,      # Waktu load model + koneksi awal sebelum heartbeat pertama
+    "backoff_base": 2,
+    "backoff_max": 300,
+    "reset_after": 600,        # Uptime stabil yang me-reset backoff
+    "reconnect_attempts": 5,   # Reconnect stream di dalam worker sebelum worker menyerah
+    "reconnect_delay": 2,
+    "max_cameras": 16,         # Kapasitas heartbeat untuk kamera yang ditambah saat jalan
+}
+
+
+def supervisor_settings(supervisor_config=None):
+    settings = dict(DEFAULT_SUPERVISOR)
+    settings.update(supervisor_config or {})
+    return settings
+
+
+def supervised_worker(target, args, kwargs):
+    """Process entry point: a False return from the worker means failure (non-zero exit code)"""
+    ok = target(*args, **kwargs)
+    sys.exit(0 if ok is not False else 1)
+
+
+class CameraSupervisor:
+    """Runs one process per camera, watches heartbeats and restarts a failed camera alone with backoff"""
+
+    def __init__(self, target, cameras, supervisor_config=None, metrics_dir="metrics", metrics_name="supervisor"):
+        # cameras: list (args, kwargs) per kamera, cam_idx = posisi + 1
+        self.target = target
+        self.cameras = cameras
+        self.settings = supervisor_settings(supervisor_config)
+        self.metrics_dir = metrics_dir
+        self.metrics_name = metrics_name
+        n = len(cameras)
+        self.heartbeats = multiprocessing.Array('d', [0.0] * max(n, self.settings["max_cameras"]))
+        self.jobs = [None] * n
+        self.stop_events = [None] * n
+        self.started_at = [None] * n
+        self.next_start = [0.0] * n
+        self.restarts = [0] * n
+        self.failures = [0] * n
+        self.uptime_total = [0.0] * n
+        self.finished = [False] * n
+        self.stopping = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        for i in range(len(self.cameras)):
+            self.start_camera(i)
+        threading.Thread(target=self.run, daemon=True).start()
+        print(f"[Supervisor] Watching {len(self.cameras)} cameras")
+
+    def start_camera(self, i):
+        args, kwargs = self.cameras[i]
+        stop_event = multiprocessing.Event()
+        kwargs = dict(kwargs, stop_event=stop_event, heartbeat=self.heartbeats)
+        p = multiprocessing.Process(target=supervised_worker, args=(self.target, args, kwargs), daemon=False)
+        p.start()
+        self.jobs[i] = p
+        self.stop_events[i] = stop_event
+        self.started_at[i] = time.time()
+
+    def add_camera(self, cam_idx, args, kwargs):
+        with self.lock:
+            i = cam_idx - 1
+            if i >= len(self.heartbeats):
+                print(f"[Supervisor] Cannot add camera {cam_idx}, max_cameras is {len(self.heartbeats)}")
+                return
+            if i < len(self.jobs):
+                # Slot kamera yang pernah dihapus dipakai lagi
+                if self.jobs[i] is not None:
+                    return
+                self.cameras[i] = (args, kwargs)
+                self.finished[i] = False
+            else:
+                # Node cluster hanya menjalankan sebagian kamera: slot di antaranya kosong (finished)
+                while len(self.jobs) <= i:
+                    self.cameras.append(None)
+                    for values, default in ((self.jobs, None), (self.stop_events, None), (self.started_at, None),
+                                            (self.next_start, 0.0), (self.restarts, 0), (self.failures, 0),
+                                            (self.uptime_total, 0.0), (self.finished, True)):
+                        values.append(default)
+                self.cameras[i] = (args, kwargs)
+                self.finished[i] = False
+            self.start_camera(i)
+
+    def remove_camera(self, cam_idx, timeout=None):
+        """Stop a camera for good; with timeout, a worker still running after that many seconds is killed"""
+        with self.lock:
+            i = cam_idx - 1
+            self.finished[i] = True
+            if self.stop_events[i] is not None:
+                self.stop_events[i].set()
+            p = self.jobs[i]
+            if p is not None:
+                self.uptime_total[i] += time.time() - self.started_at[i]
+                self.jobs[i] = None
+                threading.Thread(target=self.reap, args=(p, timeout), daemon=True).start()
+
+    def reap(self, p, timeout=None):
+        p.join(timeout)
+        if p.is_alive():
+            self.kill(p)
+
+    def update_camera(self, cam_idx, args, restart=False, kwargs=None):
+        """Replace the args (and merge kwargs) used for the next (re)start; restart=True stops the current worker now"""
+        with self.lock:
+            i = cam_idx - 1
+            self.cameras[i] = (args, dict(self.cameras[i][1], **(kwargs or {})))
+            if not restart:
+                return
+            self.finished[i] = False
+            p = self.jobs[i]
+            if p is not None:
+                self.stop_events[i].set()
+                p.join(10)
+                if p.is_alive():
+                    self.kill(p)
+                self.uptime_total[i] += time.time() - self.started_at[i]
+                self.jobs[i] = None
+                self.next_start[i] = 0.0
+
+    def kill(self, p):
+        p.terminate()
+        p.join(5)
+        if p.is_alive():
+            p.kill()
+            p.join()
+
+    def schedule_restart(self, i, reason):
+        now = time.time()
+        self.uptime_total[i] += now - self.started_at[i]
+        self.failures[i] += 1
+        delay = min(self.settings["backoff_max"], self.settings["backoff_base"] * 2 ** (self.failures[i] - 1))
+        self.next_start[i] = now + delay
+        self.jobs[i] = None
+        print(f"[Supervisor] Camera {i + 1} {reason}, restart #{self.restarts[i] + 1} in {delay:.0f}s")
+
+    def check(self):
+        now = time.time()
+        for i, p in enumerate(self.jobs):
+            if self.finished[i]:
+                continue
+            if p is None:
+                if now >= self.next_start[i]:
+                    self.restarts[i] += 1
+                    self.start_camera(i)
+                continue
+            if p.is_alive():
+                beat = self.heartbeats[i]
+                if beat < self.started_at[i]:
+                    last, timeout = self.started_at[i], self.settings["startup_grace"]
+                else:
+                    last, timeout = beat, self.settings["heartbeat_timeout"]
+                if now - last > timeout:
+                    self.kill(p)
+                    self.schedule_restart(i, f"heartbeat lost for {now - last:.0f}s")
+                elif self.failures[i] and now - self.started_at[i] > self.settings["reset_after"]:
+                    self.failures[i] = 0
+                continue
+            p.join()
+            if p.exitcode == 0:
+                # Selesai normal (file video habis / stop event), tidak di-restart
+                self.uptime_total[i] += now - self.started_at[i]
+                self.finished[i] = True
+                self.jobs[i] = None
+                print(f"[Supervisor] Camera {i + 1} finished")
+            else:
+                self.schedule_restart(i, f"exited with code {p.exitcode}")
+
+    def run(self):
+        while not self.stopping:
+            with self.lock:
+                if not self.stopping:
+                    self.check()
+                    self.write_metrics()
+            time.sleep(self.settings["check_interval"])
+
+    def uptime(self, i):
+        if self.jobs[i] is not None and self.jobs[i].is_alive():
+            return time.time() - self.started_at[i]
+        return 0.0
+
+    def slots(self):
+        return [i for i in range(len(self.jobs)) if self.cameras[i] is not None]
+
+    def write_metrics(self):
+        if not self.metrics_dir:
+            return
+        slots = self.slots()
+        lines = ["# TYPE tracking_camera_up gauge"]
+        lines += [f'tracking_camera_up{{camera="{i + 1}"}} {int(self.uptime(i) > 0)}' for i in slots]
+        lines.append("# TYPE tracking_camera_uptime_seconds gauge")
+        lines += [f'tracking_camera_uptime_seconds{{camera="{i + 1}"}} {self.uptime(i):.0f}' for i in slots]
+        lines.append("# TYPE tracking_camera_restarts_total counter")
+        lines += [f'tracking_camera_restarts_total{{camera="{i + 1}"}} {self.restarts[i]}' for i in slots]
+        path = os.path.join(self.metrics_dir, f"{self.metrics_name}.prom")
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"[Supervisor] Failed to write {path}: {e}")
+
+    def status(self):
+        return [{
+            "camera": i + 1,
+            "alive": self.uptime(i) > 0,
+            "uptime": self.uptime(i),
+            "total_uptime": self.uptime_total[i] + self.uptime(i),
+            "restarts": self.restarts[i],
+            "finished": self.finished[i],
+        } for i in self.slots()]
+
+    def wait(self):
+        """Block until every camera finished for good (Ctrl+C to stop)"""
+        while not all(self.finished):
+            time.sleep(1)
+
+    def stop(self, timeout=10):
+        with self.lock:
+            self.stopping = True
+        for ev in self.stop_events:
+            if ev is not None:
+                ev.set()
+        for p in self.jobs:
+            if p is not None:
+                p.join(timeout)
+                if p.is_alive():
+                    self.kill(p)
+        for s in self.status():
+            print(f"[Supervisor] Camera {s['camera']}: uptime {s['total_uptime'] / 3600:.2f}h, {s['restarts']} restarts")
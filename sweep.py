@@ -0,0 +1,150 @@
+import os
+import csv
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+from detcache import DetectionCacheReader, replay_detections
+from tracker import zone_label
+
+ZONE_TIMES = ("working_time", "idle_time", "away_time")
+EVENTS = ("Left Zone", "Returned to Zone", "Long Idle")
+
+# Nama parameter grid -> keyword ZoneTracker (away_timeout di grid dalam menit)
+GRID_PARAMS = {
+    "activity_threshold": "activity_threshold",
+    "idle_timeout": "idle_timeout",
+    "away_timeout": "away_timeout",
+    "log_return_threshold": "log_return_threshold",
+    "visibility_threshold": "visibility_threshold",
+    "hand_weight": "hand_weight",
+    "shoulder_weight": "shoulder_weight",
+    "activity_window": "activity_window",
+}
+
+_frames = None
+_cam_config = None
+
+
+def init_worker(cache_path, cam_config):
+    """Load the whole cache once per worker process; every combination replays the same frames"""
+    global _frames, _cam_config
+    _frames = list(DetectionCacheReader(cache_path))
+    _cam_config = cam_config
+
+
+def evaluate(params):
+    tracker_params = {GRID_PARAMS[k]: v for k, v in params.items()}
+    if "away_timeout" in tracker_params:
+        tracker_params["away_timeout"] = tracker_params["away_timeout"] * 60
+    t0 = time.perf_counter()
+    tracker, events = replay_detections(_frames, _cam_config, **tracker_params)
+    zones = {}
+    for zone_name, totals in tracker.zone_totals().items():
+        zones[zone_name] = {k: totals[k] for k in ZONE_TIMES}
+        zones[zone_name]["events"] = {e: 0 for e in EVENTS}
+    for event in events:
+        counts = zones[event["zone_name"]]["events"]
+        counts[event["event"]] = counts.get(event["event"], 0) + 1
+    return {"params": params, "zones": zones, "seconds": time.perf_counter() - t0}
+
+
+def score(result, reference):
+    """Relative time error over the labelled zones plus absolute event count error"""
+    time_error = 0.0
+    time_total = 0.0
+    event_error = 0
+    for zone_name, ref in reference.get("zones", {}).items():
+        got = result["zones"].get(zone_name, {})
+        for k in ZONE_TIMES:
+            if k in ref:
+                time_error += abs(got.get(k, 0) - ref[k])
+                time_total += ref[k]
+        for e, count in ref.get("events", {}).items():
+            event_error += abs(got.get("events", {}).get(e, 0) - count)
+    return time_error / time_total if time_total else 0.0, event_error
+
+
+def parse_values(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def build_grid(args, grid_file=None):
+    grid = {}
+    if grid_file:
+        with open(grid_file) as f:
+            grid.update(json.load(f))
+    for name in GRID_PARAMS:
+        value = getattr(args, name)
+        if value:
+            grid[name] = parse_values(value)
+    unknown = set(grid) - set(GRID_PARAMS)
+    if unknown:
+        raise SystemExit(f"Unknown grid parameters: {', '.join(sorted(unknown))}")
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def write_results(path, results, zone_names):
+    header = sorted(results[0]["params"]) + ["time_error", "event_error"]
+    for zone_name in zone_names:
+        header += [f"{zone_name}:{k}" for k in ZONE_TIMES] + [f"{zone_name}:{e}" for e in EVENTS]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for r in results:
+            row = [r["params"][k] for k in sorted(r["params"])] + [round(r["time_error"], 4), r["event_error"]]
+            for zone_name in zone_names:
+                zone = r["zones"].get(zone_name, {})
+                row += [round(zone.get(k, 0), 1) for k in ZONE_TIMES]
+                row += [zone.get("events", {}).get(e, 0) for e in EVENTS]
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    # Contoh: python sweep.py cache/1105 --reference labels/1105.json \
+    #             --activity-threshold 1,1.5,2 --idle-timeout 3,5 --away-timeout 3,5 --hand-weight 1,2
+    # Reference (hand-labelled): {"zones": {"Zone 1": {"working_time": 5400, "idle_time": 900,
+    #                              "away_time": 600, "events": {"Left Zone": 1, "Returned to Zone": 1}}}}
+    parser = argparse.ArgumentParser(description="Evaluate a grid of tracker parameters over cached detections")
+    parser.add_argument("cache", help="Directory written by --save-detections")
+    parser.add_argument("--reference", help="Hand-labelled per-zone totals/event counts (JSON)")
+    parser.add_argument("--camera", type=int, help="Camera index in config.json (default: from the cache)")
+    parser.add_argument("--grid", help="JSON file {param: [values]}; CLI lists override it")
+    for name in GRID_PARAMS:
+        parser.add_argument("--" + name.replace("_", "-"), dest=name, help="Comma separated values")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="sweep_results.csv")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    meta = DetectionCacheReader(args.cache).meta
+    cam_idx = args.camera or meta.get("camera")
+    with open("config.json") as f:
+        cam_config = json.load(f)["video_sources"][cam_idx - 1][1]
+    reference = {}
+    if args.reference:
+        with open(args.reference) as f:
+            reference = json.load(f)
+
+    grid = build_grid(args, args.grid)
+    print(f"[Sweep] {len(grid)} combinations over {meta['frames']} cached frames, {args.workers} workers")
+    t0 = time.time()
+    results = []
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.cache, cam_config)) as pool:
+        for result in pool.imap_unordered(evaluate, grid):
+            result["time_error"], result["event_error"] = score(result, reference)
+            results.append(result)
+            if len(results) % max(1, len(grid) // 10) == 0:
+                print(f"[Sweep] {len(results)}/{len(grid)} done after {time.time() - t0:.0f}s")
+    results.sort(key=lambda r: (r["time_error"], r["event_error"]))
+
+    zone_names = [zone_label(zone_id, z) for zone_id, z in cam_config.get("zones", {}).items()]
+    write_results(args.output, results, zone_names)
+    print(f"[Sweep] Finished in {time.time() - t0:.1f}s, results written to {args.output}")
+    if reference:
+        print(f"\nBest {min(args.top, len(results))} vs {args.reference}:")
+        for r in results[:args.top]:
+            params = ", ".join(f"{k}={v:g}" for k, v in sorted(r["params"].items()))
+            print(f"  time error {r['time_error'] * 100:5.1f}% | event error {r['event_error']:3d} | {params}")
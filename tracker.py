@@ -0,0 +1,501 @@
+from collections import deque
+import numpy as np
+
+# Keypoints & Thresholds
+HAND_KEYPOINTS = [9, 10]
+SHOULDER_KEYPOINTS = [5, 6]
+HEAD_KEYPOINT = 0
+HIP_KEYPOINTS = [11, 12]
+ACTIVITY_THRESHOLD = 5  # Piksel per frame (mode lama, activity_window=0)
+ACTIVITY_WINDOW = 2.0  # Detik keypoint yang dinilai per orang
+ACTIVITY_GRID = 0.2  # Keypoint di-resample ke grid 5 Hz: hasil sama untuk semua rate proses >= 5 fps
+WINDOW_ACTIVITY_THRESHOLD = 1.5  # Lebar bahu per detik (gerak tangan/bahu berbobot), setara ~5 px/frame di 12 fps
+DEFAULT_PERSON_SCALE = 40  # Piksel, dipakai bila bahu/torso tidak terlihat
+IDLE_TIMEOUT = 3
+VISIBILITY_THRESHOLD = 0.5
+LOG_RETURN_THRESHOLD = 15  # Log "Returned to Zone" setelah 15 detik STABIL dalam zona
+TRACK_TTL = 600  # Track id ByteTrack yang tidak terlihat selama ini dilupakan
+EVICTION_INTERVAL = 60
+
+def get_person_center(keypoints, visibility, HEAD_KEYPOINT, SHOULDER_KEYPOINTS, HIP_KEYPOINTS, VISIBILITY_THRESHOLD):
+    visible_points = []
+    for idx in [HEAD_KEYPOINT] + SHOULDER_KEYPOINTS + HIP_KEYPOINTS:
+        if visibility[idx] > VISIBILITY_THRESHOLD:
+            visible_points.append(keypoints[idx])
+    if len(visible_points) > 0:
+        center = np.mean(visible_points, axis=0)
+        return int(center[0]), int(center[1])
+    return None
+
+def zone_label(zone_id, zone_data):
+    """Zone name from config, or "Zone <id>" for zones defined with only the 4 coordinates"""
+    return zone_data[4] if len(zone_data) > 4 else f"Zone {zone_id}"
+
+def find_zone_by_position(center, WORKSTATION_ZONES):
+    if center is None:
+        return None
+    x, y = center
+    for zone_id, zone_data in WORKSTATION_ZONES.items():
+        x1, y1, x2, y2 = zone_data[:4]
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            return zone_id
+    return None
+
+def is_in_zone(center, zone_id, WORKSTATION_ZONES):
+    if center is None or zone_id is None or zone_id not in WORKSTATION_ZONES:
+        return False
+    x, y = center
+    x1, y1, x2, y2 = WORKSTATION_ZONES[zone_id][:4]
+    return x1 <= x <= x2 and y1 <= y <= y2
+
+HAND_WEIGHT = 2.0
+SHOULDER_WEIGHT = 1.0
+
+def calculate_activity_score(pose1, pose2, vis1, vis2, HAND_KEYPOINTS, SHOULDER_KEYPOINTS, VISIBILITY_THRESHOLD,
+                             hand_weight=HAND_WEIGHT, shoulder_weight=SHOULDER_WEIGHT):
+    if pose1 is None or pose2 is None:
+        return 0
+    score = 0
+    for hand_idx in HAND_KEYPOINTS:
+        if vis1[hand_idx] > VISIBILITY_THRESHOLD and vis2[hand_idx] > VISIBILITY_THRESHOLD:
+            movement = np.linalg.norm(pose1[hand_idx] - pose2[hand_idx])
+            score += movement * hand_weight
+    for shoulder_idx in SHOULDER_KEYPOINTS:
+        if vis1[shoulder_idx] > VISIBILITY_THRESHOLD and vis2[shoulder_idx] > VISIBILITY_THRESHOLD:
+            movement = np.linalg.norm(pose1[shoulder_idx] - pose2[shoulder_idx])
+            score += movement * shoulder_weight
+    return score
+
+def person_scale(keypoints, visibility, VISIBILITY_THRESHOLD):
+    """Median shoulder width (or half the shoulder-hip torso length) over the window, in pixels"""
+    vis = visibility > VISIBILITY_THRESHOLD
+    sizes = np.where(vis[:, 5] & vis[:, 6], np.linalg.norm(keypoints[:, 5] - keypoints[:, 6], axis=1),
+            np.where(vis[:, 5] & vis[:, 11], np.linalg.norm(keypoints[:, 5] - keypoints[:, 11], axis=1) / 2,
+            np.where(vis[:, 6] & vis[:, 12], np.linalg.norm(keypoints[:, 6] - keypoints[:, 12], axis=1) / 2, np.nan)))
+    sizes = sizes[~np.isnan(sizes)]
+    size = float(np.median(sizes)) if len(sizes) else 0.0
+    return size if size >= 5 else DEFAULT_PERSON_SCALE
+
+def windowed_activity_score(history, current_time, window, grid, HAND_KEYPOINTS, SHOULDER_KEYPOINTS,
+                            VISIBILITY_THRESHOLD, hand_weight=HAND_WEIGHT, shoulder_weight=SHOULDER_WEIGHT):
+    """Weighted hand/shoulder path length per second over the last `window` seconds, in person-scale units.
+
+    history: (timestamp, keypoints, visibility) in time order. Positions are
+    interpolated onto a fixed time grid first, so the same motion scores
+    the same at any processing rate at or above 1/grid. Below that,
+    motion between samples is lost and the score drifts toward idle;
+    budget.py keeps cameras with people at >= 1/ACTIVITY_GRID for this.
+    """
+    if len(history) < 2:
+        return 0
+    times = np.fromiter((t for t, _, _ in history), dtype=np.float64, count=len(history))
+    keypoints = np.stack([kp for _, kp, _ in history]).astype(np.float64)
+    visibility = np.stack([v for _, _, v in history])
+    start = current_time - window
+    score = 0.0
+    for idx, weight in [(k, hand_weight) for k in HAND_KEYPOINTS] + [(k, shoulder_weight) for k in SHOULDER_KEYPOINTS]:
+        visible = visibility[:, idx] > VISIBILITY_THRESHOLD
+        if visible.sum() < 2:
+            continue
+        ts = times[visible]
+        # Grid di kelipatan tetap supaya titik sampel tidak ikut bergeser dengan rate proses
+        first = max(start, ts[0])
+        grid_times = np.arange(np.ceil(first / grid) * grid, min(current_time, ts[-1]) + 1e-9, grid)
+        if len(grid_times) < 2:
+            continue
+        xs = np.interp(grid_times, ts, keypoints[visible, idx, 0])
+        ys = np.interp(grid_times, ts, keypoints[visible, idx, 1])
+        path = np.hypot(np.diff(xs), np.diff(ys)).sum()
+        score += weight * path / (grid_times[-1] - grid_times[0])
+    return score / person_scale(keypoints, visibility, VISIBILITY_THRESHOLD)
+
+def is_valid_detection(visibility, HEAD_KEYPOINT, VISIBILITY_THRESHOLD):
+    head_visible = visibility[HEAD_KEYPOINT] > VISIBILITY_THRESHOLD
+    shoulders_visible = (visibility[5] > VISIBILITY_THRESHOLD and visibility[6] > VISIBILITY_THRESHOLD)
+    return head_visible or shoulders_visible
+
+
+class ZoneTracker:
+    """Zone ownership and working/idle/away state machine of one camera, independent of video and inference"""
+
+    def __init__(self, zones, away_timeout, activity_threshold=None,
+                 idle_timeout=IDLE_TIMEOUT, visibility_threshold=VISIBILITY_THRESHOLD,
+                 log_return_threshold=LOG_RETURN_THRESHOLD, hand_weight=HAND_WEIGHT,
+                 shoulder_weight=SHOULDER_WEIGHT, track_ttl=TRACK_TTL, long_idle=0,
+                 activity_window=ACTIVITY_WINDOW, activity_grid=ACTIVITY_GRID):
+        self.zones = zones
+        self.away_timeout = away_timeout  # detik
+        # activity_window=0: skor lama antar dua frame berurutan (tergantung fps)
+        self.activity_window = activity_window
+        self.activity_grid = activity_grid
+        if activity_threshold is None:
+            activity_threshold = WINDOW_ACTIVITY_THRESHOLD if activity_window else ACTIVITY_THRESHOLD
+        self.activity_threshold = activity_threshold
+        self.idle_timeout = idle_timeout
+        self.visibility_threshold = visibility_threshold
+        self.log_return_threshold = log_return_threshold
+        self.hand_weight = hand_weight
+        self.shoulder_weight = shoulder_weight
+        self.track_ttl = track_ttl
+        self.long_idle = long_idle  # Detik idle sebelum event "Long Idle" (0 = tidak dicatat)
+
+        self.worker_data = {}
+        self.zone_ownership = {}
+        self.person_to_zone = {}
+        self.track_to_person = {}
+        self.track_last_seen = {}
+        self.next_person_id = 1
+        self.last_eviction = None
+        self.downtime = 0.0  # Detik tanpa proses hari ini (restart), tidak dihitung sebagai working/away
+        self.carried = {}  # zone_name -> total hari ini dari proses sebelumnya (lihat seed_totals)
+
+    def set_zones(self, zones):
+        """Swap zone geometry in place; people in zones that still exist keep their timers"""
+        for zone_id in set(self.zones) - set(zones):
+            person_id = self.zone_ownership.pop(zone_id, None)
+            if person_id is None:
+                continue
+            self.person_to_zone.pop(person_id, None)
+            self.worker_data.pop(person_id, None)
+            for track_id in [t for t, p in self.track_to_person.items() if p == person_id]:
+                del self.track_to_person[track_id]
+                self.track_last_seen.pop(track_id, None)
+        self.zones = zones
+
+    def reset_day(self):
+        """Forget people, ownership and timers at a day boundary (totals must be saved first)"""
+        self.worker_data.clear()
+        self.zone_ownership.clear()
+        self.person_to_zone.clear()
+        self.track_to_person.clear()
+        self.track_last_seen.clear()
+        self.next_person_id = 1
+        self.downtime = 0.0
+        self.carried = {}
+
+    def seed_totals(self, totals):
+        """Continue today's per-zone totals recorded by another process (camera moved node, no checkpoint)"""
+        self.carried = {zone_name: dict(t) for zone_name, t in totals.items()}
+
+    def snapshot(self):
+        """Picklable view of the state machine; pickle it right away, it references live objects"""
+        return {
+            "worker_data": self.worker_data,
+            "zone_ownership": self.zone_ownership,
+            "person_to_zone": self.person_to_zone,
+            "next_person_id": self.next_person_id,
+            "downtime": self.downtime,
+            "carried": self.carried,
+        }
+
+    def restore(self, state, gap=0.0):
+        """Load a snapshot; time fields shift by the downtime gap so it is counted neither as work nor away"""
+        self.worker_data = state["worker_data"]
+        self.zone_ownership = state["zone_ownership"]
+        self.person_to_zone = state["person_to_zone"]
+        self.next_person_id = state["next_person_id"]
+        self.downtime = state.get("downtime", 0.0) + gap
+        self.carried = state.get("carried", {})
+        # Model baru berarti id ByteTrack mulai dari awal, mapping lama tidak berlaku
+        self.track_to_person = {}
+        self.track_last_seen = {}
+        for data in self.worker_data.values():
+            data["track_ids"] = set()
+            for key in ("last_update", "last_activity_time", "last_seen", "status_change_time"):
+                data[key] += gap
+            data["in_zone_start_time"] = None
+            data["consecutive_in_zone_time"] = 0
+            data["pose_history"] = deque()
+        self.set_zones(self.zones)
+
+    def evict_stale_tracks(self, current_time):
+        """Drop track ids unseen for track_ttl seconds and compact each person's track id set"""
+        stale = [t for t, seen in self.track_last_seen.items() if current_time - seen > self.track_ttl]
+        for track_id in stale:
+            del self.track_last_seen[track_id]
+            self.track_to_person.pop(track_id, None)
+        # Track id baru selalu dipetakan ulang lewat posisi zona, jadi aman dilupakan
+        for data in self.worker_data.values():
+            data["track_ids"].intersection_update(self.track_to_person)
+        return len(stale)
+
+    def state_size(self):
+        return {
+            "people": len(self.worker_data),
+            "tracks": len(self.track_to_person),
+            "person_track_ids": sum(len(d["track_ids"]) for d in self.worker_data.values()),
+        }
+
+    def zone_name(self, zone_id):
+        return zone_label(zone_id, self.zones.get(zone_id, ()))
+
+    def new_worker(self, keypoints, visibility, center, track_id, zone_id, current_time):
+        return {
+            "last_pose": keypoints,
+            "last_visibility": visibility,
+            "last_update": current_time,
+            "last_activity_time": current_time,
+            "last_seen": current_time,
+            "first_seen": current_time,
+            "working_time": 0,
+            "idle_time": 0,
+            "away_time": 0,
+            "status": "working",
+            "last_activity_score": 0,
+            "center": center,
+            "zone_id": zone_id,
+            "track_ids": {track_id},
+            "previous_status": "working",
+            "status_change_time": current_time,
+
+            # Enhanced fields for sequential logging
+            "in_zone_start_time": current_time,
+            "left_zone_logged": False,
+            "returned_zone_logged": False,
+            "was_in_zone": True,
+            "consecutive_in_zone_time": 0,
+            "can_log_return": False,
+            "last_left_log_time": None,
+            "first_stable_time": None,
+            "long_idle_logged": False,
+            "pose_history": deque(),  # (timestamp, keypoints, visibility) selama activity_window
+        }
+
+    def window_score(self, data, keypoints, visibility, current_time):
+        history = data.setdefault("pose_history", deque())
+        history.append((current_time, keypoints, visibility))
+        # Simpan satu sampel sebelum awal window untuk interpolasi di tepi grid
+        while len(history) > 2 and history[1][0] <= current_time - self.activity_window:
+            history.popleft()
+        return windowed_activity_score(history, current_time, self.activity_window, self.activity_grid,
+                                       HAND_KEYPOINTS, SHOULDER_KEYPOINTS, self.visibility_threshold,
+                                       self.hand_weight, self.shoulder_weight)
+
+    def update(self, detections, current_time, work_active, break_active):
+        """Apply one processed frame; returns the zone events it produced.
+
+        detections: iterable of (track_id, keypoints, visibility) numpy arrays.
+        """
+        events = []
+        active_persons = set()
+        vis_threshold = self.visibility_threshold
+
+        for track_id, keypoints, visibility in detections:
+            if not is_valid_detection(visibility, HEAD_KEYPOINT, vis_threshold):
+                continue
+            center = get_person_center(keypoints, visibility, HEAD_KEYPOINT, SHOULDER_KEYPOINTS, HIP_KEYPOINTS, vis_threshold)
+
+            if track_id in self.track_to_person:
+                person_id = self.track_to_person[track_id]
+            else:
+                zone_id = find_zone_by_position(center, self.zones)
+                if zone_id is None:
+                    continue
+                if zone_id in self.zone_ownership:
+                    person_id = self.zone_ownership[zone_id]
+                else:
+                    person_id = self.next_person_id
+                    self.next_person_id += 1
+                    self.zone_ownership[zone_id] = person_id
+                    self.person_to_zone[person_id] = zone_id
+                self.track_to_person[track_id] = person_id
+
+            active_persons.add(person_id)
+            self.track_last_seen[track_id] = current_time
+            if person_id not in self.worker_data:
+                self.worker_data[person_id] = self.new_worker(
+                    keypoints, visibility, center, track_id, self.person_to_zone.get(person_id), current_time)
+            else:
+                self.worker_data[person_id]["track_ids"].add(track_id)
+
+            data = self.worker_data[person_id]
+            data["last_seen"] = current_time
+            zone_id = self.person_to_zone.get(person_id)
+            zone_name = self.zone_name(zone_id)
+            in_zone = is_in_zone(center, zone_id, self.zones)
+            if self.activity_window:
+                activity_score = self.window_score(data, keypoints, visibility, current_time)
+            else:
+                activity_score = calculate_activity_score(
+                    keypoints,
+                    data["last_pose"],
+                    visibility,
+                    data["last_visibility"],
+                    HAND_KEYPOINTS,
+                    SHOULDER_KEYPOINTS,
+                    vis_threshold,
+                    self.hand_weight,
+                    self.shoulder_weight
+                )
+            time_delta = current_time - data["last_update"]
+
+            if work_active and not break_active:
+                if not in_zone:
+                    # Person keluar zona
+                    if data["status"] != "away":
+                        # Baru mulai away
+                        data["status"] = "away"
+                        # JANGAN reset flags jika sudah pernah log "Left Zone"
+                        if not data["left_zone_logged"]:
+                            data["left_zone_logged"] = False
+                            data["returned_zone_logged"] = False
+                            data["can_log_return"] = False
+                        data["was_in_zone"] = False
+                        # Reset in-zone tracking
+                        data["in_zone_start_time"] = None
+                        data["consecutive_in_zone_time"] = 0
+
+                    data["away_time"] += time_delta
+
+                else:  # Person dalam zona
+                    # Reset status away jika masuk zona
+                    if data["status"] == "away":
+                        data["status"] = "working"
+
+                    # Update in-zone tracking
+                    if data["in_zone_start_time"] is None:
+                        # Baru masuk zona, mulai tracking
+                        data["in_zone_start_time"] = current_time
+                        data["consecutive_in_zone_time"] = 0
+                        data["was_in_zone"] = True
+
+                        # Cek apakah sudah pernah log "Left Zone" sebelumnya
+                        if data["left_zone_logged"] and not data["returned_zone_logged"]:
+                            data["can_log_return"] = True
+                    else:
+                        # Masih dalam zona, tambah waktu consecutive
+                        data["consecutive_in_zone_time"] = current_time - data["in_zone_start_time"]
+
+                    # Update status berdasarkan aktivitas
+                    if activity_score > self.activity_threshold:
+                        data["status"] = "working"
+                        data["working_time"] += time_delta
+                        data["last_activity_time"] = current_time
+                        data["long_idle_logged"] = False
+                    else:
+                        idle_seconds = current_time - data["last_activity_time"]
+                        if idle_seconds > self.idle_timeout:
+                            data["status"] = "idle"
+                            data["idle_time"] += time_delta
+                            if self.long_idle and idle_seconds >= self.long_idle and not data.get("long_idle_logged"):
+                                events.append({
+                                    "zone_id": zone_id,
+                                    "zone_name": zone_name,
+                                    "event": "Long Idle",
+                                    "status_change": "idle",
+                                    "timestamp": current_time,
+                                    "message": f"[LOG] {zone_name}: Long Idle for {idle_seconds / 60:.1f} minutes",
+                                })
+                                data["long_idle_logged"] = True
+                        else:
+                            data["status"] = "working"
+                            data["working_time"] += time_delta
+
+                    stable = (data["consecutive_in_zone_time"] >= self.log_return_threshold and
+                              data["status"] in ["working", "idle"])
+                    if stable and data["first_stable_time"] is None:
+                        data["first_stable_time"] = current_time
+
+                    # Log "Returned to Zone"
+                    can_log_conditions = [
+                        not data["returned_zone_logged"],  # Belum pernah log return
+                        data["can_log_return"],            # Sudah pernah log "Left Zone"
+                        stable                             # Stabil 15 detik, status working/idle
+                    ]
+
+                    if all(can_log_conditions):
+                        stable_seconds = data["consecutive_in_zone_time"]
+                        events.append({
+                            "zone_id": zone_id,
+                            "zone_name": zone_name,
+                            "event": "Returned to Zone",
+                            "status_change": "away → working",
+                            "timestamp": current_time,
+                            "in_zone_start_time": data["in_zone_start_time"],
+                            "message": f"[LOG] {zone_name}: Returned to Zone after {stable_seconds:.1f}s stable in zone",
+                        })
+                        data["returned_zone_logged"] = True
+                        data["can_log_return"] = False  # Reset permission
+
+            data["last_pose"] = keypoints
+            data["last_visibility"] = visibility
+            data["last_update"] = current_time
+            data["center"] = center
+
+        # Handle persons not currently detected
+        for person_id, data in self.worker_data.items():
+            if person_id not in active_persons:
+                # Reset in-zone tracking saat tidak terdeteksi
+                data["in_zone_start_time"] = None
+                data["consecutive_in_zone_time"] = 0
+
+                # Gunakan AWAY_TIMEOUT untuk menentukan kapan log "Left Zone"
+                if current_time - data["last_seen"] > self.away_timeout:
+                    if data["status"] != "away":
+                        # Person sudah tidak terdeteksi lebih dari AWAY_TIMEOUT
+                        data["status"] = "away"
+                        data["was_in_zone"] = False
+
+                    data["away_time"] += current_time - data["last_update"]
+
+                    # Log "Left Zone" LANGSUNG setelah AWAY_TIMEOUT terlewati
+                    if not data["left_zone_logged"]:
+                        zone_id = self.person_to_zone.get(person_id)
+                        zone_name = self.zone_name(zone_id)
+                        away_minutes = (current_time - data["last_seen"]) / 60
+                        events.append({
+                            "zone_id": zone_id,
+                            "zone_name": zone_name,
+                            "event": "Left Zone",
+                            "status_change": "working → away",
+                            "timestamp": current_time,
+                            "message": f"[LOG] {zone_name}: Left Zone after {away_minutes:.1f} minutes away",
+                        })
+                        data["left_zone_logged"] = True
+                        data["can_log_return"] = True  # PENTING: Izinkan log return
+                        data["returned_zone_logged"] = False  # Reset returned flag
+                        data["last_left_log_time"] = current_time  # Track waktu log
+
+                data["last_update"] = current_time
+
+        if self.last_eviction is None or current_time < self.last_eviction:
+            self.last_eviction = current_time
+        elif current_time - self.last_eviction >= EVICTION_INTERVAL:
+            self.evict_stale_tracks(current_time)
+            self.last_eviction = current_time
+        return events
+
+    def zone_totals(self):
+        """Working/idle/away seconds per zone name, including carried totals (zones without either are 0)"""
+        totals = {}
+        for zone_id, zone_data in self.zones.items():
+            zone_name = zone_label(zone_id, zone_data)
+            person_id = self.zone_ownership.get(zone_id)
+            if person_id and person_id in self.worker_data:
+                w = self.worker_data[person_id]
+                totals[zone_name] = {
+                    'working_time': w['working_time'],
+                    'idle_time': w['idle_time'],
+                    'away_time': w['away_time'],
+                }
+            else:
+                totals[zone_name] = {'working_time': 0, 'idle_time': 0, 'away_time': 0}
+            carried = self.carried.get(zone_name)
+            if carried:
+                totals[zone_name] = {k: v + carried.get(k, 0) for k, v in totals[zone_name].items()}
+        return totals
+
+    def pending_transitions(self, current_time):
+        """People about to change status: missing past half the away timeout, or back and waiting for the return log"""
+        count = 0
+        for data in self.worker_data.values():
+            missing = current_time - data["last_seen"]
+            if not data["left_zone_logged"] and self.away_timeout * 0.5 < missing <= self.away_timeout:
+                count += 1
+            elif data["can_log_return"] and data["in_zone_start_time"] is not None:
+                count += 1
+        return count
+
+    def zone_worker(self, zone_id):
+        person_id = self.zone_ownership.get(zone_id)
+        return self.worker_data.get(person_id) if person_id else None